@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Compare two benchmark result files
+
+Usage:
+    python benchmarks/compare.py results/OLD.json results/NEW.json [--threshold 1.2]
+
+Exits with status 1 when any case present in both files got slower than the
+threshold ratio of medians.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict
+
+
+def _load(path: Path) -> Dict[str, Dict[str, Any]]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    cases = {}
+    for result in data["results"]:
+        args = ",".join(f"{k}={v}" for k, v in result["params"].items())
+        cases[f"{result['name']}[{args}]" if args else result["name"]] = result
+    return cases
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare benchmark medians between two runs")
+    parser.add_argument("old", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="new/old median ratio counted as a regression (default 1.2)")
+    args = parser.parse_args()
+
+    old, new = _load(args.old), _load(args.new)
+    regressions = 0
+
+    print(f"{'case':<42} {'old ms':>10} {'new ms':>10} {'ratio':>7}")
+    for key in sorted(old.keys() | new.keys()):
+        if key not in old or key not in new:
+            print(f"{key:<42} {'only in ' + ('new' if key in new else 'old'):>29}")
+            continue
+        old_ms = old[key]["median_s"] * 1000
+        new_ms = new[key]["median_s"] * 1000
+        ratio = new_ms / old_ms if old_ms else float("inf")
+        flag = ""
+        if ratio > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif ratio < 1 / args.threshold:
+            flag = "  faster"
+        print(f"{key:<42} {old_ms:10.2f} {new_ms:10.2f} {ratio:7.2f}{flag}")
+
+    if regressions:
+        print(f"\n{regressions} case(s) slower than {args.threshold}x")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""Synthetic fixtures for the benchmark suite
+
+All generators are deterministic for a given seed so results are comparable
+across commits.
+"""
+
+import json
+import random
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+WORDS = [
+    "完成", "周报", "设计", "评审", "修复", "登录", "接口", "文档", "整理", "测试",
+    "review", "deploy", "refactor", "meeting", "call", "prepare", "write", "update",
+]
+
+
+def _title(rng: random.Random, words: int = 4) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def make_next_md(project: str, pending: int, history: int, seed: int = 0) -> str:
+    """Build NEXT.md content with pending tasks and a completed history"""
+    rng = random.Random(f"{seed}:{project}")
+    sections = ["## 今天", "## 本周", "## 待定", "## 阻塞"]
+
+    lines = ["# 下一步行动", ""]
+    for i, section in enumerate(sections):
+        lines.append(section)
+        for j in range(i, pending, len(sections)):
+            lines.append(f"- [ ] {_title(rng)} #{j}")
+        lines.append("")
+
+    lines.append("## 已完成")
+    day = date(2025, 12, 31)
+    for i in range(history):
+        if i % 20 == 0:
+            lines.append(f"### {day.strftime('%Y-W%W')}")
+        lines.append(f"- [x] {_title(rng)} h{i} ✓{day.strftime('%m-%d')}")
+        if i % 3 == 2:
+            day -= timedelta(days=1)
+    lines.append("")
+    return "\n".join(lines)
+
+
+def make_projects(root: Path, n_projects: int, pending: int = 8, max_history: int = 200) -> Path:
+    """Create n_projects project folders each holding a NEXT.md
+
+    History length varies per project between 0 and max_history.
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    for i in range(n_projects):
+        project_dir = root / f"project-{i:04d}"
+        project_dir.mkdir(exist_ok=True)
+        history = (i * 7919) % (max_history + 1)
+        (project_dir / "NEXT.md").write_text(
+            make_next_md(project_dir.name, pending, history), encoding="utf-8"
+        )
+    return root
+
+
+def pending_titles(root: Path) -> List[str]:
+    """Google task titles ("[project] title") of every pending NEXT.md task"""
+    titles = []
+    for next_file in sorted(root.glob("*/NEXT.md")):
+        for line in next_file.read_text(encoding="utf-8").split("\n"):
+            if line.startswith("- [ ] "):
+                titles.append(f"[{next_file.parent.name}] {line[6:].strip()}")
+    return titles
+
+
+def _rfc3339(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def make_tasks(n: int, completed_ratio: float = 0.3, seed: int = 0,
+               title_prefix: str = "") -> List[Dict[str, Any]]:
+    """Google Tasks API task resources"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    tasks = []
+    for i in range(n):
+        completed = rng.random() < completed_ratio
+        due = now + timedelta(days=rng.randint(-30, 60))
+        task = {
+            "kind": "tasks#task",
+            "id": f"task{i:06d}",
+            "etag": f"\"etag-{i}\"",
+            "title": f"{title_prefix}{_title(rng)}",
+            "updated": _rfc3339(now - timedelta(minutes=rng.randint(0, 100000))),
+            "position": f"{i:020d}",
+            "status": "completed" if completed else "needsAction",
+            "due": due.strftime("%Y-%m-%dT00:00:00.000Z"),
+        }
+        if rng.random() < 0.5:
+            task["notes"] = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 30)))
+        if completed:
+            task["completed"] = _rfc3339(now - timedelta(days=rng.randint(0, 30)))
+        tasks.append(task)
+    return tasks
+
+
+def make_events(days: int, per_day: int = 6, seed: int = 0) -> List[Dict[str, Any]]:
+    """Google Calendar API event resources spanning the next `days` days"""
+    rng = random.Random(seed)
+    start_day = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    events = []
+    for d in range(days):
+        day = start_day + timedelta(days=d)
+        if rng.random() < 0.2:
+            events.append({
+                "kind": "calendar#event",
+                "id": f"allday{d:04d}",
+                "summary": _title(rng, 2),
+                "start": {"date": day.strftime("%Y-%m-%d")},
+                "end": {"date": (day + timedelta(days=1)).strftime("%Y-%m-%d")},
+            })
+        for i in range(per_day):
+            start = day + timedelta(hours=8 + i * 1.5, minutes=rng.choice([0, 15, 30]))
+            end = start + timedelta(minutes=rng.choice([15, 30, 45, 60, 90, 120]))
+            event = {
+                "kind": "calendar#event",
+                "id": f"event{d:04d}{i:02d}",
+                "status": "confirmed",
+                "summary": _title(rng, 3),
+                "description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 40))),
+                "location": "Room " + str(rng.randint(1, 30)),
+                "start": {"dateTime": _rfc3339(start)},
+                "end": {"dateTime": _rfc3339(end)},
+                "attendees": [
+                    {"email": f"user{rng.randint(1, 500)}@example.com", "responseStatus": "accepted"}
+                    for _ in range(rng.randint(0, 8))
+                ],
+                "conferenceData": {"entryPoints": [{"uri": "https://meet.example.com/abc"}]},
+            }
+            events.append(event)
+    return events
+
+
+def write_token(data_dir: Path) -> None:
+    """Write a long-lived fake OAuth token for the default account"""
+    tokens_dir = data_dir / "tokens"
+    tokens_dir.mkdir(parents=True, exist_ok=True)
+    token = {
+        "access_token": "bench-access-token",
+        "refresh_token": "bench-refresh-token",
+        "token_type": "Bearer",
+        "scope": "https://www.googleapis.com/auth/tasks",
+        "expires_at": (datetime.now() + timedelta(days=3650)).isoformat(),
+    }
+    (tokens_dir / "google_token.json").write_text(json.dumps(token), encoding="utf-8")
+
+
+def write_credentials(config_dir: Path) -> None:
+    """Write placeholder OAuth client credentials"""
+    credentials = {"installed": {"client_id": "bench-client", "client_secret": "bench-secret"}}
+    (config_dir / "credentials.json").write_text(json.dumps(credentials), encoding="utf-8")
+
+
+def fill_vault(manager, n: int, batch: int = 1000, seed: int = 0) -> None:
+    """Add n API-key secrets to a SecretsManager, in batches of one fsync each"""
+    from pm.security.secrets import Secret, SecretType
+
+    rng = random.Random(seed)
+    now = datetime(2025, 1, 1)
+    for start in range(0, n, batch):
+        manager._save_secrets([
+            Secret(
+                id=f"secret-{i:06d}", name=f"service-{i:06d}", type=SecretType.API_KEY,
+                value=manager.cipher.encrypt(f"sk-{rng.getrandbits(128):032x}".encode()).decode(),
+                description=_title(rng), created_at=now, updated_at=now,
+                expires_at=now + timedelta(days=rng.randint(1, 730)),
+                rotation_period=timedelta(days=90), last_rotated=now,
+                tags={"env": rng.choice(["prod", "staging", "dev"]), "team": f"t{i % 20}"},
+                metadata={},
+            )
+            for i in range(start, min(start + batch, n))
+        ])
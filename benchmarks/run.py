@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""Benchmark suite for the sync, parse and render hot paths
+
+Runs every case against synthetic fixtures and the bundled fake Google API
+server (pm.testing.fake_google), in an isolated HOME so the real
+~/.personalmanager is never touched.
+
+Usage:
+    python benchmarks/run.py                 # full suite
+    python benchmarks/run.py --quick         # smaller sizes, fewer repeats
+    python benchmarks/run.py --only fetch    # cases whose name contains "fetch"
+    python benchmarks/run.py --latency-ms 80 # simulate a real network round-trip
+    python benchmarks/compare.py OLD.json NEW.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT = BENCH_DIR.parent
+RESULTS_DIR = BENCH_DIR / "results"
+
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(ROOT / "src"))
+
+from pm.testing.fake_google import FakeGoogleServer, FaultProfile  # noqa: E402
+from fixtures import (  # noqa: E402
+    fill_vault, make_events, make_next_md, make_projects, make_tasks, pending_titles,
+    write_credentials, write_token,
+)
+
+SIZES = {
+    "full": {
+        "parse_history": [10, 100, 1000, 10000],
+        "projects": [10, 100, 1000],
+        "sync_projects": [10, 100, 1000],
+        "tasks": [100, 1000, 10000, 50000],
+        "days": [7, 30, 90, 365],
+        "secrets": [10000, 100000],
+        "repeat": 5,
+    },
+    "quick": {
+        "parse_history": [10, 1000],
+        "projects": [10, 100],
+        "sync_projects": [10],
+        "tasks": [100, 10000],
+        "days": [7, 365],
+        "secrets": [10000],
+        "repeat": 3,
+    },
+}
+
+CLI_COMMANDS = [
+    ["today"],
+    ["inbox"],
+    ["cal", "--days", "7"],
+    ["next"],
+    ["add", "benchmark task"],
+    ["version"],
+]
+
+
+def case_key(name: str, params: Dict[str, Any]) -> str:
+    args = ",".join(f"{k}={v}" for k, v in params.items())
+    return f"{name}[{args}]" if args else name
+
+
+@dataclass
+class Case:
+    """A timed operation; before_each runs untimed before every repeat"""
+    name: str
+    params: Dict[str, Any]
+    run: Callable[[], Any]
+    repeat: int
+    before_each: Optional[Callable[[], None]] = None
+    # Overrides the server's fault profile while the case runs
+    faults: Optional[FaultProfile] = None
+    timings: List[float] = field(default_factory=list)
+
+    @property
+    def key(self) -> str:
+        return case_key(self.name, self.params)
+
+
+class Environment:
+    """Isolated HOME, fake API server and fixture directories"""
+
+    def __init__(self, faults: FaultProfile, only: str = ""):
+        # Builders skip the fixtures of cases --only does not select
+        self.only = only
+        self.tmp = Path(tempfile.mkdtemp(prefix="pm-bench-"))
+        self.api = FakeGoogleServer(faults)
+        # First list, so it is what "@default" resolves to
+        self.api.add_task_list("My Tasks", list_id="default")
+
+    def __enter__(self) -> "Environment":
+        base_url = self.api.start()
+
+        # Must be set before pm is imported: PMConfig reads them on creation
+        home = self.tmp / "home"
+        home.mkdir()
+        os.environ["HOME"] = str(home)
+        os.environ["PM_GOOGLE_API_BASE_URL"] = base_url
+        os.environ["PM_GOOGLE_OAUTH_TOKEN_URL"] = self.api.token_url
+        os.environ["PM_HTTP_CACHE_ENABLED"] = "false"
+        os.environ["PM_CALENDAR_SYNC_ENABLED"] = "false"
+        os.environ["PM_TASK_SYNC_ENABLED"] = "false"
+
+        import structlog
+        structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+        from pm.core.config import PMConfig
+        self.config = PMConfig()
+        self.config.data_dir.mkdir(parents=True, exist_ok=True)
+        write_credentials(self.config.config_dir)
+        write_token(self.config.data_dir)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.api.stop()
+
+    def path(self, name: str) -> Path:
+        return self.tmp / name
+
+    def selects(self, name: str, **params: Any) -> bool:
+        return self.only in case_key(name, params)
+
+
+def parse_cases(env: Environment, sizes: Dict[str, Any]) -> List[Case]:
+    from pm.parsers.next_md_parser import NextMdParser
+
+    parser = NextMdParser()
+    cases = []
+    for history in sizes["parse_history"]:
+        if not env.selects("parse_file", history=history):
+            continue
+        next_file = env.path(f"parse-{history}") / "NEXT.md"
+        next_file.parent.mkdir(parents=True)
+        next_file.write_text(make_next_md("bench", 20, history), encoding="utf-8")
+        cases.append(Case("parse_file", {"history": history},
+                          lambda p=next_file: parser.parse_file(p, "bench"), sizes["repeat"]))
+
+    for n in sizes["projects"]:
+        if not env.selects("scan_projects", projects=n):
+            continue
+        root = make_projects(env.path(f"scan-{n}"), n)
+        cases.append(Case("scan_projects", {"projects": n},
+                          lambda r=root: parser.scan_projects(r), sizes["repeat"]))
+
+    # API resource -> GoogleTask conversion, dominated by timestamp parsing
+    from pm.integrations.google_tasks import GoogleTask
+    for n in sizes["tasks"]:
+        if not env.selects("tasks_from_api", tasks=n):
+            continue
+        items = make_tasks(n)
+        cases.append(Case("tasks_from_api", {"tasks": n},
+                          lambda i=items: GoogleTask.from_api_responses(i), sizes["repeat"]))
+    return cases
+
+
+def sync_cases(env: Environment, sizes: Dict[str, Any]) -> List[Case]:
+    from pm.core.next_sync import NextSyncManager
+    from pm.integrations.google_tasks import GoogleTasksIntegration
+
+    api = env.api
+    cases = []
+    for n in sizes["sync_projects"]:
+        if not (env.selects("push", projects=n) or env.selects("pull", projects=n)):
+            continue
+        root = make_projects(env.path(f"sync-{n}"), n)
+        manager = NextSyncManager(env.config, str(root))
+        manager.master_path = env.path(f"MASTER-{n}.md")
+        repeat = 1 if n >= 1000 else sizes["repeat"]
+
+        def reset_empty():
+            replace_next_tasks(api, [])
+
+        def reset_completed(root=root, n=n):
+            make_projects(root, n)
+            replace_next_tasks(api, [
+                {"title": title, "status": "completed" if i % 2 == 0 else "needsAction",
+                 "updated": "2025-01-01T00:00:00.000Z"}
+                for i, title in enumerate(pending_titles(root))
+            ])
+
+        cases.append(Case("push", {"projects": n}, manager.push, repeat, reset_empty))
+        cases.append(Case("pull", {"projects": n}, manager.pull, repeat, reset_completed))
+
+    # Same push with every 10th request rate limited, to measure retry cost
+    n = sizes["sync_projects"][0]
+    if env.selects("push_rate_limited", projects=n):
+        root = make_projects(env.path("sync-throttled"), n)
+        manager = NextSyncManager(env.config, str(root))
+        manager.master_path = env.path("MASTER-throttled.md")
+        cases.append(Case("push_rate_limited", {"projects": n}, manager.push, sizes["repeat"],
+                          lambda: replace_next_tasks(api, []),
+                          faults=FaultProfile(rate_limit_every=10, retry_after=0.05)))
+
+    tasks = GoogleTasksIntegration(env.config)
+    for n in sizes["tasks"]:
+        if not env.selects("fetch_google_tasks", tasks=n):
+            continue
+
+        def load(n=n):
+            api.tasks["default"] = []
+            api.add_tasks("default", make_tasks(n))
+
+        cases.append(Case("fetch_google_tasks", {"tasks": n}, tasks._fetch_google_tasks,
+                          sizes["repeat"], load))
+    return cases
+
+
+def calendar_cases(env: Environment, sizes: Dict[str, Any]) -> List[Case]:
+    from pm.integrations.google_calendar import GoogleCalendarIntegration
+
+    selected = [days for days in sizes["days"] if env.selects("fetch_calendar_events", days=days)]
+    if not selected:
+        return []
+    env.api.events["primary"] = []
+    env.api.add_events("primary", make_events(max(selected)))
+    calendar = GoogleCalendarIntegration(env.config)
+    return [
+        Case("fetch_calendar_events", {"days": days},
+             lambda d=days: calendar._fetch_calendar_events(d), sizes["repeat"])
+        for days in selected
+    ]
+
+
+VAULT_CASES = ["vault_open", "vault_get_by_name", "vault_check_expiring",
+               "vault_rotate_master_key", "vault_backup_export", "vault_backup_import"]
+
+
+def vault_cases(env: Environment, sizes: Dict[str, Any]) -> List[Case]:
+    """Opening, looking up, rotating and backing up vaults of 10k / 100k secrets"""
+    from pm.security.secrets import SecretsManager
+
+    cases = []
+    for n in sizes["secrets"]:
+        if not any(env.selects(name, secrets=n) for name in VAULT_CASES):
+            continue
+        root = env.path(f"vault-{n}")
+        key_path = root / "master.key"
+        manager = SecretsManager(root / "secrets.vault", key_path, use_keyring=False)
+        fill_vault(manager, n)
+        manager.store.checkpoint()
+        repeat = 1 if n >= 100000 else sizes["repeat"]
+        backup = env.path(f"vault-{n}.backup")
+
+        def open_vault(root=root, key_path=key_path):
+            return SecretsManager(root / "secrets.vault", key_path, use_keyring=False)
+
+        def export(manager=manager, backup=backup):
+            with open(backup, "wb") as f:
+                manager.export_backup_to(f, "bench-password")
+
+        def import_into_empty(n=n, backup=backup):
+            target = env.path(f"vault-{n}-import")
+            shutil.rmtree(target, ignore_errors=True)
+            restored = SecretsManager(target / "secrets.vault", key_path, use_keyring=False)
+            with open(backup, "rb") as f:
+                if not restored.import_backup_from(f, "bench-password"):
+                    raise RuntimeError("backup import failed")
+
+        cases.append(Case("vault_open", {"secrets": n}, open_vault, sizes["repeat"]))
+        cases.append(Case("vault_get_by_name", {"secrets": n},
+                          lambda m=manager, n=n: m.get_secret_by_name(f"service-{n - 1:06d}"),
+                          sizes["repeat"]))
+        cases.append(Case("vault_check_expiring", {"secrets": n},
+                          lambda m=manager: m.check_expiring_secrets(7), sizes["repeat"]))
+        cases.append(Case("vault_rotate_master_key", {"secrets": n}, manager.rotate_master_key, repeat))
+        cases.append(Case("vault_backup_export", {"secrets": n}, export, repeat))
+        cases.append(Case("vault_backup_import", {"secrets": n}, import_into_empty, repeat))
+    return cases
+
+
+def cli_cases(env: Environment, sizes: Dict[str, Any]) -> List[Case]:
+    """Every CLI command except `next --push/--pull`, which write the repo's MASTER.md"""
+    from typer.testing import CliRunner
+    from pm.cli.main import app
+
+    commands = [command for command in CLI_COMMANDS if env.selects("cli", command=command[0])]
+    if not commands:
+        return []
+
+    runner = CliRunner()
+    projects = make_projects(env.path("cli-projects"), 10)
+    env.api.tasks["default"] = []
+    env.api.add_tasks("default", make_tasks(100))
+    if not env.api.events["primary"]:
+        env.api.add_events("primary", make_events(7))
+
+    cases = []
+    for command in commands:
+        args = list(command)
+        if args == ["next"]:
+            args += ["--path", str(projects)]
+
+        def invoke(args=args):
+            result = runner.invoke(app, args)
+            if result.exit_code != 0:
+                raise RuntimeError(f"pm {' '.join(args)} exited {result.exit_code}: {result.output}")
+
+        cases.append(Case("cli", {"command": command[0]}, invoke, sizes["repeat"]))
+    return cases
+
+
+def replace_next_tasks(api: FakeGoogleServer, items: List[Dict[str, Any]]) -> None:
+    """Reset the contents of the NEXT Tasks list, if push has created it"""
+    from pm.core.next_sync import NextSyncManager
+
+    for list_id, info in api.task_lists.items():
+        if info["title"] == NextSyncManager.GOOGLE_LIST_NAME:
+            api.tasks[list_id] = []
+            api.add_tasks(list_id, items)
+
+
+def run_case(case: Case, api: FakeGoogleServer) -> Dict[str, Any]:
+    default_faults = api.faults
+    if case.faults:
+        api.faults = case.faults
+    before = api.stats.copy()
+    try:
+        for _ in range(case.repeat):
+            if case.before_each:
+                case.before_each()
+            start = time.perf_counter()
+            case.run()
+            case.timings.append(time.perf_counter() - start)
+    finally:
+        api.faults = default_faults
+
+    delta = api.stats - before
+    return {
+        "name": case.name,
+        "params": case.params,
+        "repeat": case.repeat,
+        "median_s": statistics.median(case.timings),
+        "min_s": min(case.timings),
+        "max_s": max(case.timings),
+        "timings_s": case.timings,
+        "requests": delta["requests"] // case.repeat,
+        "rate_limited": delta["injected_429"] // case.repeat,
+        "server_errors": delta["injected_503"] // case.repeat,
+    }
+
+
+def git_revision() -> Dict[str, Any]:
+    def git(*args: str) -> str:
+        try:
+            return subprocess.run(["git", *args], cwd=ROOT, capture_output=True,
+                                  text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+
+    return {"commit": git("rev-parse", "--short", "HEAD") or "unknown",
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the PersonalManager benchmark suite")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes and fewer repeats")
+    parser.add_argument("--only", default="", help="run only cases whose key contains this text")
+    parser.add_argument("--output", type=Path, help="result file (default: results/<commit>.json)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="fake server latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="extra random latency per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sizes = SIZES["quick" if args.quick else "full"]
+    faults = FaultProfile(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                          error_rate=args.error_rate, seed=args.seed)
+    revision = git_revision()
+    results = []
+
+    with Environment(faults, args.only) as env:
+        cases = []
+        for build in (parse_cases, sync_cases, calendar_cases, vault_cases, cli_cases):
+            cases.extend(build(env, sizes))
+
+        for case in cases:
+            if args.only not in case.key:
+                continue
+            result = run_case(case, env.api)
+            results.append(result)
+            print(f"{case.key:<42} median {result['median_s'] * 1000:10.2f} ms"
+                  f"  ({result['requests']} requests/run)")
+
+    output = args.output or RESULTS_DIR / f"{revision['commit']}{'-dirty' if revision['dirty'] else ''}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "revision": revision,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "mode": "quick" if args.quick else "full",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "faults": asdict(faults),
+        "results": results,
+    }, indent=2), encoding="utf-8")
+    print(f"\nResults written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,7 +10,7 @@
 """
 
 import typer
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime, date, timedelta
 from rich.console import Console
 from rich.table import Table
@@ -22,6 +22,8 @@ import time
 from http.server import HTTPServer, BaseHTTPRequestHandler
 import urllib.parse
 
+from pm.core.profiling import profiler, span
+
 app = typer.Typer(
     name="pm",
     help="PersonalManager - 极简个人任务管理",
@@ -30,24 +32,93 @@ app = typer.Typer(
 console = Console()
 
 
+@app.callback()
+def main_callback(
+    ctx: typer.Context,
+    profile: bool = typer.Option(False, "--profile", help="命令结束后输出各阶段耗时和请求瀑布图"),
+):
+    """PersonalManager - 极简个人任务管理"""
+    if profile:
+        profiler.enable()
+        ctx.call_on_close(lambda: profiler.print_report(console))
+
+
 def get_config():
     """延迟加载配置"""
-    from pm.core.config import PMConfig
-    return PMConfig()
+    with span("config.load", "config"):
+        from pm.core.config import PMConfig
+        return PMConfig()
 
 
 def get_google_tasks():
     """延迟加载 Google Tasks 管理器"""
-    from pm.integrations.google_tasks import GoogleTasksIntegration
-    config = get_config()
-    return GoogleTasksIntegration(config)
+    with span("init GoogleTasksIntegration", "init"):
+        from pm.integrations.google_tasks import GoogleTasksIntegration
+        config = get_config()
+        return GoogleTasksIntegration(config)
 
 
 def get_google_calendar():
     """延迟加载 Google Calendar 管理器"""
+    with span("init GoogleCalendarIntegration", "init"):
+        from pm.integrations.google_calendar import GoogleCalendarIntegration
+        config = get_config()
+        return GoogleCalendarIntegration(config)
+
+
+def _task_sort_key(task):
+    """按截止时间排序，无截止日期的排在最后"""
+    return (task.due is None, task.due.timestamp() if task.due else 0.0)
+
+
+def _event_sort_key(event):
+    return event.start_time.timestamp() if event.start_time else 0.0
+
+
+def _event_time(event) -> str:
+    """日程开始时间（本地时区），全天事件显示“全天”"""
+    return "全天" if event.all_day else event.start_time.astimezone().strftime("%H:%M")
+
+
+def fetch_all_accounts(kinds, days_ahead: int = 1) -> dict:
+    """并发获取所有账号的任务/日程，合并为按时间排序的时间线
+
+    Args:
+        kinds: 要获取的数据，"tasks" 和/或 "events"
+        days_ahead: 日程的天数范围
+
+    Returns:
+        {kind: [(账号别名, 任务或日程), ...]}
+    """
     from pm.integrations.google_calendar import GoogleCalendarIntegration
+    from pm.integrations.google_tasks import GoogleTasksIntegration
+    from pm.integrations.multi_account import configured_accounts, fan_out, merge_sorted
+
     config = get_config()
-    return GoogleCalendarIntegration(config)
+    aliases = configured_accounts(config)
+
+    def fetch(job):
+        alias, kind = job
+        if kind == "tasks":
+            manager = GoogleTasksIntegration(config, alias)
+            tasks = manager.fetch_tasks_from_lists(fields=manager.TASK_SUMMARY_FIELDS)
+            return sorted(tasks, key=_task_sort_key)
+        manager = GoogleCalendarIntegration(config, alias)
+        return manager.get_upcoming_events(days_ahead=days_ahead, fields=manager.EVENT_SUMMARY_FIELDS)
+
+    with span(f"fetch {len(aliases)} accounts", "sync"):
+        results = fan_out([(alias, kind) for alias in aliases for kind in kinds], fetch)
+
+    for result in results:
+        if result.error:
+            console.print(f"[yellow]账号 {result.key[0]} 获取失败: {result.error}[/yellow]")
+
+    timeline = {}
+    for kind in kinds:
+        sort_key = _task_sort_key if kind == "tasks" else _event_sort_key
+        merged = merge_sorted((r for r in results if r.key[1] == kind), sort_key)
+        timeline[kind] = [(job[0], item) for job, item in merged]
+    return timeline
 
 
 def is_task_today(task) -> bool:
@@ -59,7 +130,11 @@ def is_task_today(task) -> bool:
 
 
 @app.command()
-def today():
+def today(
+    all_accounts: bool = typer.Option(False, "--all-accounts", "-A", help="合并显示所有账号"),
+    task_lists: Optional[List[str]] = typer.Option(None, "--list", "-l",
+                                                   help="只显示指定任务列表（可重复，默认为全部列表）")
+):
     """查看今日日程和任务"""
     console.print(Panel.fit(
         f"[bold cyan]今日概览[/bold cyan] - {date.today().strftime('%Y-%m-%d %A')}",
@@ -67,42 +142,72 @@ def today():
     ))
 
     try:
-        # 获取今日任务
-        tasks_manager = get_google_tasks()
-        google_tasks = tasks_manager._fetch_google_tasks()
-        today_tasks = [t for t in google_tasks if is_task_today(t) and not t.is_completed]
-
-        if today_tasks:
-            table = Table(title="今日任务", show_header=True, header_style="bold magenta")
-            table.add_column("#", style="dim", width=3)
-            table.add_column("任务", style="white")
-            table.add_column("状态", style="green", width=8)
-
-            for i, task in enumerate(today_tasks, 1):
-                status = "✅" if task.is_completed else "⬜"
-                table.add_row(str(i), task.title, status)
-
-            console.print(table)
+        if all_accounts:
+            timeline = fetch_all_accounts(["tasks", "events"], days_ahead=1)
+            task_rows = timeline["tasks"]
+            event_rows = timeline["events"]
         else:
-            console.print("[dim]今日暂无任务[/dim]")
-
-        # 获取今日日程
-        cal_manager = get_google_calendar()
-        events = cal_manager.get_today_schedule()
-
-        if events:
-            console.print()
-            table = Table(title="今日日程", show_header=True, header_style="bold blue")
-            table.add_column("时间", style="cyan", width=12)
-            table.add_column("事件", style="white")
-
-            for event in events:
-                time_str = event.start_time.strftime("%H:%M") if event.start_time else "全天"
-                table.add_row(time_str, event.title)
-
-            console.print(table)
-        else:
-            console.print("[dim]今日暂无日程[/dim]")
+            tasks_manager = get_google_tasks()
+            task_rows = [(None, t) for t in
+                         tasks_manager.fetch_tasks_from_lists(task_lists or None,
+                                                              fields=tasks_manager.TASK_SUMMARY_FIELDS)]
+            event_rows = None
+
+        # 今日任务
+        today_tasks = [(alias, t) for alias, t in task_rows if is_task_today(t) and not t.is_completed]
+
+        with span("render today tasks", "render", rows=len(today_tasks)):
+            if today_tasks:
+                table = Table(title="今日任务", show_header=True, header_style="bold magenta")
+                table.add_column("#", style="dim", width=3)
+                if all_accounts:
+                    table.add_column("账号", style="cyan")
+                table.add_column("任务", style="white")
+                # 任务来自多个列表时显示所属列表
+                multi_list = len({task.list_id for _, task in today_tasks}) > 1
+                if multi_list:
+                    table.add_column("列表", style="dim")
+                table.add_column("状态", style="green", width=8)
+
+                for i, (alias, task) in enumerate(today_tasks, 1):
+                    status = "✅" if task.is_completed else "⬜"
+                    table.add_row(str(i), *([alias] if all_accounts else []), task.title,
+                                  *([task.list_title] if multi_list else []), status)
+
+                console.print(table)
+            else:
+                console.print("[dim]今日暂无任务[/dim]")
+
+        # 今日日程
+        if event_rows is None:
+            cal_manager = get_google_calendar()
+            event_rows = [(None, e) for e in
+                          cal_manager.get_upcoming_events(days_ahead=1, fields=cal_manager.EVENT_SUMMARY_FIELDS)]
+
+        from pm.storage.event_store import EventStore
+        aliases = {id(event): alias for alias, event in event_rows}
+        event_rows = [(aliases[id(e)], e) for e in EventStore(e for _, e in event_rows).on_date(date.today())]
+
+        with span("render today events", "render", rows=len(event_rows)):
+            if event_rows:
+                console.print()
+                table = Table(title="今日日程", show_header=True, header_style="bold blue")
+                table.add_column("时间", style="cyan", width=12)
+                if all_accounts:
+                    table.add_column("账号", style="cyan")
+                table.add_column("事件", style="white")
+                # 日程来自多个日历时显示所属日历
+                multi_calendar = len({event.calendar_id for _, event in event_rows}) > 1
+                if multi_calendar:
+                    table.add_column("日历", style="dim")
+
+                for alias, event in event_rows:
+                    table.add_row(_event_time(event), *([alias] if all_accounts else []), event.title,
+                                  *([event.calendar_name] if multi_calendar else []))
+
+                console.print(table)
+            else:
+                console.print("[dim]今日暂无日程[/dim]")
 
     except Exception as e:
         console.print(f"[red]错误: {e}[/red]")
@@ -110,30 +215,46 @@ def today():
 
 
 @app.command()
-def inbox():
+def inbox(
+    all_accounts: bool = typer.Option(False, "--all-accounts", "-A", help="合并显示所有账号"),
+    task_lists: Optional[List[str]] = typer.Option(None, "--list", "-l",
+                                                   help="只显示指定任务列表（可重复，默认为全部列表）")
+):
     """查看待处理任务（收件箱）"""
     console.print(Panel.fit("[bold yellow]收件箱[/bold yellow]", border_style="yellow"))
 
     try:
-        tasks_manager = get_google_tasks()
-        google_tasks = tasks_manager._fetch_google_tasks()
-        # 过滤未完成的任务
-        pending_tasks = [t for t in google_tasks if not t.is_completed]
-
-        if pending_tasks:
-            table = Table(show_header=True, header_style="bold")
-            table.add_column("#", style="dim", width=3)
-            table.add_column("任务", style="white")
-            table.add_column("截止日期", style="cyan", width=12)
-
-            for i, task in enumerate(pending_tasks, 1):
-                due = task.due.strftime("%Y-%m-%d") if task.due else "-"
-                table.add_row(str(i), task.title, due)
-
-            console.print(table)
-            console.print(f"\n[dim]共 {len(pending_tasks)} 个待处理任务[/dim]")
+        if all_accounts:
+            task_rows = fetch_all_accounts(["tasks"])["tasks"]
         else:
-            console.print("[green]收件箱为空，太棒了！[/green]")
+            tasks_manager = get_google_tasks()
+            task_rows = [(None, t) for t in
+                         tasks_manager.fetch_tasks_from_lists(task_lists or None,
+                                                              fields=tasks_manager.TASK_SUMMARY_FIELDS)]
+        # 过滤未完成的任务
+        pending_tasks = [(alias, t) for alias, t in task_rows if not t.is_completed]
+
+        with span("render inbox", "render", rows=len(pending_tasks)):
+            if pending_tasks:
+                table = Table(show_header=True, header_style="bold")
+                table.add_column("#", style="dim", width=3)
+                if all_accounts:
+                    table.add_column("账号", style="cyan")
+                table.add_column("任务", style="white")
+                multi_list = len({task.list_id for _, task in pending_tasks}) > 1
+                if multi_list:
+                    table.add_column("列表", style="dim")
+                table.add_column("截止日期", style="cyan", width=12)
+
+                for i, (alias, task) in enumerate(pending_tasks, 1):
+                    due = task.due.strftime("%Y-%m-%d") if task.due else "-"
+                    table.add_row(str(i), *([alias] if all_accounts else []), task.title,
+                                  *([task.list_title] if multi_list else []), due)
+
+                console.print(table)
+                console.print(f"\n[dim]共 {len(pending_tasks)} 个待处理任务[/dim]")
+            else:
+                console.print("[green]收件箱为空，太棒了！[/green]")
 
     except Exception as e:
         console.print(f"[red]错误: {e}[/red]")
@@ -261,13 +382,22 @@ def sync():
         # 验证 Tasks API 连接
         console.print("\n[cyan]验证 Google Tasks...[/cyan]")
         tasks_manager = get_google_tasks()
-        google_tasks = tasks_manager._fetch_google_tasks()
+        google_tasks = tasks_manager._fetch_google_tasks(fields=tasks_manager.TASK_SUMMARY_FIELDS)
         console.print(f"[green]✓ 已连接 Google Tasks ({len(google_tasks)} 个任务)[/green]")
 
+        # 回放离线期间排队的任务操作
+        if len(tasks_manager.mutation_queue):
+            applied, conflicts, errors = tasks_manager.flush_pending_mutations()
+            console.print(f"[green]✓ 已同步 {applied} 个离线操作[/green]")
+            if conflicts:
+                console.print(f"[yellow]  {conflicts} 个离线操作因远端更新而放弃[/yellow]")
+            for err in errors[:5]:
+                console.print(f"  [dim]• {err}[/dim]")
+
         # 验证 Calendar API 连接
         console.print("\n[cyan]验证 Google Calendar...[/cyan]")
         cal_manager = get_google_calendar()
-        events = cal_manager.get_today_schedule()
+        events = cal_manager.get_today_schedule(fields=cal_manager.EVENT_SUMMARY_FIELDS)
         console.print(f"[green]✓ 已连接 Google Calendar ({len(events)} 个今日日程)[/green]")
 
         console.print("\n[bold green]连接验证完成！[/bold green]")
@@ -302,7 +432,7 @@ def add(
         task = Task(
             id=f"local_{datetime.now().timestamp()}",
             title=title,
-            status=TaskStatus.PENDING,
+            status=TaskStatus.INBOX,
             due_date=due_date,
         )
 
@@ -322,7 +452,10 @@ def add(
 
 @app.command()
 def cal(
-    days: int = typer.Option(7, "--days", "-d", help="显示未来几天的日程")
+    days: int = typer.Option(7, "--days", "-d", help="显示未来几天的日程"),
+    all_accounts: bool = typer.Option(False, "--all-accounts", "-A", help="合并显示所有账号"),
+    calendars: Optional[List[str]] = typer.Option(None, "--calendar", "-c",
+                                                  help="只显示指定日历（可重复，默认为勾选显示的日历）")
 ):
     """查看日历（默认未来7天）"""
     console.print(Panel.fit(
@@ -331,35 +464,90 @@ def cal(
     ))
 
     try:
+        if all_accounts:
+            event_rows = fetch_all_accounts(["events"], days_ahead=days)["events"]
+        else:
+            cal_manager = get_google_calendar()
+            event_rows = [(None, e) for e in
+                          cal_manager.get_upcoming_events(days_ahead=days, fields=cal_manager.EVENT_SUMMARY_FIELDS,
+                                                          calendar_ids=calendars or None)]
+        from pm.storage.event_store import EventStore
+        store = EventStore(event for _, event in event_rows)
+        aliases = {id(event): alias for alias, event in event_rows}
+        multi_calendar = len({event.calendar_id for event in store}) > 1
+
+        with span("render calendar", "render", rows=len(store)):
+            for i in range(days):
+                target_date = date.today() + timedelta(days=i)
+                # 按本地日期二分查找当天的日程
+                date_events = store.on_date(target_date)
+
+                # 日期标题
+                date_str = target_date.strftime("%m/%d %a")
+                if i == 0:
+                    date_str += " (今天)"
+                elif i == 1:
+                    date_str += " (明天)"
+
+                if date_events:
+                    console.print(f"\n[bold cyan]{date_str}[/bold cyan]")
+                    for event in date_events:
+                        account = f"[cyan]\\[{aliases[id(event)]}][/cyan] " if all_accounts else ""
+                        source = f" [dim]· {event.calendar_name}[/dim]" if multi_calendar else ""
+                        console.print(f"  [dim]{_event_time(event)}[/dim] {account}{event.title}{source}")
+                else:
+                    console.print(f"\n[dim]{date_str} - 无日程[/dim]")
+
+    except Exception as e:
+        console.print(f"[red]错误: {e}[/red]")
+
+
+def _format_minutes(minutes: int) -> str:
+    hours, minutes = divmod(minutes, 60)
+    if hours and minutes:
+        return f"{hours}h{minutes}m"
+    return f"{hours}h" if hours else f"{minutes}m"
+
+
+@app.command()
+def free(
+    days: int = typer.Option(5, "--days", "-d", help="查看未来几天"),
+    min_minutes: int = typer.Option(30, "--min", "-m", help="只显示不短于该分钟数的空闲时段"),
+    calendars: Optional[List[str]] = typer.Option(None, "--calendar", "-c",
+                                                  help="只按指定日历计算（可重复，默认为勾选显示的日历）")
+):
+    """查看工作时间内的空闲时段和日程冲突"""
+    console.print(Panel.fit(
+        f"[bold green]空闲时段[/bold green] - 未来 {days} 天",
+        border_style="green"
+    ))
+
+    try:
+        from pm.storage.event_store import EventStore, local_day_bounds
+
+        config = get_config()
         cal_manager = get_google_calendar()
-        events = cal_manager.get_upcoming_events(days_ahead=days)
-
-        # 按日期分组
-        events_by_date = {}
-        for event in events:
-            event_date = event.start_time.date() if event.start_time else date.today()
-            if event_date not in events_by_date:
-                events_by_date[event_date] = []
-            events_by_date[event_date].append(event)
-
-        for i in range(days):
-            target_date = date.today() + timedelta(days=i)
-            date_events = events_by_date.get(target_date, [])
-
-            # 日期标题
-            date_str = target_date.strftime("%m/%d %a")
-            if i == 0:
-                date_str += " (今天)"
-            elif i == 1:
-                date_str += " (明天)"
-
-            if date_events:
-                console.print(f"\n[bold cyan]{date_str}[/bold cyan]")
-                for event in sorted(date_events, key=lambda e: e.start_time or datetime.min):
-                    time_str = event.start_time.strftime("%H:%M") if event.start_time else "全天"
-                    console.print(f"  [dim]{time_str}[/dim] {event.title}")
-            else:
-                console.print(f"\n[dim]{date_str} - 无日程[/dim]")
+        store = EventStore(cal_manager.get_upcoming_events(
+            days_ahead=days, fields=cal_manager.EVENT_SUMMARY_FIELDS, calendar_ids=calendars or None
+        ))
+
+        first_day = date.today()
+        with span("render free slots", "render", rows=len(store)):
+            for day, slots in store.free_slots_by_day(first_day, days, config.work_hours_start,
+                                                     config.work_hours_end, min_minutes):
+                date_str = day.strftime("%m/%d %a")
+                if slots:
+                    total = sum(slot.minutes for slot in slots)
+                    console.print(f"\n[bold cyan]{date_str}[/bold cyan] [dim]空闲 {_format_minutes(total)}[/dim]")
+                    for slot in slots:
+                        console.print(f"  {slot.start.astimezone():%H:%M}-{slot.end.astimezone():%H:%M} "
+                                      f"[dim]({_format_minutes(slot.minutes)})[/dim]")
+                else:
+                    console.print(f"\n[dim]{date_str} - 无空闲时段[/dim]")
+
+                for first, second in store.conflicts(*local_day_bounds(day)):
+                    console.print(f"  [yellow]⚠ 冲突: {_event_time(first)} {first.title} "
+                                  f"与 {_event_time(second)} {second.title}[/yellow]")
 
     except Exception as e:
         console.print(f"[red]错误: {e}[/red]")
@@ -369,7 +557,8 @@ def cal(
 def next(
     path: str = typer.Option("~/programs", "--path", "-p", help="项目目录路径"),
     push: bool = typer.Option(False, "--push", help="推送任务到 Google Tasks"),
-    pull: bool = typer.Option(False, "--pull", help="从 Google Tasks 拉取完成状态")
+    pull: bool = typer.Option(False, "--pull", help="从 Google Tasks 拉取完成状态"),
+    wait: bool = typer.Option(False, "--wait", help="已有同步在运行时等待它结束，而不是跳过")
 ):
     """查看/同步所有项目的下一步行动"""
     import os
@@ -380,15 +569,16 @@ def next(
         return
 
     if push:
-        _do_next_push(path)
+        _do_next_push(path, wait)
     elif pull:
-        _do_next_pull(path)
+        _do_next_pull(path, wait)
     else:
         _do_next_list(path)
 
 
-def _do_next_push(path: str):
+def _do_next_push(path: str, wait: bool = False):
     """Push tasks to Google Tasks"""
+    from pm.core.locks import LockBusy
     from pm.core.next_sync import NextSyncManager
 
     console.print(Panel.fit(
@@ -402,7 +592,7 @@ def _do_next_push(path: str):
 
         with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), console=console) as progress:
             progress.add_task("正在同步...", total=None)
-            stats = sync_manager.push()
+            stats = sync_manager.push(wait=wait)
 
         # Display results
         console.print()
@@ -419,12 +609,15 @@ def _do_next_push(path: str):
         if stats.tasks_pushed > 0:
             console.print(f"\n[green]✓ 已同步到 Google Tasks 'NEXT Tasks' 列表[/green]")
 
+    except LockBusy as e:
+        console.print(f"[yellow]已有同步在运行，跳过: {e}[/yellow]")
     except Exception as e:
         console.print(f"[red]推送失败: {e}[/red]")
 
 
-def _do_next_pull(path: str):
+def _do_next_pull(path: str, wait: bool = False):
     """Pull completed tasks from Google Tasks"""
+    from pm.core.locks import LockBusy
     from pm.core.next_sync import NextSyncManager
 
     console.print(Panel.fit(
@@ -438,7 +631,7 @@ def _do_next_pull(path: str):
 
         with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), console=console) as progress:
             progress.add_task("正在拉取...", total=None)
-            stats = sync_manager.pull()
+            stats = sync_manager.pull(wait=wait)
 
         # Display results
         console.print()
@@ -453,6 +646,8 @@ def _do_next_pull(path: str):
         if stats.tasks_updated > 0:
             console.print(f"\n[green]✓ 已更新各项目 NEXT.md 文件[/green]")
 
+    except LockBusy as e:
+        console.print(f"[yellow]已有同步在运行，跳过: {e}[/yellow]")
     except Exception as e:
         console.print(f"[red]拉取失败: {e}[/red]")
 
@@ -482,8 +677,9 @@ def _do_next_list(path: str):
 
         if os.path.isdir(project_path) and os.path.isfile(next_file):
             try:
-                with open(next_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
+                with span("read NEXT.md", "io", project=item):
+                    with open(next_file, 'r', encoding='utf-8') as f:
+                        content = f.read()
 
                 # 解析 NEXT.md
                 current_section = None
@@ -522,20 +718,197 @@ def _do_next_list(path: str):
     # 按优先级分组显示
     priority_order = ['今天', '本周', '阻塞', '待定']
 
-    for priority in priority_order:
-        tasks = [t for t in all_tasks if t['priority'] == priority]
-        if tasks:
-            # 选择颜色
-            color = {'今天': 'red', '本周': 'yellow', '阻塞': 'magenta', '待定': 'dim'}[priority]
-            console.print(f"\n[bold {color}]## {priority}[/bold {color}]")
+    with span("render next", "render", rows=len(all_tasks)):
+        for priority in priority_order:
+            tasks = [t for t in all_tasks if t['priority'] == priority]
+            if tasks:
+                # 选择颜色
+                color = {'今天': 'red', '本周': 'yellow', '阻塞': 'magenta', '待定': 'dim'}[priority]
+                console.print(f"\n[bold {color}]## {priority}[/bold {color}]")
 
-            for t in tasks:
-                console.print(f"  [{color}]○[/{color}] [cyan]{t['project']}[/cyan]: {t['task']}")
+                for t in tasks:
+                    console.print(f"  [{color}]○[/{color}] [cyan]{t['project']}[/cyan]: {t['task']}")
 
     console.print(f"\n[dim]共 {len(all_tasks)} 个待办，来自 {len(set(t['project'] for t in all_tasks))} 个项目[/dim]")
     console.print(f"[dim]提示: --push 推送到 Google | --pull 拉取完成状态[/dim]")
 
 
+@app.command()
+def stats(
+    prometheus: Optional[str] = typer.Option(None, "--prometheus", help="导出 Prometheus 文本格式指标到文件"),
+    reset: bool = typer.Option(False, "--reset", help="清空已记录的 API 指标"),
+    tasks: bool = typer.Option(False, "--tasks", "-t", help="改为查看每日任务完成情况"),
+    days: int = typer.Option(30, "--days", "-d", help="任务统计的天数（含今天）"),
+    by: str = typer.Option("category", "--by", help="任务统计分组: category/day/week/month"),
+):
+    """查看 Google API 调用统计（请求数、延迟、流量、重试）或每日任务完成情况"""
+    from pathlib import Path
+    from pm.core.metrics import histogram_quantile, load_metrics, write_prometheus_textfile
+
+    if tasks:
+        _show_task_stats(days, by)
+        return
+
+    config = get_config()
+    store = config.data_dir / "api_metrics.json"
+
+    if reset:
+        if store.exists():
+            store.unlink()
+        console.print("[green]✓ 已清空 API 指标[/green]")
+        return
+
+    data = load_metrics(store)
+    operations = data.get("operations", {})
+    if not operations:
+        console.print("[dim]暂无 API 调用记录[/dim]")
+        return
+
+    rows = []
+    for operation, endpoints in operations.items():
+        total = {"requests": 0, "errors": 0, "quota_errors": 0, "retries": 0,
+                 "cache_hits": 0, "seconds": 0.0, "bytes": 0, "buckets": None}
+        for series in endpoints.values():
+            for key in ("requests", "errors", "quota_errors", "retries", "cache_hits", "seconds", "bytes"):
+                total[key] += series[key]
+            buckets = series["buckets"]
+            total["buckets"] = buckets if total["buckets"] is None else [
+                a + b for a, b in zip(total["buckets"], buckets)]
+        rows.append((operation, total))
+
+    def fmt_ms(seconds):
+        return "-" if seconds is None else f"{seconds * 1000:.0f}"
+
+    table = Table(title="Google API 调用统计", show_header=True, header_style="bold")
+    table.add_column("操作", style="cyan", overflow="fold")
+    table.add_column("请求", justify="right", no_wrap=True)
+    table.add_column("错误/限流", justify="right", no_wrap=True)
+    table.add_column("重试", justify="right", no_wrap=True)
+    table.add_column("缓存", justify="right", no_wrap=True)
+    table.add_column("p50/p95 ms", justify="right", no_wrap=True)
+    table.add_column("耗时 s", justify="right", no_wrap=True)
+    table.add_column("KB", justify="right", no_wrap=True)
+    for operation, total in sorted(rows, key=lambda row: -row[1]["seconds"]):
+        errors = f"{total['errors']}/{total['quota_errors']}"
+        table.add_row(
+            operation,
+            str(total["requests"]),
+            f"[red]{errors}[/red]" if total["errors"] else errors,
+            str(total["retries"]),
+            str(total["cache_hits"]),
+            f"{fmt_ms(histogram_quantile(0.5, total['buckets']))}/"
+            f"{fmt_ms(histogram_quantile(0.95, total['buckets']))}",
+            f"{total['seconds']:.2f}",
+            f"{total['bytes'] / 1024:.1f}",
+        )
+    console.print(table)
+    console.print(f"[dim]统计区间: {data.get('since', '-')[:19]} ~ {data.get('updated_at', '-')[:19]}[/dim]")
+
+    if prometheus:
+        target = Path(prometheus).expanduser()
+        if write_prometheus_textfile(data, target):
+            console.print(f"[green]✓ 已导出 Prometheus 指标: {target}[/green]")
+        else:
+            console.print(f"[red]导出失败: {target}[/red]")
+
+
+def _show_task_stats(days: int, group_by: str):
+    """显示最近 days 天每日任务的完成率和延续最久的任务"""
+    from pm.storage.daily_task_tracker import DailyTaskTracker
+
+    end = date.today()
+    start = end - timedelta(days=max(days, 1) - 1)
+    tracker = DailyTaskTracker()
+    try:
+        rows = tracker.completion_stats(start.isoformat(), end.isoformat(), group_by)
+    except ValueError as e:
+        console.print(f"[red]{e}[/red]")
+        raise typer.Exit(1)
+
+    if not rows:
+        console.print(f"[dim]{start} ~ {end} 暂无每日任务记录[/dim]")
+        return
+
+    labels = {"category": "类别", "day": "日期", "week": "周", "month": "月份"}
+    table = Table(title=f"每日任务完成情况 {start} ~ {end}", show_header=True, header_style="bold")
+    table.add_column(labels[group_by], style="cyan")
+    table.add_column("任务", justify="right", no_wrap=True)
+    table.add_column("完成", justify="right", no_wrap=True)
+    table.add_column("完成率", justify="right", no_wrap=True)
+    table.add_column("延续", justify="right", no_wrap=True)
+    for row in rows + [{
+        "key": "合计",
+        "total": sum(r["total"] for r in rows),
+        "completed": sum(r["completed"] for r in rows),
+        "carried_over": sum(r["carried_over"] for r in rows),
+    }]:
+        rate = row["completed"] / row["total"] if row["total"] else 0.0
+        color = "green" if rate >= 0.8 else "yellow" if rate >= 0.5 else "red"
+        table.add_row(
+            str(row["key"] or "-"),
+            str(row["total"]),
+            str(row["completed"]),
+            f"[{color}]{rate:.0%}[/{color}]",
+            str(row["carried_over"]),
+        )
+    console.print(table)
+
+    chains = tracker.carry_over_chains(start.isoformat(), end.isoformat(), limit=10)
+    if chains:
+        console.print("\n[bold]延续最久的任务[/bold]")
+        for chain in chains:
+            status = "[green]✓[/green]" if chain["completed"] else "⬜"
+            console.print(f"  {status} {chain['title']} [dim]{chain['days']} 天 "
+                          f"({chain['first_date']} ~ {chain['last_date']})[/dim]")
+
+
+@app.command()
+def daemon(
+    detach: bool = typer.Option(False, "--detach", help="在后台运行（主密钥只在前台解锁一次）"),
+    once: bool = typer.Option(False, "--once", help="只执行当前到期的任务后退出（适合 cron）"),
+):
+    """后台守护进程：在令牌过期前刷新，并执行到期的密钥轮换"""
+    import os
+    import signal
+    import subprocess
+    import sys
+    from pm.core.locks import LockBusy
+
+    config = get_config()
+
+    if detach:
+        from pm.security.secrets import MASTER_KEY_FD_ENV, SecretsManager
+
+        # 在前台读取主密钥（可能需要访问系统钥匙串），通过管道交给后台进程
+        key_fd = SecretsManager().master_key_fd()
+        log_path = config.data_dir / "daemon.log"
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            with open(log_path, "ab") as log:
+                child = subprocess.Popen(
+                    [sys.executable, "-m", "pm.cli.main", "daemon"],
+                    stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+                    pass_fds=(key_fd,), start_new_session=True,
+                    env={**os.environ, MASTER_KEY_FD_ENV: str(key_fd)},
+                )
+        finally:
+            os.close(key_fd)
+        console.print(f"[green]✓ 守护进程已在后台启动[/green] [dim](pid {child.pid}，日志 {log_path})[/dim]")
+        return
+
+    from pm.core.daemon import PMDaemon
+
+    pm_daemon = PMDaemon(config)
+    if not once:
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: pm_daemon.stop())
+    try:
+        pm_daemon.run(once=once)
+    except LockBusy as e:
+        console.print(f"[yellow]守护进程已在运行: {e}[/yellow]")
+        raise typer.Exit(1)
+
+
 @app.command()
 def version():
     """显示版本信息"""
@@ -0,0 +1,128 @@
+"""Crash-safe writes for local state files
+
+The CLI, cron jobs and background sync can all write the same files. Writing
+in place lets a reader (or a crash) observe a half-written file, so every
+state file is written to a temporary file in the same directory, flushed to
+disk and renamed over the target. Rename is atomic on POSIX: readers see
+either the old or the new content and never need a lock.
+
+A plain write needs no lock. Read-modify-write cycles (load a state file,
+change it, write it back) hold :func:`file_lock` around all three steps so
+concurrent updates are not lost: an advisory ``fcntl`` lock on a sidecar
+``.<name>.lock`` file (the target itself is replaced on every write, so it
+cannot carry the lock). Where ``fcntl`` is unavailable the lock is a no-op
+and writes are still atomic.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# os.umask can only be read by setting it, so do it once at import time
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _lock_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.lock")
+
+
+@contextmanager
+def file_lock(path: Union[str, Path], shared: bool = False) -> Iterator[None]:
+    """Hold an advisory lock for `path` (exclusive unless `shared`)
+
+    Hold it around the whole read-modify-write cycle. Locks are per open file
+    description, so nesting the lock for the same path inside one process
+    must be avoided.
+    """
+    path = Path(path)
+    if fcntl is None:
+        yield
+        return
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(_lock_path(path), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _fsync_dir(directory: Path) -> None:
+    """Persist the rename itself (not supported on every platform)"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_open(path: Union[str, Path], binary: bool = False, mode: Optional[int] = None,
+                encoding: str = "utf-8") -> Iterator[IO]:
+    """Open a temporary file that replaces `path` when the block exits cleanly
+
+    If the block raises, the target is left untouched and the temporary file
+    is removed.
+
+    Args:
+        path: Target file; parent directories are created
+        binary: Open in binary instead of text mode
+        mode: Permission bits applied before any data is written (e.g. 0o600
+            for credentials); by default the target's current bits are kept
+        encoding: Text encoding
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if mode is None:
+        try:
+            mode = path.stat().st_mode & 0o777
+        except OSError:
+            mode = 0o666 & ~_UMASK
+
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        os.fchmod(fd, mode)
+        f = os.fdopen(fd, "wb" if binary else "w", **({} if binary else {"encoding": encoding}))
+    except BaseException:
+        os.close(fd)
+        os.unlink(tmp_name)
+        raise
+
+    try:
+        with f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+    _fsync_dir(path.parent)
+
+
+def atomic_write(path: Union[str, Path], data: Union[str, bytes], mode: Optional[int] = None,
+                 encoding: str = "utf-8") -> None:
+    """Atomically replace `path` with `data` (see :func:`atomic_open`)"""
+    with atomic_open(path, binary=isinstance(data, bytes), mode=mode,
+                     encoding=encoding) as f:
+        f.write(data)
+
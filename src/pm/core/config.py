@@ -8,6 +8,8 @@ from pydantic_settings import BaseSettings
 from pydantic import validator
 from rich.console import Console
 
+from pm.core.atomic import atomic_write
+
 console = Console()
 
 
@@ -51,6 +53,33 @@ class PMConfig(BaseSettings):
     
     # Google集成配置
     enable_google_integration: bool = False
+    # Google API 根地址（可通过 PM_GOOGLE_API_BASE_URL 指向本地模拟服务）
+    google_api_base_url: str = "https://www.googleapis.com"
+    # OAuth 令牌端点（可通过 PM_GOOGLE_OAUTH_TOKEN_URL 覆盖）
+    google_oauth_token_url: str = "https://oauth2.googleapis.com/token"
+    # 429/5xx 响应的最大重试次数
+    google_api_max_retries: int = 3
+
+    # Google API 响应缓存（ETag）
+    http_cache_enabled: bool = True
+    http_cache_max_mb: int = 20
+
+    # Google API 请求指标（pm stats）
+    api_metrics_enabled: bool = True
+    # 退出时额外写出 Prometheus 文本格式指标（node_exporter textfile collector）
+    api_metrics_textfile: Optional[str] = None
+
+    # Google Calendar 多日历
+    # 要读取的日历ID，为空时读取在 Google Calendar 中勾选显示的日历
+    google_calendar_ids: List[str] = []
+    # 按日历保存 syncToken 和事件快照，之后只拉取变更
+    calendar_sync_enabled: bool = True
+
+    # Google Tasks 多列表
+    # today / inbox 读取的任务列表ID，为空时读取全部列表
+    google_task_list_ids: List[str] = []
+    # 按列表保存 updatedMin 游标和任务快照，之后只拉取变更
+    task_sync_enabled: bool = True
     
     # 语言偏好
     preferred_language: str = "zh"
@@ -145,6 +174,15 @@ class PMConfig(BaseSettings):
             "enable_ai_tools": self.enable_ai_tools,
             "ai_tools_enabled": self.ai_tools_enabled,
             "enable_google_integration": self.enable_google_integration,
+            "google_api_max_retries": self.google_api_max_retries,
+            "http_cache_enabled": self.http_cache_enabled,
+            "http_cache_max_mb": self.http_cache_max_mb,
+            "api_metrics_enabled": self.api_metrics_enabled,
+            "api_metrics_textfile": self.api_metrics_textfile,
+            "google_calendar_ids": self.google_calendar_ids,
+            "calendar_sync_enabled": self.calendar_sync_enabled,
+            "google_task_list_ids": self.google_task_list_ids,
+            "task_sync_enabled": self.task_sync_enabled,
             "preferred_language": self.preferred_language,
             "data_retention_days": self.data_retention_days,
             "backup_enabled": self.backup_enabled,
@@ -152,9 +190,8 @@ class PMConfig(BaseSettings):
         }
         
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                yaml.dump(config_data, f, default_flow_style=False, 
-                         allow_unicode=True, sort_keys=False)
+            atomic_write(self.config_file, yaml.dump(config_data, default_flow_style=False,
+                                                     allow_unicode=True, sort_keys=False))
             return True
         except Exception as e:
             console.print(f"[red]❌ 保存配置文件时出错: {e}")
@@ -176,6 +213,15 @@ class PMConfig(BaseSettings):
         self.enable_ai_tools = True
         self.ai_tools_enabled = True
         self.enable_google_integration = False
+        self.google_api_max_retries = 3
+        self.http_cache_enabled = True
+        self.http_cache_max_mb = 20
+        self.api_metrics_enabled = True
+        self.api_metrics_textfile = None
+        self.google_calendar_ids = []
+        self.calendar_sync_enabled = True
+        self.google_task_list_ids = []
+        self.task_sync_enabled = True
         self.preferred_language = "zh"
         self.data_retention_days = 365
         self.backup_enabled = True
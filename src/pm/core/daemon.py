@@ -0,0 +1,218 @@
+"""Background daemon: refresh OAuth tokens early and rotate due secrets
+
+Without the daemon an expired access token is refreshed by the first command
+that needs it, which then waits for the token endpoint, and a secret whose
+rotation period has passed is only reported when someone polls
+``SecretsManager.check_rotation_needed``. ``pm daemon`` runs the
+:class:`~pm.core.scheduler.Scheduler` with:
+
+* one job per token file, due ``TOKEN_REFRESH_LEAD`` seconds before the token
+  expires, which refreshes it so foreground commands find a valid token;
+* one job due at the next secret rotation, which rotates the secrets that
+  opted in with the tag ``auto_rotate=true`` and whose value can be generated
+  locally (see ``ROTATORS``), and reports the others;
+* a rescan job that picks up tokens and secrets written by other processes.
+
+Only one daemon runs at a time (lock ``daemon`` of :class:`LockManager`).
+"""
+
+import json
+import secrets as _secrets
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set, Tuple
+
+import structlog
+from cryptography.fernet import Fernet
+
+from pm.core.config import PMConfig
+from pm.core.locks import LockManager
+from pm.core.scheduler import Scheduler
+from pm.integrations.oauth_manager import OAuthManager, OAuthTokenInfo
+from pm.security.secrets import SecretsManager, SecretType
+
+logger = structlog.get_logger()
+
+# New values for secret types that are generated locally; other types (API
+# keys, passwords, ...) have to be rotated at their provider and are reported
+ROTATORS: Dict[SecretType, Callable[[], str]] = {
+    SecretType.ENCRYPTION_KEY: lambda: Fernet.generate_key().decode(),
+    SecretType.WEBHOOK_SECRET: lambda: _secrets.token_urlsafe(32),
+}
+
+# Only secrets tagged like this are rotated by the daemon: replacing a key
+# that still decrypts data, or a webhook secret the sender was not given,
+# would break them, so every other secret is reported instead
+AUTO_ROTATE_TAG = ("auto_rotate", "true")
+
+
+def _utc_timestamp(value: datetime) -> float:
+    """Timestamp of a naive UTC datetime (as stored by SecretsManager)"""
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class PMDaemon:
+    """Scheduler jobs for token refresh and secret rotation"""
+
+    LOCK_NAME = "daemon"
+    # Refresh this many seconds before OAuthTokenInfo.expires_at (which is
+    # already 5 minutes before the real expiry)
+    TOKEN_REFRESH_LEAD = 600
+    # Look for new or changed tokens and secrets this often
+    RESCAN_INTERVAL = 600
+    # Retry delays after a failed refresh, doubling up to the maximum
+    RETRY_MIN = 60
+    RETRY_MAX = 1800
+
+    def __init__(self, config: PMConfig, scheduler: Optional[Scheduler] = None,
+                 oauth: Optional[OAuthManager] = None,
+                 secrets_manager: Optional[SecretsManager] = None):
+        self.config = config
+        self.scheduler = scheduler or Scheduler()
+        self.oauth = oauth or OAuthManager(config)
+        self.secrets_manager = secrets_manager or SecretsManager()
+        self.locks = LockManager(config.data_dir / "locks")
+        # Token file mtime each refresh job was scheduled for
+        self._token_mtimes: Dict[str, int] = {}
+        self._retries: Dict[str, int] = {}
+        # Overdue secrets already reported, as (id, last_rotated)
+        self._reported: Set[Tuple[str, Optional[datetime]]] = set()
+
+    def start(self) -> None:
+        """Schedule the rescan job, which schedules everything else"""
+        self.scheduler.schedule("rescan", self.scheduler.clock(), self._rescan)
+
+    def run(self, once: bool = False) -> None:
+        """Run the jobs under the daemon lock until stopped
+
+        Args:
+            once: Run the jobs that are due now and return (e.g. from cron)
+
+        Raises:
+            LockBusy: Another daemon is running
+        """
+        with self.locks.acquire(self.LOCK_NAME):
+            if once:
+                # Schedule the token and rotation jobs first so that the
+                # single pass below runs the due ones
+                self._rescan()
+                self.scheduler.run_pending()
+            else:
+                self.start()
+                logger.info("Daemon started", tokens_dir=str(self.oauth.tokens_dir))
+                self.scheduler.run()
+        # Save the vault index so the next process does not replay our writes
+        self.secrets_manager.store.checkpoint()
+
+    def stop(self) -> None:
+        self.scheduler.stop()
+
+    # ----- rescan -----
+
+    def _rescan(self) -> Optional[float]:
+        now = self.scheduler.clock()
+        seen = set()
+        for token_file in self.oauth.tokens_dir.glob("*_token.json"):
+            service = token_file.name[:-len("_token.json")]
+            seen.add(service)
+            # Written by a login or a foreground refresh since we last looked
+            if self._token_mtimes.get(service) != self._mtime(token_file):
+                self._schedule_token(service, token_file)
+
+        for service in set(self._token_mtimes) - seen:
+            self._token_mtimes.pop(service)
+            self.scheduler.cancel(f"token:{service}")
+
+        self.secrets_manager.refresh()
+        self._schedule_rotation()
+        return now + self.RESCAN_INTERVAL
+
+    # ----- OAuth tokens -----
+
+    def _schedule_token(self, service: str, token_file: Path) -> None:
+        token = self._load_token(token_file)
+        self._token_mtimes[service] = self._mtime(token_file)
+        if token is None or token.expires_at is None or not token.refresh_token:
+            self.scheduler.cancel(f"token:{service}")
+            return
+        due = token.expires_at.timestamp() - self.TOKEN_REFRESH_LEAD
+        self.scheduler.schedule(f"token:{service}", due,
+                                lambda: self._refresh_token(service, token_file))
+
+    @staticmethod
+    def _mtime(token_file: Path) -> int:
+        try:
+            return token_file.stat().st_mtime_ns
+        except OSError:
+            return 0
+
+    def _load_token(self, token_file: Path) -> Optional[OAuthTokenInfo]:
+        try:
+            with open(token_file, 'r', encoding='utf-8') as f:
+                return OAuthTokenInfo.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Unreadable token file", file=token_file.name, error=str(e))
+            return None
+
+    def _refresh_token(self, service: str, token_file: Path) -> Optional[float]:
+        token = self._load_token(token_file)
+        if token is None or token.expires_at is None or not token.refresh_token:
+            return None
+        now = self.scheduler.clock()
+        due = token.expires_at.timestamp() - self.TOKEN_REFRESH_LEAD
+        if due > now + self.scheduler.coalesce:
+            # Refreshed by a foreground command in the meantime
+            self._token_mtimes[service] = self._mtime(token_file)
+            return due
+
+        refreshed = self.oauth.refresh_token(service, token)
+        if refreshed is None or refreshed.expires_at is None:
+            retries = self._retries.get(service, 0)
+            self._retries[service] = retries + 1
+            delay = min(self.RETRY_MIN * 2 ** retries, self.RETRY_MAX)
+            logger.warning("Token refresh failed, will retry", service=service, delay=delay)
+            return now + delay
+
+        self._retries.pop(service, None)
+        self._token_mtimes[service] = self._mtime(token_file)
+        logger.info("Token refreshed ahead of expiry", service=service,
+                    expires_at=refreshed.expires_at.isoformat())
+        return refreshed.expires_at.timestamp() - self.TOKEN_REFRESH_LEAD
+
+    # ----- secret rotation -----
+
+    def _schedule_rotation(self) -> None:
+        now = datetime.utcnow()
+        if self.secrets_manager.check_rotation_needed():
+            due = self.scheduler.clock()
+        else:
+            next_rotation = self.secrets_manager.store.index.next_rotation_after(now)
+            if next_rotation is None:
+                self.scheduler.cancel("rotation")
+                return
+            due = _utc_timestamp(next_rotation)
+        self.scheduler.schedule("rotation", due, self._rotate_due)
+
+    def _rotate_due(self) -> Optional[float]:
+        manager = self.secrets_manager
+        for item in manager.check_rotation_needed():
+            secret = manager.secrets.get(item['id'])
+            if secret is None:
+                continue
+            rotator = None
+            if secret.tags.get(AUTO_ROTATE_TAG[0]) == AUTO_ROTATE_TAG[1]:
+                rotator = ROTATORS.get(secret.type)
+            if rotator is not None:
+                if manager.rotate_secret(secret.id, rotator()):
+                    logger.info("Secret rotated", secret=secret.name)
+                continue
+            key = (secret.id, secret.last_rotated)
+            if key not in self._reported:
+                self._reported.add(key)
+                logger.warning("Secret needs rotation at its provider",
+                               secret=secret.name, type=secret.type.value,
+                               last_rotated=item['last_rotated'])
+
+        # Overdue secrets that could not be rotated are looked at again by the rescan
+        next_rotation = manager.store.index.next_rotation_after(datetime.utcnow())
+        return _utc_timestamp(next_rotation) if next_rotation is not None else None
@@ -0,0 +1,184 @@
+"""Named cross-process locks for commands that must not overlap
+
+`pm next --push` run by cron and by hand at the same time would both read
+the existing tasks before either writes and create every task twice. Such
+commands take a named lock from :class:`LockManager` for their whole run.
+
+Locks are ``fcntl`` locks on ``<lock_dir>/<name>.lock``: the kernel drops
+them when the holder exits or crashes, so a lock can never be left behind,
+and taking a free lock costs one open and one system call. The holder writes
+its pid, host, command and start time into the file, which is used to
+explain who is running and to notice that a previous holder died. Where
+``fcntl`` is unavailable the file is created exclusively instead, and a lock
+whose holder process is gone (or which is older than `stale_after`) is
+broken.
+"""
+
+import json
+import os
+import socket
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+@dataclass
+class LockHolder:
+    """Process holding (or last holding) a lock"""
+    pid: int
+    host: str
+    command: str
+    started_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.started_at
+
+    def is_alive(self) -> bool:
+        """Whether the holder process still exists (unknown on other hosts: True)"""
+        if self.host != socket.gethostname():
+            return True
+        try:
+            os.kill(self.pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            pass
+        return True
+
+    def describe(self) -> str:
+        return f"pid {self.pid} `{self.command}`，已运行 {self.age:.0f} 秒"
+
+
+class LockBusy(Exception):
+    """The lock is held by another process"""
+
+    def __init__(self, name: str, holder: Optional[LockHolder]):
+        self.name = name
+        self.holder = holder
+        detail = holder.describe() if holder else "未知进程"
+        super().__init__(f"{name} 正在运行（{detail}）")
+
+
+class LockManager:
+    """Named locks under `lock_dir`"""
+
+    def __init__(self, lock_dir: Path, stale_after: float = 3600.0, poll_interval: float = 0.2):
+        self.lock_dir = lock_dir
+        self.stale_after = stale_after
+        self.poll_interval = poll_interval
+
+    def _path(self, name: str) -> Path:
+        return self.lock_dir / f"{name}.lock"
+
+    def holder(self, name: str) -> Optional[LockHolder]:
+        """Holder recorded in the lock file (may be a finished process)"""
+        try:
+            with open(self._path(name), 'r', encoding='utf-8') as f:
+                return LockHolder(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    @contextmanager
+    def acquire(self, name: str, wait: bool = False,
+                timeout: Optional[float] = None) -> Iterator[LockHolder]:
+        """Hold lock `name` for the duration of the block
+
+        Args:
+            name: Lock name, e.g. ``next-sync``
+            wait: Wait for the current holder instead of failing immediately
+            timeout: Maximum seconds to wait (None: no limit)
+
+        Raises:
+            LockBusy: The lock is held and `wait` is False or the timeout expired
+        """
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        me = LockHolder(pid=os.getpid(), host=socket.gethostname(),
+                        command=" ".join(["pm"] + sys.argv[1:]), started_at=time.time())
+
+        while True:
+            fd = self._try_acquire(name)
+            if fd is not None:
+                break
+            if not wait or (deadline is not None and time.monotonic() >= deadline):
+                raise LockBusy(name, self.holder(name))
+            time.sleep(self.poll_interval)
+
+        try:
+            previous = self.holder(name)
+            if fcntl is not None and previous is not None and previous.pid != me.pid:
+                # Holders clear the file on release, so a record means the holder died
+                logger.warning("Recovered lock left by a terminated process",
+                               lock=name, pid=previous.pid, command=previous.command)
+            os.ftruncate(fd, 0)
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.write(fd, json.dumps(asdict(me)).encode())
+            yield me
+        finally:
+            self._release(name, fd)
+
+    def _try_acquire(self, name: str) -> Optional[int]:
+        path = self._path(name)
+        if fcntl is not None:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                return None
+            return fd
+
+        try:
+            return os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            if not self._is_stale(name):
+                return None
+            holder = self.holder(name)
+            logger.warning("Breaking stale lock", lock=name,
+                           pid=holder.pid if holder else None)
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            try:
+                return os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o600)
+            except FileExistsError:
+                return None
+
+    def _is_stale(self, name: str) -> bool:
+        holder = self.holder(name)
+        if holder is not None:
+            return not holder.is_alive() or holder.age >= self.stale_after
+        # Just created and not yet written, or unreadable: judge by file age
+        try:
+            return time.time() - self._path(name).stat().st_mtime >= self.stale_after
+        except OSError:
+            return False
+
+    def _release(self, name: str, fd: int) -> None:
+        try:
+            if fcntl is not None:
+                os.ftruncate(fd, 0)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+        if fcntl is None:
+            try:
+                self._path(name).unlink()
+            except OSError:
+                pass
@@ -0,0 +1,285 @@
+"""Google API request metrics
+
+Every request made through GoogleApiClient (and token refreshes) is recorded
+into a process-wide registry, labelled with the integration method that
+issued it (see ``metered``) and a normalised endpoint name. The registry is
+merged into ``<data_dir>/api_metrics.json`` when the process exits, so ``pm stats``
+can summarise API cost across runs and the totals can be exported as a
+Prometheus text file.
+"""
+
+import atexit
+import contextvars
+import functools
+import json
+import re
+import threading
+from bisect import bisect_left
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import structlog
+
+from pm.core.atomic import atomic_write, file_lock
+
+logger = structlog.get_logger()
+
+# Latency histogram upper bounds in seconds (Prometheus "le")
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_ENDPOINTS: List[Tuple[re.Pattern, str]] = [
+    (re.compile(r"/tasks/v1/users/@me/lists$"), "tasks.lists"),
+    (re.compile(r"/tasks/v1/users/@me/lists/[^/]+$"), "tasks.list"),
+    (re.compile(r"/tasks/v1/lists/[^/]+/tasks$"), "tasks.tasks"),
+    (re.compile(r"/tasks/v1/lists/[^/]+/tasks/[^/]+$"), "tasks.task"),
+    (re.compile(r"/tasks/v1/lists/[^/]+/clear$"), "tasks.clear"),
+    (re.compile(r"/calendar/v3/users/me/calendarList$"), "calendar.calendarList"),
+    (re.compile(r"/calendar/v3/calendars/[^/]+/events$"), "calendar.events"),
+    (re.compile(r"/calendar/v3/calendars/[^/]+/events/[^/]+$"), "calendar.event"),
+    (re.compile(r"/batch(/.*)?$"), "batch"),
+    (re.compile(r"/token$"), "oauth.token"),
+]
+
+_operation: contextvars.ContextVar[str] = contextvars.ContextVar("pm_api_operation", default="other")
+
+
+def endpoint_name(url: str) -> str:
+    """Collapse a request URL to a low-cardinality endpoint label"""
+    path = urlsplit(url).path
+    for pattern, name in _ENDPOINTS:
+        if pattern.search(path):
+            return name
+    return "other"
+
+
+def metered(operation: str) -> Callable:
+    """Attribute requests made inside the decorated method to `operation`"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            token = _operation.set(operation)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _operation.reset(token)
+        return wrapper
+    return decorator
+
+
+def current_operation() -> str:
+    return _operation.get()
+
+
+def _empty_series() -> Dict[str, Any]:
+    return {
+        "requests": 0,
+        "errors": 0,
+        "quota_errors": 0,
+        "retries": 0,
+        "cache_hits": 0,
+        "seconds": 0.0,
+        "bytes": 0,
+        "status": {},
+        "buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+    }
+
+
+def _merge_series(into: Dict[str, Any], other: Dict[str, Any]) -> None:
+    for key in ("requests", "errors", "quota_errors", "retries", "cache_hits", "seconds", "bytes"):
+        into[key] += other.get(key, 0)
+    for status, count in other.get("status", {}).items():
+        into["status"][status] = into["status"].get(status, 0) + count
+    buckets = other.get("buckets", [])
+    if len(buckets) == len(into["buckets"]):
+        into["buckets"] = [a + b for a, b in zip(into["buckets"], buckets)]
+
+
+class MetricsRegistry:
+    """Request counters and latency histograms keyed by operation and endpoint"""
+
+    def __init__(self):
+        self._series: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._store: Optional[Path] = None
+        self._textfile: Optional[Path] = None
+
+    def _get(self, endpoint: str, operation: Optional[str]) -> Dict[str, Any]:
+        key = (operation or current_operation(), endpoint)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _empty_series()
+        return series
+
+    def record_request(self, method: str, url: str, status: int, seconds: float,
+                       response_bytes: int, quota_error: bool = False,
+                       operation: Optional[str] = None) -> None:
+        endpoint = endpoint_name(url)
+        with self._lock:
+            series = self._get(endpoint, operation)
+            series["requests"] += 1
+            series["seconds"] += seconds
+            series["bytes"] += response_bytes
+            series["buckets"][bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            status_key = str(status)
+            series["status"][status_key] = series["status"].get(status_key, 0) + 1
+            if status >= 400:
+                series["errors"] += 1
+            if quota_error:
+                series["quota_errors"] += 1
+
+    def record_retry(self, url: str, operation: Optional[str] = None) -> None:
+        with self._lock:
+            self._get(endpoint_name(url), operation)["retries"] += 1
+
+    def record_cache_hit(self, url: str, operation: Optional[str] = None) -> None:
+        """A read answered from the local HTTP cache without any request"""
+        with self._lock:
+            self._get(endpoint_name(url), operation)["cache_hits"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """{operation: {endpoint: series}} of what this process recorded"""
+        with self._lock:
+            result: Dict[str, Dict[str, Dict[str, Any]]] = {}
+            for (operation, endpoint), series in self._series.items():
+                result.setdefault(operation, {})[endpoint] = json.loads(json.dumps(series))
+            return result
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def persist_to(self, path: Path, textfile: Optional[Path] = None) -> None:
+        """Merge recorded metrics into `path` at process exit
+
+        Args:
+            path: JSON store accumulated across runs
+            textfile: Also rewrite this Prometheus text file on flush
+        """
+        if self._store is None:
+            atexit.register(self.flush)
+        self._store = path
+        self._textfile = textfile
+
+    def flush(self) -> None:
+        """Merge the in-memory series into the store and clear them"""
+        if self._store is None:
+            return
+        with self._lock:
+            if not self._series:
+                return
+            pending = self._series
+            self._series = {}
+
+        # Concurrent runs merge into the same store: hold the lock from read to rename
+        try:
+            with file_lock(self._store):
+                data = load_metrics(self._store)
+                operations = data.setdefault("operations", {})
+                for (operation, endpoint), series in pending.items():
+                    stored = operations.setdefault(operation, {}).setdefault(endpoint, _empty_series())
+                    _merge_series(stored, series)
+                data["updated_at"] = datetime.now().isoformat()
+                data.setdefault("since", data["updated_at"])
+                atomic_write(self._store, json.dumps(data, indent=2))
+        except OSError as e:
+            logger.error("Failed to save API metrics", file=str(self._store), error=str(e))
+            return
+
+        if self._textfile is not None:
+            write_prometheus_textfile(data, self._textfile)
+
+
+def load_metrics(path: Path) -> Dict[str, Any]:
+    """Persisted metrics ({"since", "updated_at", "operations"}), or empty"""
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning("Discarding unreadable metrics file", file=str(path), error=str(e))
+        return {}
+
+
+def histogram_quantile(quantile: float, buckets: List[int]) -> Optional[float]:
+    """Estimate a latency quantile (seconds) from bucket counts
+
+    Linear interpolation inside the bucket, like Prometheus; observations in
+    the overflow bucket are reported as the largest finite bound.
+    """
+    total = sum(buckets)
+    if not total:
+        return None
+    rank = quantile * total
+    cumulative = 0
+    lower = 0.0
+    for bound, count in zip(LATENCY_BUCKETS, buckets):
+        if count and cumulative + count >= rank:
+            return lower + (bound - lower) * (rank - cumulative) / count
+        cumulative += count
+        lower = bound
+    return LATENCY_BUCKETS[-1]
+
+
+def _labels(**labels: str) -> str:
+    return ",".join(f'{k}="{v}"' for k, v in labels.items())
+
+
+def prometheus_text(data: Dict[str, Any]) -> str:
+    """Render persisted metrics in the Prometheus text exposition format"""
+    lines = [
+        "# HELP pm_google_api_requests_total Google API requests by status",
+        "# TYPE pm_google_api_requests_total counter",
+    ]
+    operations = data.get("operations", {})
+    series_list = [
+        (operation, endpoint, series)
+        for operation, endpoints in sorted(operations.items())
+        for endpoint, series in sorted(endpoints.items())
+    ]
+    for operation, endpoint, series in series_list:
+        for status, count in sorted(series["status"].items()):
+            lines.append(f"pm_google_api_requests_total{{{_labels(operation=operation, endpoint=endpoint, status=status)}}} {count}")
+
+    lines += [
+        "# HELP pm_google_api_request_duration_seconds Google API request latency",
+        "# TYPE pm_google_api_request_duration_seconds histogram",
+    ]
+    for operation, endpoint, series in series_list:
+        labels = _labels(operation=operation, endpoint=endpoint)
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, series["buckets"]):
+            cumulative += count
+            lines.append(f'pm_google_api_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'pm_google_api_request_duration_seconds_bucket{{{labels},le="+Inf"}} {series["requests"]}')
+        lines.append(f"pm_google_api_request_duration_seconds_sum{{{labels}}} {series['seconds']:.6f}")
+        lines.append(f"pm_google_api_request_duration_seconds_count{{{labels}}} {series['requests']}")
+
+    counters = [
+        ("response_bytes_total", "bytes", "Google API response body bytes"),
+        ("retries_total", "retries", "Google API request retries"),
+        ("quota_errors_total", "quota_errors", "Google API rate limit / quota errors"),
+        ("cache_hits_total", "cache_hits", "Google API reads served from the local cache"),
+    ]
+    for suffix, key, help_text in counters:
+        name = f"pm_google_api_{suffix}"
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for operation, endpoint, series in series_list:
+            lines.append(f"{name}{{{_labels(operation=operation, endpoint=endpoint)}}} {series[key]}")
+
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus_textfile(data: Dict[str, Any], path: Path) -> bool:
+    """Write metrics for a textfile collector (atomically, so it is never scraped half-written)"""
+    try:
+        atomic_write(path, prometheus_text(data))
+        return True
+    except OSError as e:
+        logger.error("Failed to write Prometheus metrics", file=str(path), error=str(e))
+        return False
+
+
+metrics = MetricsRegistry()
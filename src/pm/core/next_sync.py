@@ -6,12 +6,15 @@ Provides push/pull functionality for syncing tasks across projects.
 import re
 from datetime import date, datetime
 from pathlib import Path
-from typing import Optional, Set
+from typing import List, Optional, Set, Tuple
 
 import structlog
 
+from pm.core.atomic import atomic_write
 from pm.core.config import PMConfig
-from pm.integrations.google_tasks import GoogleTasksIntegration
+from pm.core.locks import LockManager
+from pm.core.profiling import timed
+from pm.integrations.google_tasks import GoogleTask, GoogleTasksIntegration, TaskListReadError
 from pm.parsers.next_md_parser import (
     NextMdParser,
     NextTask,
@@ -28,6 +31,8 @@ class NextSyncManager:
 
     GOOGLE_LIST_NAME = "NEXT Tasks"
     MASTER_FILE_NAME = "MASTER.md"
+    # Covers the NEXT Tasks list, every NEXT.md and MASTER.md
+    LOCK_NAME = "next-sync"
 
     def __init__(self, config: PMConfig, projects_path: str = "~/programs"):
         """Initialize sync manager
@@ -40,11 +45,13 @@ class NextSyncManager:
         self.projects_path = Path(projects_path).expanduser()
         self.parser = NextMdParser()
         self.google_tasks = GoogleTasksIntegration(config)
+        self.locks = LockManager(config.data_dir / "locks")
 
         # MASTER.md location (in personal-manager project root)
         self.master_path = Path(__file__).parent.parent.parent.parent / self.MASTER_FILE_NAME
 
-    def push(self) -> SyncStats:
+    @timed("next.push", "sync")
+    def push(self, wait: bool = False) -> SyncStats:
         """Push tasks from all NEXT.md files to Google Tasks
 
         Flow:
@@ -53,13 +60,28 @@ class NextSyncManager:
         3. Push to Google Tasks "NEXT Tasks" list
         4. Skip duplicate tasks
 
+        Runs under the next-sync lock, so overlapping runs cannot both see a
+        task as missing and create it twice.
+
+        Args:
+            wait: Wait for a running push/pull instead of failing
+
         Returns:
             SyncStats with operation statistics
+
+        Raises:
+            LockBusy: Another push/pull is running and `wait` is False
         """
+        with self.locks.acquire(self.LOCK_NAME, wait=wait):
+            return self._push()
+
+    def _push(self) -> SyncStats:
         stats = SyncStats()
 
         logger.info("Starting push sync", projects_path=str(self.projects_path))
 
+        self._flush_offline_mutations(stats)
+
         # Step 1: Scan all projects
         next_files = self.parser.scan_projects(self.projects_path)
         stats.projects_scanned = len(next_files)
@@ -88,8 +110,16 @@ class NextSyncManager:
             stats.add_error("Failed to create/find Google Tasks list")
             return stats
 
-        # Step 4: Get existing tasks for deduplication
-        existing_tasks = self.google_tasks.get_tasks_from_list(list_id)
+        # Step 4: Get existing tasks for deduplication. Without them every
+        # task would look new and be created (or queued) again
+        try:
+            list_id, existing_tasks = self._get_list_tasks(list_id, create=True)
+        except TaskListReadError as e:
+            stats.add_error(f"Cannot read Google Tasks list, push skipped: {e}")
+            return stats
+        if not list_id:
+            stats.add_error("Failed to create/find Google Tasks list")
+            return stats
         existing_titles = {t.title.lower() for t in existing_tasks}
 
         # Step 5: Push tasks (skip duplicates)
@@ -122,7 +152,8 @@ class NextSyncManager:
 
         return stats
 
-    def pull(self) -> SyncStats:
+    @timed("next.pull", "sync")
+    def pull(self, wait: bool = False) -> SyncStats:
         """Pull completed tasks from Google Tasks and update NEXT.md files
 
         Flow:
@@ -131,13 +162,27 @@ class NextSyncManager:
         3. Update corresponding NEXT.md files
         4. Move completed tasks to "已完成" section
 
+        Runs under the same lock as push().
+
+        Args:
+            wait: Wait for a running push/pull instead of failing
+
         Returns:
             SyncStats with operation statistics
+
+        Raises:
+            LockBusy: Another push/pull is running and `wait` is False
         """
+        with self.locks.acquire(self.LOCK_NAME, wait=wait):
+            return self._pull()
+
+    def _pull(self) -> SyncStats:
         stats = SyncStats()
 
         logger.info("Starting pull sync")
 
+        self._flush_offline_mutations(stats)
+
         # Step 1: Find the NEXT Tasks list
         list_id = self._find_next_tasks_list()
         if not list_id:
@@ -145,7 +190,15 @@ class NextSyncManager:
             return stats
 
         # Step 2: Get completed tasks
-        completed_tasks = self.google_tasks.get_completed_tasks(list_id)
+        try:
+            list_id, list_tasks = self._get_list_tasks(list_id, create=False)
+        except TaskListReadError as e:
+            stats.add_error(f"Cannot read Google Tasks list: {e}")
+            return stats
+        if not list_id:
+            stats.add_error("NEXT Tasks list not found in Google Tasks")
+            return stats
+        completed_tasks = [t for t in list_tasks if t.is_completed]
 
         if not completed_tasks:
             logger.info("No completed tasks to pull")
@@ -196,14 +249,46 @@ class NextSyncManager:
 
         return stats
 
+    def _flush_offline_mutations(self, stats: SyncStats) -> None:
+        """Replay task mutations that were queued while offline"""
+        applied, conflicts, errors = self.google_tasks.flush_pending_mutations()
+        for error in errors:
+            stats.add_error(error)
+        if applied or conflicts:
+            logger.info("Flushed offline mutations", applied=applied, conflicts=conflicts)
+
     def _find_next_tasks_list(self) -> Optional[str]:
         """Find the NEXT Tasks list ID"""
-        task_lists = self.google_tasks.get_google_tasks_lists()
-        for task_list in task_lists:
-            if task_list.get('title', '').lower() == self.GOOGLE_LIST_NAME.lower():
-                return task_list['id']
-        return None
+        return self.google_tasks.resolve_task_list_id(self.GOOGLE_LIST_NAME)
+
+    def _get_list_tasks(self, list_id: str, create: bool) -> Tuple[Optional[str], List[GoogleTask]]:
+        """Fetch the NEXT Tasks list, re-resolving once if the cached id went stale
+
+        Args:
+            list_id: List id, possibly from the memoized title cache
+            create: Whether to recreate the list if it no longer exists
+
+        Returns:
+            Tuple[current list id or None, tasks in the list]
+
+        Raises:
+            TaskListReadError: The list could not be read (as opposed to empty)
+        """
+        tasks = self.google_tasks.get_tasks_from_list(list_id, strict=True)
+        if tasks or self.google_tasks.is_task_list_id_valid(list_id):
+            return list_id, tasks
+
+        logger.info("Cached NEXT Tasks list id is stale, resolving again", list_id=list_id)
+        if create:
+            list_id = self.google_tasks.find_or_create_task_list(self.GOOGLE_LIST_NAME)
+        else:
+            list_id = self._find_next_tasks_list()
+
+        if not list_id:
+            return None, []
+        return list_id, self.google_tasks.get_tasks_from_list(list_id, strict=True)
 
+    @timed("write MASTER.md", "io")
     def _generate_master_md(self, tasks: list[NextTask]) -> None:
         """Generate MASTER.md file with aggregated tasks
 
@@ -261,11 +346,12 @@ class NextSyncManager:
 
         # Write MASTER.md
         try:
-            self.master_path.write_text('\n'.join(lines), encoding='utf-8')
+            atomic_write(self.master_path, '\n'.join(lines))
             logger.info("Generated MASTER.md", path=str(self.master_path))
         except Exception as e:
             logger.error("Failed to write MASTER.md", error=str(e))
 
+    @timed("update MASTER.md", "io")
     def _update_master_md_completions(self) -> None:
         """Update MASTER.md with completed tasks from all projects"""
         if not self.master_path.exists():
@@ -319,7 +405,7 @@ class NextSyncManager:
                 if completed_line not in lines:
                     lines.insert(week_idx + 1, completed_line)
 
-            self.master_path.write_text('\n'.join(lines), encoding='utf-8')
+            atomic_write(self.master_path, '\n'.join(lines))
 
         except Exception as e:
             logger.error("Failed to update MASTER.md completions", error=str(e))
@@ -0,0 +1,248 @@
+"""Lightweight span timing for hot paths
+
+Code wraps interesting phases in ``span(name, category)``. Spans are only
+recorded while profiling is enabled, either by ``pm --profile`` (prints a
+per-phase breakdown and HTTP request waterfall after the command) or by the
+``PM_TRACE_FILE`` environment variable (dumps all spans as Chrome trace JSON,
+viewable in chrome://tracing or https://ui.perfetto.dev). When disabled,
+``span`` returns a shared no-op object and costs one attribute lookup.
+
+Categories used across the code base:
+    init, config, auth, http, json, parse, io, render, sync
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from pm.core.atomic import atomic_write
+
+TRACE_FILE_ENV = "PM_TRACE_FILE"
+
+
+@dataclass
+class Span:
+    """A finished or running timed region"""
+    name: str
+    category: str
+    start_ns: int
+    thread_id: int
+    depth: int
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    end_ns: Optional[int] = None
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end - self.start_ns) / 1e6
+
+    def set(self, **attrs: Any) -> None:
+        """Attach attributes discovered while the span runs (status, bytes...)"""
+        self.attrs.update(attrs)
+
+
+class _SpanContext:
+    __slots__ = ("_profiler", "_span")
+
+    def __init__(self, profiler: "Profiler", span: Span):
+        self._profiler = profiler
+        self._span = span
+
+    def __enter__(self) -> Span:
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self._span.attrs["error"] = exc_type.__name__
+        self._profiler._finish(self._span)
+
+
+class _NoopSpan:
+    """Stand-in returned when profiling is off"""
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+    def set(self, **attrs: Any) -> None:
+        return None
+
+
+_NOOP = _NoopSpan()
+
+
+class Profiler:
+    """Process-wide span recorder"""
+
+    def __init__(self):
+        self.enabled = False
+        self.spans: List[Span] = []
+        self.origin_ns = time.perf_counter_ns()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def enable(self) -> None:
+        if not self.enabled:
+            self.enabled = True
+            self.origin_ns = time.perf_counter_ns()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.spans = []
+        self.origin_ns = time.perf_counter_ns()
+
+    def span(self, name: str, category: str, **attrs: Any):
+        if not self.enabled:
+            return _NOOP
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        span = Span(name, category, time.perf_counter_ns(), threading.get_ident(), len(stack), attrs)
+        stack.append(span)
+        return _SpanContext(self, span)
+
+    def _finish(self, span: Span) -> None:
+        span.end_ns = time.perf_counter_ns()
+        stack = self._local.stack
+        if stack and stack[-1] is span:
+            stack.pop()
+        with self._lock:
+            self.spans.append(span)
+
+    # ------------------------------------------------------------------
+    # Reports
+    # ------------------------------------------------------------------
+
+    def breakdown(self) -> Dict[str, Dict[str, float]]:
+        """Self time per category (time not covered by child spans)
+
+        Returns:
+            {category: {"count": n, "total_ms": ..., "self_ms": ...}}
+        """
+        spans = sorted(self.spans, key=lambda s: (s.thread_id, s.start_ns))
+        child_time: Dict[int, int] = defaultdict(int)
+        open_spans: Dict[int, List[Span]] = defaultdict(list)
+        for span in spans:
+            stack = open_spans[span.thread_id]
+            while stack and stack[-1].end_ns <= span.start_ns:
+                stack.pop()
+            if stack:
+                child_time[id(stack[-1])] += span.end_ns - span.start_ns
+            stack.append(span)
+
+        phases: Dict[str, Dict[str, float]] = {}
+        for span in spans:
+            phase = phases.setdefault(span.category, {"count": 0, "total_ms": 0.0, "self_ms": 0.0})
+            duration = span.end_ns - span.start_ns
+            phase["count"] += 1
+            phase["total_ms"] += duration / 1e6
+            phase["self_ms"] += max(0, duration - child_time[id(span)]) / 1e6
+        return phases
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Spans in Chrome trace event format (complete "X" events)"""
+        pid = os.getpid()
+        events = []
+        for span in sorted(self.spans, key=lambda s: s.start_ns):
+            events.append({
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": (span.start_ns - self.origin_ns) / 1000,
+                "dur": (span.end_ns - span.start_ns) / 1000,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": {k: str(v) for k, v in span.attrs.items()},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: Path) -> None:
+        atomic_write(Path(path).expanduser(), json.dumps(self.chrome_trace()))
+
+    def print_report(self, console) -> None:
+        """Render the phase breakdown and HTTP waterfall with rich"""
+        from rich.table import Table
+
+        total_ms = (time.perf_counter_ns() - self.origin_ns) / 1e6
+        phases = self.breakdown()
+
+        table = Table(title=f"耗时分布（总计 {total_ms:.1f} ms）", show_header=True,
+                      header_style="bold")
+        table.add_column("阶段", style="cyan")
+        table.add_column("次数", justify="right")
+        table.add_column("自身耗时 ms", justify="right")
+        table.add_column("占比", justify="right")
+        table.add_column("累计耗时 ms", justify="right", style="dim")
+        for category, phase in sorted(phases.items(), key=lambda kv: -kv[1]["self_ms"]):
+            share = phase["self_ms"] / total_ms * 100 if total_ms else 0
+            table.add_row(category, str(int(phase["count"])), f"{phase['self_ms']:.1f}",
+                          f"{share:.0f}%", f"{phase['total_ms']:.1f}")
+        untracked = total_ms - sum(phase["self_ms"] for phase in phases.values())
+        if untracked > 0:
+            share = untracked / total_ms * 100 if total_ms else 0
+            table.add_row("[dim]其他（未计时）[/dim]", "", f"{untracked:.1f}", f"{share:.0f}%", "")
+        console.print(table)
+
+        requests = sorted((s for s in self.spans if s.category == "http"), key=lambda s: s.start_ns)
+        if not requests:
+            return
+
+        width = 20
+        scale = width / total_ms if total_ms else 0
+        waterfall = Table(title="HTTP 请求瀑布图", show_header=True, header_style="bold")
+        waterfall.add_column("请求", style="white", overflow="fold")
+        waterfall.add_column("状态", justify="right")
+        waterfall.add_column("开始 ms", justify="right", style="dim")
+        waterfall.add_column("耗时 ms", justify="right")
+        waterfall.add_column("", no_wrap=True)
+        for span in requests:
+            offset = (span.start_ns - self.origin_ns) / 1e6
+            duration = span.duration_ms
+            lead = min(width - 1, int(offset * scale))
+            bar = " " * lead + "█" * max(1, min(width - lead, round(duration * scale)))
+            waterfall.add_row(span.name, str(span.attrs.get("status", "-")),
+                              f"{offset:.1f}", f"{duration:.1f}", f"[green]{bar}[/green]")
+        console.print(waterfall)
+
+
+profiler = Profiler()
+
+
+def span(name: str, category: str, **attrs: Any):
+    """Time a region: ``with span("parse NEXT.md", "parse", path=...):``"""
+    return profiler.span(name, category, **attrs)
+
+
+def timed(name: str, category: str) -> Callable:
+    """Decorator form of span()"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            with profiler.span(name, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _dump_trace_at_exit(path: str) -> None:
+    try:
+        profiler.write_chrome_trace(Path(path))
+    except OSError:
+        pass
+
+
+if os.environ.get(TRACE_FILE_ENV):
+    profiler.enable()
+    atexit.register(_dump_trace_at_exit, os.environ[TRACE_FILE_ENV])
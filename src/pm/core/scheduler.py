@@ -0,0 +1,126 @@
+"""Timer heap for the background daemon
+
+Jobs are kept in a min-heap ordered by due time, so finding the next job is
+O(1) and (re)scheduling one is O(log n). Rescheduling or cancelling a job
+does not search the heap: the old entry stays behind and is skipped when it
+surfaces because its version no longer matches.
+
+Wakeups are coalesced: when the loop wakes up it runs every job due within
+`coalesce` seconds, so jobs due close together share one wakeup instead of
+one each. Due times are wall-clock timestamps (token and rotation deadlines
+are wall-clock, and the monotonic clock stops while a laptop sleeps); the
+loop never sleeps longer than `max_sleep`, which bounds how late a job runs
+after a suspend or clock change.
+"""
+
+import heapq
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import structlog
+
+logger = structlog.get_logger()
+
+# A job returns the timestamp it wants to run at next, or None when done
+JobFunc = Callable[[], Optional[float]]
+
+
+@dataclass
+class Job:
+    """A scheduled job"""
+    name: str
+    due: float
+    func: JobFunc
+    version: int
+
+
+class Scheduler:
+    """Named jobs run at wall-clock times by a single loop"""
+
+    def __init__(self, coalesce: float = 60.0, max_sleep: float = 300.0,
+                 retry_delay: float = 300.0, clock: Callable[[], float] = time.time):
+        """Create an empty scheduler
+
+        Args:
+            coalesce: Jobs due within this many seconds run in the same wakeup
+            max_sleep: Longest sleep between wakeups
+            retry_delay: Delay before running a job again after it raised
+            clock: Source of the current timestamp
+        """
+        self.coalesce = coalesce
+        self.max_sleep = max_sleep
+        self.retry_delay = retry_delay
+        self.clock = clock
+        self.jobs: Dict[str, Job] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._versions = 0
+        self._wakeup = threading.Event()
+        self._stopped = False
+
+    def schedule(self, name: str, due: float, func: JobFunc) -> None:
+        """Run `func` at timestamp `due`, replacing any job of the same name"""
+        self._versions += 1
+        self.jobs[name] = Job(name, due, func, self._versions)
+        heapq.heappush(self._heap, (due, self._versions, name))
+        if len(self._heap) > 2 * len(self.jobs) + 64:
+            self._heap = [(job.due, job.version, job.name) for job in self.jobs.values()]
+            heapq.heapify(self._heap)
+        # An earlier job may now be due before the loop's next wakeup
+        self._wakeup.set()
+
+    def cancel(self, name: str) -> None:
+        self.jobs.pop(name, None)
+
+    def next_due(self) -> Optional[float]:
+        """Due time of the earliest job"""
+        while self._heap:
+            due, version, name = self._heap[0]
+            job = self.jobs.get(name)
+            if job is not None and job.version == version:
+                return due
+            heapq.heappop(self._heap)
+        return None
+
+    def run_pending(self, now: Optional[float] = None) -> int:
+        """Run the jobs due by `now` plus the coalescing window
+
+        Returns:
+            Number of jobs run
+        """
+        horizon = (self.clock() if now is None else now) + self.coalesce
+        due_jobs = []
+        while True:
+            due = self.next_due()
+            if due is None or due > horizon:
+                break
+            _, _, name = heapq.heappop(self._heap)
+            due_jobs.append(self.jobs.pop(name))
+
+        for job in due_jobs:
+            try:
+                next_due = job.func()
+            except Exception as e:
+                logger.error("Scheduled job failed", job=job.name, error=str(e))
+                next_due = self.clock() + self.retry_delay
+            # The job may have rescheduled itself explicitly
+            if next_due is not None and job.name not in self.jobs:
+                self.schedule(job.name, next_due, job.func)
+        return len(due_jobs)
+
+    def run(self) -> None:
+        """Run jobs until stop() is called or no job is left"""
+        self._stopped = False
+        while not self._stopped:
+            self._wakeup.clear()
+            self.run_pending()
+            due = self.next_due()
+            if due is None:
+                return
+            self._wakeup.wait(min(max(due - self.clock(), 0.0), self.max_sleep))
+
+    def stop(self) -> None:
+        """Make run() return after the current job (safe from signal handlers)"""
+        self._stopped = True
+        self._wakeup.set()
@@ -0,0 +1,90 @@
+"""RFC 3339 timestamp parsing shared by the Google integrations
+
+Google APIs return timestamps such as ``2025-01-01T00:00:00.000Z``. The same
+strings repeat constantly (task due dates are always midnight, all-day events
+share dates), so single values go through a memoized parser and whole
+columns are parsed with each distinct value decoded once.
+
+Parsed values are always timezone-aware: an explicit offset is kept, ``Z``
+maps to UTC and a missing offset is read as UTC. Works on Python 3.9, whose
+``datetime.fromisoformat`` accepts neither ``Z`` nor arbitrary fractional
+second precision.
+"""
+
+import re
+from datetime import date, datetime, time, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+_FRACTION = re.compile(r"\.(\d+)")
+_MISSING = object()
+
+
+def _parse(value: str) -> datetime:
+    text = value.strip()
+    if text[-1:] in ("Z", "z"):
+        text = text[:-1] + "+00:00"
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        # Fractions other than 3 or 6 digits are rejected before Python 3.11
+        parsed = datetime.fromisoformat(
+            _FRACTION.sub(lambda m: "." + m.group(1)[:6].ljust(6, "0"), text, count=1)
+        )
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+@lru_cache(maxsize=8192)
+def parse_rfc3339(value: str) -> datetime:
+    """Parse an RFC 3339 timestamp into an aware datetime
+
+    Raises:
+        ValueError: If the value is not a valid timestamp
+    """
+    return _parse(value)
+
+
+def parse_rfc3339_or_none(value: Optional[str]) -> Optional[datetime]:
+    """parse_rfc3339(), returning None for empty or malformed values"""
+    if not value:
+        return None
+    try:
+        return parse_rfc3339(value)
+    except (ValueError, TypeError):
+        return None
+
+
+@lru_cache(maxsize=4096)
+def parse_date_local(value: str) -> datetime:
+    """All-day date (``YYYY-MM-DD``) as midnight in the local timezone
+
+    All-day events belong to a calendar day rather than an instant, so they
+    are anchored to local midnight and stay on the same day when shown.
+    """
+    return datetime.combine(date.fromisoformat(value), time.min).astimezone()
+
+
+def parse_rfc3339_column(values: Iterable[Optional[str]]) -> List[Optional[datetime]]:
+    """Parse a column of timestamps, decoding each distinct value once
+
+    Empty and malformed values become None, positions are preserved. The
+    column is deduplicated locally, so mostly-unique columns (``updated``)
+    do not evict the shared memo.
+    """
+    seen: Dict[str, Optional[datetime]] = {}
+    result: List[Optional[datetime]] = []
+    for value in values:
+        if not value:
+            result.append(None)
+            continue
+        parsed = seen.get(value, _MISSING)
+        if parsed is _MISSING:
+            try:
+                parsed = _parse(value)
+            except (ValueError, TypeError):
+                parsed = None
+            seen[value] = parsed
+        result.append(parsed)
+    return result
@@ -5,6 +5,7 @@ from pathlib import Path
 from typing import Dict, List, Optional, Any
 import structlog
 
+from pm.core.atomic import atomic_write, file_lock
 from pm.core.config import PMConfig
 
 logger = structlog.get_logger()
@@ -80,11 +81,20 @@ class AccountManager:
         self._save_accounts_config(config)
         return config
 
+    def _reload_accounts_config(self) -> None:
+        """重新读取其他进程可能已修改的账号配置（在文件锁内调用）"""
+        try:
+            with open(self.accounts_config_file, 'r', encoding='utf-8') as f:
+                self._accounts_config = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error("Error reloading accounts config", error=str(e))
+
     def _save_accounts_config(self, config: Dict[str, Any]) -> bool:
         """保存账号配置"""
         try:
-            with open(self.accounts_config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
+            atomic_write(self.accounts_config_file, json.dumps(config, indent=2, ensure_ascii=False))
             return True
         except Exception as e:
             logger.error("Error saving accounts config", error=str(e))
@@ -107,27 +117,31 @@ class AccountManager:
         if credentials_file is None:
             credentials_file = f"credentials_{alias}.json" if alias != "default" else "credentials.json"
 
-        # 检查别名是否已存在
-        if alias in self._accounts_config.get('accounts', {}):
-            logger.warning("Account alias already exists", alias=alias)
-            return False
+        # 读取、修改、写回期间持有文件锁，避免覆盖其他进程的修改
+        with file_lock(self.accounts_config_file):
+            self._reload_accounts_config()
 
-        # 添加账号配置
-        if 'accounts' not in self._accounts_config:
-            self._accounts_config['accounts'] = {}
+            # 检查别名是否已存在
+            if alias in self._accounts_config.get('accounts', {}):
+                logger.warning("Account alias already exists", alias=alias)
+                return False
 
-        self._accounts_config['accounts'][alias] = {
-            "display_name": display_name,
-            "email": email,
-            "services": services,
-            "credentials_file": credentials_file
-        }
+            # 添加账号配置
+            if 'accounts' not in self._accounts_config:
+                self._accounts_config['accounts'] = {}
 
-        # 如果是第一个账号，设置为默认
-        if len(self._accounts_config['accounts']) == 1:
-            self._accounts_config['default_account'] = alias
+            self._accounts_config['accounts'][alias] = {
+                "display_name": display_name,
+                "email": email,
+                "services": services,
+                "credentials_file": credentials_file
+            }
+
+            # 如果是第一个账号，设置为默认
+            if len(self._accounts_config['accounts']) == 1:
+                self._accounts_config['default_account'] = alias
 
-        success = self._save_accounts_config(self._accounts_config)
+            success = self._save_accounts_config(self._accounts_config)
         if success:
             logger.info("Account added successfully", alias=alias, email=email)
 
@@ -135,24 +149,27 @@ class AccountManager:
 
     def remove_account(self, alias: str) -> bool:
         """移除账号"""
-        if alias not in self._accounts_config.get('accounts', {}):
-            logger.warning("Account not found", alias=alias)
-            return False
+        with file_lock(self.accounts_config_file):
+            self._reload_accounts_config()
 
-        # 不允许删除默认账号
-        if alias == self._accounts_config.get('default_account'):
-            logger.warning("Cannot remove default account", alias=alias)
-            return False
+            if alias not in self._accounts_config.get('accounts', {}):
+                logger.warning("Account not found", alias=alias)
+                return False
+
+            # 不允许删除默认账号
+            if alias == self._accounts_config.get('default_account'):
+                logger.warning("Cannot remove default account", alias=alias)
+                return False
 
-        # 删除账号配置
-        del self._accounts_config['accounts'][alias]
+            # 删除账号配置
+            del self._accounts_config['accounts'][alias]
 
-        # 删除对应的token文件
-        token_file = self.config.data_dir / "tokens" / f"google_{alias}_token.json"
-        if token_file.exists():
-            token_file.unlink()
+            # 删除对应的token文件
+            token_file = self.config.data_dir / "tokens" / f"google_{alias}_token.json"
+            if token_file.exists():
+                token_file.unlink()
 
-        success = self._save_accounts_config(self._accounts_config)
+            success = self._save_accounts_config(self._accounts_config)
         if success:
             logger.info("Account removed successfully", alias=alias)
 
@@ -160,12 +177,15 @@ class AccountManager:
 
     def set_default_account(self, alias: str) -> bool:
         """设置默认账号"""
-        if alias not in self._accounts_config.get('accounts', {}):
-            logger.warning("Account not found", alias=alias)
-            return False
+        with file_lock(self.accounts_config_file):
+            self._reload_accounts_config()
+
+            if alias not in self._accounts_config.get('accounts', {}):
+                logger.warning("Account not found", alias=alias)
+                return False
 
-        self._accounts_config['default_account'] = alias
-        success = self._save_accounts_config(self._accounts_config)
+            self._accounts_config['default_account'] = alias
+            success = self._save_accounts_config(self._accounts_config)
 
         if success:
             logger.info("Default account updated", alias=alias)
@@ -0,0 +1,112 @@
+"""Per-calendar incremental sync state for Google Calendar
+
+Every calendar keeps its own ``nextSyncToken`` together with a snapshot of
+the events inside the window that was fully synced. Later reads send only
+the token and receive the events that changed since, instead of listing the
+whole window again. A 410 from the API (token expired) or a request outside
+the synced window falls back to a full sync.
+"""
+
+import json
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import quote
+
+import structlog
+
+from pm.core.atomic import atomic_write
+from pm.core.profiling import timed
+from pm.core.timestamps import parse_rfc3339_or_none
+
+logger = structlog.get_logger()
+
+
+@dataclass
+class CalendarSyncState:
+    """Sync token and event snapshot of one calendar"""
+    calendar_id: str
+    sync_token: str
+    # Synced window, RFC 3339 (UTC)
+    window_start: str
+    window_end: str
+    synced_at: float = 0.0
+    # Raw API resources by event id
+    events: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    def covers(self, time_min: datetime, time_max: datetime, max_age: timedelta) -> bool:
+        """Whether [time_min, time_max) lies inside the synced window
+
+        A window that started more than `max_age` before time_min is treated
+        as not covering, so the snapshot does not keep growing with past
+        events.
+        """
+        start = parse_rfc3339_or_none(self.window_start)
+        end = parse_rfc3339_or_none(self.window_end)
+        if start is None or end is None:
+            return False
+        return start <= time_min and end >= time_max and time_min - start <= max_age
+
+    def apply(self, items: Any) -> int:
+        """Apply an incremental page; cancelled events are removed
+
+        Returns:
+            Number of changed events
+        """
+        changed = 0
+        for item in items:
+            event_id = item.get('id')
+            if not event_id:
+                continue
+            if item.get('status') == 'cancelled':
+                self.events.pop(event_id, None)
+            else:
+                self.events[event_id] = item
+            changed += 1
+        return changed
+
+
+class CalendarSyncStore:
+    """One JSON file per account and calendar under `root`"""
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def _path(self, account: str, calendar_id: str) -> Path:
+        # 日历ID可能含有 @ # / 等字符
+        return self.root / quote(account, safe='') / f"{quote(calendar_id, safe='')}.json"
+
+    @timed("calendar_sync.load", "io")
+    def load(self, account: str, calendar_id: str) -> Optional[CalendarSyncState]:
+        path = self._path(account, calendar_id)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return CalendarSyncState(**json.load(f))
+        except Exception as e:
+            logger.warning("Discarding unreadable calendar sync state",
+                           calendar_id=calendar_id, error=str(e))
+            return None
+
+    @timed("calendar_sync.save", "io")
+    def save(self, account: str, state: CalendarSyncState) -> None:
+        try:
+            atomic_write(self._path(account, state.calendar_id), json.dumps(asdict(state), ensure_ascii=False))
+        except OSError as e:
+            logger.error("Failed to save calendar sync state",
+                         calendar_id=state.calendar_id, error=str(e))
+
+    def expire(self, account: str, calendar_id: str) -> None:
+        """Force the next read to ask the API for changes"""
+        state = self.load(account, calendar_id)
+        if state is not None:
+            state.synced_at = 0.0
+            self.save(account, state)
+
+    def drop(self, account: str, calendar_id: str) -> None:
+        try:
+            self._path(account, calendar_id).unlink()
+        except OSError:
+            pass
@@ -0,0 +1,333 @@
+"""Keyword classification engine for Google Tasks and Calendar records
+
+All keyword tables used to infer category, context, priority and energy are
+compiled into a single regular expression. Each keyword maps to a bitmask of
+the (table, label) pairs it belongs to, so one scan over a record's text
+answers every keyword question at once, and a batch of records is scanned
+in a single pass over their joined text.
+"""
+
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from pm.models.task import TaskContext, TaskPriority, EnergyLevel
+from pm.core.profiling import timed
+
+
+class TaskCategory(Enum):
+    """任务分类枚举"""
+    HABIT = "habit"      # 习惯
+    EVENT = "event"      # 日程/事件
+    TASK = "task"        # 普通任务
+
+
+# 任务标题前缀（按匹配顺序）
+CATEGORY_PREFIXES: List[Tuple[TaskCategory, List[str]]] = [
+    (TaskCategory.HABIT, ['[habit]', '习惯:', 'habit:', '[习惯]']),
+    (TaskCategory.EVENT, ['[event]', '日程:', 'event:', '[日程]', '事件:', '[事件]']),
+    (TaskCategory.TASK, ['[task]', '任务:', 'task:', '[任务]']),
+]
+
+# 不应转换为任务的日历关键词（纯日程活动，仅匹配标题）
+EVENT_SCHEDULE_KEYWORDS = [
+    # 课程相关
+    'pgdm', 'nelp', 'psam', 'course', 'class', 'lecture', 'seminar',
+    'studio', 'workshop', '课程', '讲座', '研讨会', '工作坊',
+    # 会议相关（纯参与）
+    'standup', 'scrum', 'daily', '例会', '周会',
+    # 活动相关
+    'event', 'conference', 'meetup', '活动', '大会'
+]
+
+# 应该转换为任务的日历关键词（需要行动，匹配标题或描述）
+EVENT_TASK_KEYWORDS = [
+    'prepare', 'review', 'submit', 'complete', 'finish',
+    'write', 'design', 'develop', 'create', 'fix',
+    '准备', '提交', '完成', '撰写', '设计', '开发', '修复',
+    'assignment', 'homework', 'project', 'deadline',
+    '作业', '任务', '项目', '截止'
+]
+
+# 日历事件上下文关键词映射（按优先顺序）
+EVENT_CONTEXT_KEYWORDS: List[Tuple[TaskContext, List[str]]] = [
+    (TaskContext.MEETING, ['会议', '讨论', 'meeting', '面谈', '汇报', '沟通']),
+    (TaskContext.PHONE, ['电话', '通话', 'call', '联系', '咨询']),
+    (TaskContext.COMPUTER, ['开发', '编程', '写代码', '系统', '测试', '部署']),
+    (TaskContext.FOCUS, ['思考', '规划', '设计', '分析', '研究', '学习']),
+    (TaskContext.OFFICE, ['办公', '文档', '整理', '归档']),
+    (TaskContext.READING, ['阅读', '学习', '培训', '教育']),
+]
+
+# Google任务上下文关键词映射（按优先顺序）
+TASK_CONTEXT_KEYWORDS: List[Tuple[TaskContext, List[str]]] = [
+    (TaskContext.PHONE, ['打电话', '联系', '通话', 'call', '咨询', '沟通']),
+    (TaskContext.COMPUTER, ['编程', '开发', '写代码', '系统', '网站', '程序', '测试', '部署']),
+    (TaskContext.MEETING, ['会议', '讨论', 'meeting', '面谈', '汇报', '开会']),
+    (TaskContext.FOCUS, ['思考', '规划', '设计', '分析', '研究', '学习', '写作']),
+    (TaskContext.OFFICE, ['办公', '文档', '整理', '归档', '报告', '表格']),
+    (TaskContext.READING, ['阅读', '学习', '看书', '培训', '教程']),
+    (TaskContext.ERRANDS, ['购买', '取', '送', '邮寄', '银行', '医院']),
+]
+
+# 需要较高精力的复杂任务关键词
+TASK_COMPLEX_KEYWORDS = ['设计', '分析', '规划', '开发', '创建', '制定', '评估', '研究']
+
+
+@dataclass
+class Classification:
+    """Inferred attributes of a single task or calendar event"""
+    context: TaskContext
+    priority: TaskPriority
+    energy: EnergyLevel
+    category: Optional[TaskCategory] = None
+    clean_title: Optional[str] = None
+    convert_to_task: bool = True
+
+
+class KeywordEngine:
+    """Matches many labelled keyword tables with one compiled pattern
+
+    Each (table, label) pair owns one bit. A keyword's mask is the union of
+    the bits of every keyword it contains, so a single leftmost-longest match
+    also accounts for all shorter keywords hidden inside it; restarting the
+    search one character after each match start catches overlapping ones.
+    """
+
+    SEPARATOR = '\x00'
+
+    def __init__(self, tables: Dict[str, Sequence[Tuple[Any, Sequence[str]]]]):
+        self._labels: Dict[str, List[Tuple[int, Any]]] = {}
+        self._table_masks: Dict[str, int] = {}
+        keyword_bits: Dict[str, int] = {}
+
+        bit_index = 0
+        for table, entries in tables.items():
+            self._labels[table] = []
+            table_mask = 0
+            for label, keywords in entries:
+                bit = 1 << bit_index
+                bit_index += 1
+                self._labels[table].append((bit, label))
+                table_mask |= bit
+                for keyword in keywords:
+                    keyword = keyword.lower()
+                    keyword_bits[keyword] = keyword_bits.get(keyword, 0) | bit
+            self._table_masks[table] = table_mask
+
+        self._masks: Dict[str, int] = {}
+        for keyword in keyword_bits:
+            mask = 0
+            for other, bits in keyword_bits.items():
+                if other in keyword:
+                    mask |= bits
+            self._masks[keyword] = mask
+
+        ordered = sorted(keyword_bits, key=len, reverse=True)
+        self._pattern = re.compile('|'.join(re.escape(k) for k in ordered))
+
+    def scan(self, text: str) -> int:
+        """Bitmask of all labels whose keywords occur in text (lower-cased)"""
+        mask = 0
+        search = self._pattern.search
+        masks = self._masks
+        match = search(text)
+        while match is not None:
+            mask |= masks[match.group()]
+            match = search(text, match.start() + 1)
+        return mask
+
+    def scan_batch(self, texts: Sequence[str]) -> List[int]:
+        """Scan many texts in one pass over their joined content"""
+        if not texts:
+            return []
+
+        starts = []
+        offset = 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text) + 1
+        joined = self.SEPARATOR.join(texts)
+
+        results = [0] * len(texts)
+        search = self._pattern.search
+        masks = self._masks
+        match = search(joined)
+        while match is not None:
+            position = match.start()
+            results[bisect_right(starts, position) - 1] |= masks[match.group()]
+            match = search(joined, position + 1)
+        return results
+
+    def has(self, table: str, mask: int) -> bool:
+        """Whether any keyword of the table matched"""
+        return bool(mask & self._table_masks[table])
+
+    def first_label(self, table: str, mask: int, default: Any = None) -> Any:
+        """First label of the table (in declaration order) that matched"""
+        if mask & self._table_masks[table]:
+            for bit, label in self._labels[table]:
+                if mask & bit:
+                    return label
+        return default
+
+
+ENGINE = KeywordEngine({
+    'event_schedule': [(True, EVENT_SCHEDULE_KEYWORDS)],
+    'event_task': [(True, EVENT_TASK_KEYWORDS)],
+    'event_context': EVENT_CONTEXT_KEYWORDS,
+    'task_context': TASK_CONTEXT_KEYWORDS,
+    'task_complex': [(True, TASK_COMPLEX_KEYWORDS)],
+})
+
+_PREFIX_CATEGORIES: Dict[str, TaskCategory] = {
+    prefix.lower(): category
+    for category, prefixes in CATEGORY_PREFIXES
+    for prefix in prefixes
+}
+_PREFIX_PATTERN = re.compile(
+    '|'.join(re.escape(prefix) for prefix in _PREFIX_CATEGORIES)
+)
+
+
+def split_category_prefix(title: str) -> Tuple[TaskCategory, str]:
+    """识别任务分类并返回去除前缀的标题"""
+    match = _PREFIX_PATTERN.match(title.lower())
+    if not match:
+        return TaskCategory.TASK, title
+    prefix = match.group()
+    return _PREFIX_CATEGORIES[prefix], title[len(prefix):].strip()
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+@timed("classify events", "parse")
+def classify_events(events: Sequence[Any], now: Optional[datetime] = None) -> List[Classification]:
+    """Classify a batch of CalendarEvent objects in one pass
+
+    Args:
+        events: Objects with title, description, attendees, start_time and
+            duration_minutes
+        now: Reference time for priority (defaults to current UTC time)
+
+    Returns:
+        One Classification per event, in order
+    """
+    if now is None:
+        now = datetime.now(timezone.utc)
+
+    texts = []
+    for event in events:
+        texts.append(event.title.lower())
+        texts.append((event.description or "").lower())
+    masks = ENGINE.scan_batch(texts)
+
+    results = []
+    for i, event in enumerate(events):
+        title_mask = masks[2 * i]
+        combined_mask = title_mask | masks[2 * i + 1]
+        duration = event.duration_minutes
+
+        # 纯日程关键词且无任务关键词 -> 不转换；任务关键词 -> 转换；
+        # 否则短于30分钟的事件不转换
+        has_task_keyword = ENGINE.has('event_task', combined_mask)
+        if ENGINE.has('event_schedule', title_mask) and not has_task_keyword:
+            convert = False
+        elif has_task_keyword:
+            convert = True
+        else:
+            convert = duration >= 30
+
+        context = ENGINE.first_label('event_context', combined_mask)
+        if context is None:
+            context = TaskContext.MEETING if event.attendees else TaskContext.FOCUS
+
+        hours_until = (_as_utc(event.start_time) - now).total_seconds() / 3600
+        if hours_until <= 1:
+            priority = TaskPriority.HIGH
+        elif hours_until <= 24:
+            priority = TaskPriority.MEDIUM
+        else:
+            priority = TaskPriority.LOW
+
+        if duration <= 30:
+            energy = EnergyLevel.LOW
+        elif duration <= 90:
+            energy = EnergyLevel.MEDIUM
+        else:
+            energy = EnergyLevel.HIGH
+
+        results.append(Classification(
+            context=context,
+            priority=priority,
+            energy=energy,
+            convert_to_task=convert,
+        ))
+
+    return results
+
+
+@timed("classify tasks", "parse")
+def classify_tasks(tasks: Sequence[Any], now: Optional[datetime] = None) -> List[Classification]:
+    """Classify a batch of GoogleTask objects in one pass
+
+    Args:
+        tasks: Objects with title, notes and due
+        now: Reference time for priority (defaults to current UTC time)
+
+    Returns:
+        One Classification per task, in order
+    """
+    if now is None:
+        now = datetime.now(timezone.utc)
+
+    texts = []
+    for task in tasks:
+        texts.append(task.title.lower())
+        texts.append((task.notes or "").lower())
+    masks = ENGINE.scan_batch(texts)
+
+    results = []
+    for i, task in enumerate(tasks):
+        combined_mask = masks[2 * i] | masks[2 * i + 1]
+
+        category, clean_title = split_category_prefix(task.title)
+
+        context = ENGINE.first_label('task_context', combined_mask, TaskContext.FOCUS)
+
+        if not task.due:
+            priority = TaskPriority.MEDIUM
+        else:
+            hours_until = (_as_utc(task.due) - now).total_seconds() / 3600
+            if hours_until <= 6:
+                priority = TaskPriority.HIGH
+            elif hours_until <= 48:
+                priority = TaskPriority.MEDIUM
+            else:
+                priority = TaskPriority.LOW
+
+        title_words = len(task.title.split())
+        notes_length = len(task.notes or "")
+        if ENGINE.has('task_complex', combined_mask) or notes_length > 100 or title_words > 8:
+            energy = EnergyLevel.HIGH
+        elif notes_length > 20 or title_words > 4:
+            energy = EnergyLevel.MEDIUM
+        else:
+            energy = EnergyLevel.LOW
+
+        results.append(Classification(
+            context=context,
+            priority=priority,
+            energy=energy,
+            category=category,
+            clean_title=clean_title,
+        ))
+
+    return results
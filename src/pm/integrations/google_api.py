@@ -0,0 +1,260 @@
+"""Shared HTTP client for the Google REST APIs
+
+Keeps one pooled requests.Session per thread and retries rate-limited or
+temporarily unavailable responses with bounded exponential backoff,
+honoring the server's Retry-After header. Responses are requested
+compressed, and large item collections can be decoded incrementally with
+``iter_json_items`` when ijson is installed.
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+import structlog
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    # urllib3 decodes br transparently once a brotli binding is importable
+    import brotli  # noqa: F401
+    BROTLI_AVAILABLE = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        BROTLI_AVAILABLE = True
+    except ImportError:
+        BROTLI_AVAILABLE = False
+
+from pm.core.metrics import metrics
+from pm.core.profiling import span
+
+logger = structlog.get_logger()
+
+ACCEPT_ENCODING = "gzip, deflate, br" if BROTLI_AVAILABLE else "gzip, deflate"
+# Google only compresses responses for user agents that mention gzip
+USER_AGENT = "PersonalManager/2.0 (gzip)"
+# Malformed bodies (orjson.JSONDecodeError is a ValueError)
+JSON_ERRORS = (ValueError, ijson.JSONError) if IJSON_AVAILABLE else (ValueError,)
+
+
+class GoogleApiClient:
+    """requests-compatible get/post/patch/put/delete with retry
+
+    Connection errors are not retried: callers such as the offline mutation
+    queue rely on seeing them immediately.
+    """
+
+    # 任何方法都可重试：请求未被处理
+    RETRY_ALWAYS = {429, 503}
+    # 仅幂等方法可重试：请求可能已部分生效
+    RETRY_IDEMPOTENT = {500, 502, 504}
+    IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+    # 403 + 这些原因同样表示配额限流
+    RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+
+    def __init__(self, max_retries: int = 3, backoff_base: float = 0.5,
+                 max_backoff: float = 32.0, timeout: float = 30,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self._sleep = sleep
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        """Connection-pooled session owned by the calling thread"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update({'Accept-Encoding': ACCEPT_ENCODING, 'User-Agent': USER_AGENT})
+            self._local.session = session
+        return session
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        method = method.upper()
+        kwargs.setdefault('timeout', self.timeout)
+
+        attempt = 0
+        while True:
+            with span(f"{method} {urlsplit(url).path}", "http", attempt=attempt) as current:
+                started = time.perf_counter()
+                response = self.session.request(method, url, **kwargs)
+                elapsed = time.perf_counter() - started
+                current.set(status=response.status_code,
+                            bytes=response.headers.get('Content-Length', ''))
+            metrics.record_request(method, url, response.status_code, elapsed,
+                                   response_size(response, streamed=kwargs.get('stream', False)),
+                                   quota_error=self._is_quota_error(response))
+            if attempt >= self.max_retries or not self._should_retry(method, response):
+                return response
+
+            delay = self._retry_delay(response, attempt)
+            attempt += 1
+            metrics.record_retry(url)
+            logger.warning("Retrying Google API request",
+                           method=method,
+                           url=url.split('?')[0],
+                           status_code=response.status_code,
+                           attempt=attempt,
+                           delay=round(delay, 3))
+            response.close()
+            self._sleep(delay)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def patch(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request('PATCH', url, **kwargs)
+
+    def put(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request('PUT', url, **kwargs)
+
+    def delete(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request('DELETE', url, **kwargs)
+
+    def _should_retry(self, method: str, response: requests.Response) -> bool:
+        status = response.status_code
+        if status in self.RETRY_ALWAYS:
+            return True
+        if status in self.RETRY_IDEMPOTENT:
+            return method in self.IDEMPOTENT_METHODS
+        if status == 403:
+            return self._is_quota_error(response)
+        return False
+
+    def _is_quota_error(self, response: requests.Response) -> bool:
+        status = response.status_code
+        if status == 429:
+            return True
+        if status == 403:
+            return any(reason in response.text for reason in self.RATE_LIMIT_REASONS)
+        return False
+
+    def _retry_delay(self, response: requests.Response, attempt: int) -> float:
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        # 指数退避 + 抖动，避免多个客户端同时重试
+        backoff = min(self.max_backoff, self.backoff_base * (2 ** attempt))
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def response_size(response: requests.Response, streamed: bool = False) -> int:
+    """Body size in bytes, from Content-Length when the server sent one
+
+    For compressed responses this is the transferred (compressed) size.
+    Streamed bodies are not read here; without a Content-Length they count 0.
+    """
+    length = response.headers.get('Content-Length')
+    if length and length.isdigit():
+        return int(length)
+    if streamed:
+        return 0
+    return len(response.content)
+
+
+def decode_json(response: Any) -> Any:
+    """response.json(), timed as a "json" profiling span
+
+    Uses orjson when it is installed.
+    """
+    with span("json.decode", "json", bytes=len(response.content)):
+        if ORJSON_AVAILABLE:
+            return orjson.loads(response.content)
+        return response.json()
+
+
+def iter_json_items(response: Any, key: str = 'items',
+                    page: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """Yield the elements of a collection response's `key` array
+
+    A response requested with ``stream=True`` is decoded incrementally with
+    ijson, so the first items are available before the body has finished
+    downloading and the full document is never held in memory. Otherwise
+    (already read, cached, or ijson not installed) the body is decoded at
+    once. The response is closed when iteration ends.
+
+    Args:
+        response: Response to decode
+        key: Name of the array member
+        page: Filled with the other top-level members (nextPageToken,
+            nextSyncToken, ...) by the time iteration ends
+    """
+    try:
+        raw = getattr(response, 'raw', None)
+        if IJSON_AVAILABLE and raw is not None and not getattr(response, '_content_consumed', True):
+            # Let urllib3 undo gzip/br before the parser sees the bytes
+            raw.decode_content = True
+            if page is None:
+                yield from ijson.items(raw, f'{key}.item', use_float=True)
+            else:
+                yield from _iter_page_events(ijson.parse(raw, use_float=True), key, page)
+        else:
+            data = decode_json(response)
+            if page is not None:
+                page.update((name, value) for name, value in data.items() if name != key)
+            yield from data.get(key, [])
+    except JSON_ERRORS as e:
+        raise requests.RequestException(f"Invalid JSON in response: {e}") from e
+    finally:
+        close = getattr(response, 'close', None)
+        if close:
+            close()
+
+
+def _iter_page_events(events: Iterator[Tuple[str, str, Any]], key: str,
+                      page: Dict[str, Any]) -> Iterator[Any]:
+    """Build the `key` array elements from ijson.parse() events, keeping top-level scalars in `page`"""
+    prefix = f'{key}.item'
+    for path, event, value in events:
+        if path == prefix and event in ('start_map', 'start_array'):
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+            end = 'end_map' if event == 'start_map' else 'end_array'
+            for path, event, value in events:
+                builder.event(event, value)
+                if path == prefix and event == end:
+                    break
+            yield builder.value
+        elif path == prefix:
+            yield value
+        elif '.' not in path and path and event in ('string', 'number', 'boolean', 'null'):
+            page[path] = value
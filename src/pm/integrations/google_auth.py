@@ -120,7 +120,7 @@ class GoogleAuthManager:
         
         success, token_info, message = self.oauth_manager.handle_callback(
             callback_url=callback_url,
-            token_endpoint=self.GOOGLE_TOKEN_ENDPOINT,
+            token_endpoint=self.config.google_oauth_token_url,
             client_id=self.client_id,
             client_secret=self.client_secret
         )
@@ -4,18 +4,35 @@
 """
 
 import json
+import time
 import requests
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+from urllib.parse import quote
 import structlog
 
+from pathlib import Path
+
 from pm.core.config import PMConfig
+from pm.core.metrics import metered, metrics
+from pm.core.profiling import span
+from pm.core.timestamps import parse_date_local, parse_rfc3339
 from pm.models.task import Task, TaskStatus, TaskContext, TaskPriority, EnergyLevel
 from .google_auth import GoogleAuthManager
+from .calendar_sync import CalendarSyncState, CalendarSyncStore
+from .google_api import GoogleApiClient, iter_json_items
+from .http_cache import HttpResponseCache
+from .multi_account import fan_out, merge_sorted
+from .classification import Classification, classify_events
 
 logger = structlog.get_logger()
 
 
+def _rfc3339(value: datetime) -> str:
+    """UTC datetime as used in timeMin/timeMax"""
+    return value.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
 class CalendarEvent:
     """Google Calendar事件封装"""
     
@@ -26,7 +43,10 @@ class CalendarEvent:
                  end_time: datetime,
                  description: Optional[str] = None,
                  location: Optional[str] = None,
-                 attendees: Optional[List[str]] = None):
+                 attendees: Optional[List[str]] = None,
+                 calendar_id: str = "primary",
+                 calendar_name: Optional[str] = None,
+                 all_day: bool = False):
         self.event_id = event_id
         self.title = title
         self.start_time = start_time
@@ -34,6 +54,11 @@ class CalendarEvent:
         self.description = description
         self.location = location
         self.attendees = attendees or []
+        # 事件所在日历
+        self.calendar_id = calendar_id
+        self.calendar_name = calendar_name or calendar_id
+        # 全天事件（start 只有 date）
+        self.all_day = all_day
     
     @property
     def duration_minutes(self) -> int:
@@ -42,33 +67,33 @@ class CalendarEvent:
     
     @property
     def is_today(self) -> bool:
-        """检查事件是否在今天"""
-        today = datetime.now().date()
-        return self.start_time.date() == today
+        """检查事件是否在今天（本地时区）"""
+        return self.start_time.astimezone().date() == datetime.now().date()
     
-    def to_task(self) -> Task:
-        """转换为GTD任务 - 仅转换可执行的任务，不转换纯日程"""
+    def classify(self) -> Classification:
+        """一次性推断是否转换、上下文、优先级和精力"""
+        return classify_events([self])[0]
 
-        # 检查是否应该转换为任务
-        if not self._should_convert_to_task():
-            return None
+    def to_task(self, classification: Optional[Classification] = None) -> Task:
+        """转换为GTD任务 - 仅转换可执行的任务，不转换纯日程
 
-        # 根据事件特征推断上下文
-        context = self._infer_context()
-
-        # 根据紧急程度推断优先级
-        priority = self._infer_priority()
+        Args:
+            classification: 预先批量计算的分类结果（见 classify_events）
+        """
+        if classification is None:
+            classification = self.classify()
 
-        # 根据持续时间推断所需精力
-        energy = self._infer_energy_level()
+        # 检查是否应该转换为任务
+        if not classification.convert_to_task:
+            return None
 
         task = Task(
             title=f"📅 {self.title}",
             description=self._generate_task_description(),
             status=TaskStatus.NEXT_ACTION,
-            context=context,
-            priority=priority,
-            energy_required=energy,
+            context=classification.context,
+            priority=classification.priority,
+            energy_required=classification.energy,
             estimated_duration=self.duration_minutes,
             due_date=self.start_time,
             source="google_calendar",
@@ -84,107 +109,19 @@ class CalendarEvent:
         - 课程/讲座/研讨会等纯参与性活动不转换
         - 需要准备或有具体交付物的活动才转换
         """
-        title_lower = self.title.lower()
-        desc_lower = (self.description or "").lower()
-
-        # 不应转换为任务的关键词（纯日程活动）
-        schedule_keywords = [
-            # 课程相关
-            'pgdm', 'nelp', 'psam', 'course', 'class', 'lecture', 'seminar',
-            'studio', 'workshop', '课程', '讲座', '研讨会', '工作坊',
-            # 会议相关（纯参与）
-            'standup', 'scrum', 'daily', '例会', '周会',
-            # 活动相关
-            'event', 'conference', 'meetup', '活动', '大会'
-        ]
-
-        # 应该转换为任务的关键词（需要行动）
-        task_keywords = [
-            'prepare', 'review', 'submit', 'complete', 'finish',
-            'write', 'design', 'develop', 'create', 'fix',
-            '准备', '提交', '完成', '撰写', '设计', '开发', '修复',
-            'assignment', 'homework', 'project', 'deadline',
-            '作业', '任务', '项目', '截止'
-        ]
-
-        # 检查是否包含不应转换的关键词
-        for keyword in schedule_keywords:
-            if keyword in title_lower:
-                # 但如果同时包含任务关键词，仍然转换
-                has_task_keyword = any(tk in title_lower or tk in desc_lower
-                                      for tk in task_keywords)
-                if not has_task_keyword:
-                    return False
-
-        # 如果明确包含任务关键词，应该转换
-        for keyword in task_keywords:
-            if keyword in title_lower or keyword in desc_lower:
-                return True
-
-        # 默认：短于30分钟的事件不转换（可能是例行会议）
-        if self.duration_minutes < 30:
-            return False
-
-        # 其他情况默认转换
-        return True
+        return self.classify().convert_to_task
     
     def _infer_context(self) -> TaskContext:
         """根据事件内容推断执行上下文"""
-        
-        title_lower = self.title.lower()
-        desc_lower = (self.description or "").lower()
-        combined = f"{title_lower} {desc_lower}"
-        
-        # 上下文关键词映射
-        context_keywords = {
-            TaskContext.MEETING: ['会议', '讨论', 'meeting', '面谈', '汇报', '沟通'],
-            TaskContext.PHONE: ['电话', '通话', 'call', '联系', '咨询'],
-            TaskContext.COMPUTER: ['开发', '编程', '写代码', '系统', '测试', '部署'],
-            TaskContext.FOCUS: ['思考', '规划', '设计', '分析', '研究', '学习'],
-            TaskContext.OFFICE: ['办公', '文档', '整理', '归档'],
-            TaskContext.READING: ['阅读', '学习', '培训', '教育']
-        }
-        
-        for context, keywords in context_keywords.items():
-            if any(keyword in combined for keyword in keywords):
-                return context
-        
-        # 有参与者通常是会议
-        if len(self.attendees) > 0:
-            return TaskContext.MEETING
-        
-        # 默认上下文
-        return TaskContext.FOCUS
+        return self.classify().context
     
     def _infer_priority(self) -> TaskPriority:
         """根据时间紧迫性推断优先级"""
-        
-        # 确保时间对象都有时区信息
-        now = datetime.now(timezone.utc)
-        if self.start_time.tzinfo is None:
-            start_time = self.start_time.replace(tzinfo=timezone.utc)
-        else:
-            start_time = self.start_time
-            
-        time_until_event = (start_time - now).total_seconds()
-        hours_until = time_until_event / 3600
-        
-        if hours_until <= 1:
-            return TaskPriority.HIGH
-        elif hours_until <= 24:
-            return TaskPriority.MEDIUM
-        else:
-            return TaskPriority.LOW
+        return self.classify().priority
     
     def _infer_energy_level(self) -> EnergyLevel:
         """根据持续时间推断所需精力水平"""
-        
-        if self.duration_minutes <= 30:
-            return EnergyLevel.LOW
-        elif self.duration_minutes <= 90:
-            return EnergyLevel.MEDIUM
-        else:
-            return EnergyLevel.HIGH
+        return self.classify().energy
     
     def _generate_task_description(self) -> str:
         """生成任务描述"""
@@ -212,11 +149,50 @@ class CalendarEvent:
 
 class GoogleCalendarIntegration:
     """Google Calendar集成管理器"""
+
+    # 部分响应字段掩码（fields=），只下载调用方实际用到的字段；事件列表分页读取，需保留 nextPageToken
+    # 转换为任务时需要描述、地点和参与者
+    EVENT_FIELDS = "nextPageToken,items(id,summary,description,location,start,end,attendees/email)"
+    # 仅展示（pm cal / pm today）时只需标题和时间
+    EVENT_SUMMARY_FIELDS = "nextPageToken,items(id,summary,start,end)"
+    CALENDAR_LIST_FIELDS = "items(id,summary,primary,selected,accessRole)"
+    # 增量同步需要 status 识别已删除的事件，快照要能满足所有调用方，取完整字段
+    SYNC_FIELDS = ("nextPageToken,nextSyncToken,"
+                   "items(id,status,summary,description,location,start,end,attendees/email)")
+
+    # 全量同步至少覆盖的天数，使 today / cal / cal --days 14 共用同一份快照
+    SYNC_WINDOW_DAYS = 31
+    # 快照起点早于当前超过该时长时重新全量同步，丢弃已过去的事件
+    SYNC_WINDOW_MAX_AGE = timedelta(days=7)
+    # 距上次同步不足该秒数时直接使用快照（与响应缓存中 calendar.events 的 TTL 一致）
+    SYNC_FRESH_SECONDS = 120
     
-    def __init__(self, config: PMConfig):
+    def __init__(self, config: PMConfig, account_alias: Optional[str] = None):
         self.config = config
+        # 使用的Google账号别名，None 表示默认账号
+        self.account_alias = account_alias
         self.google_auth = GoogleAuthManager(config)
-        
+        self.api_base_url = config.google_api_base_url.rstrip('/')
+        self.api_client = GoogleApiClient(max_retries=config.google_api_max_retries)
+        self.http_cache = HttpResponseCache(
+            config.data_dir / "http_cache",
+            max_bytes=config.http_cache_max_mb * 1024 * 1024,
+            enabled=config.http_cache_enabled,
+            client=self.api_client
+        )
+        # 每个日历的 syncToken 与事件快照
+        self.calendar_sync = (
+            CalendarSyncStore(config.data_dir / "calendar_sync")
+            if config.calendar_sync_enabled else None
+        )
+        self._calendars: Optional[List[Dict[str, Any]]] = None
+
+        if config.api_metrics_enabled:
+            metrics.persist_to(
+                config.data_dir / "api_metrics.json",
+                Path(config.api_metrics_textfile).expanduser() if config.api_metrics_textfile else None
+            )
+
         logger.info("Google Calendar integration initialized")
     
     def sync_calendar_to_tasks(self, days_ahead: int = 3) -> Tuple[int, List[str]]:
@@ -229,12 +205,13 @@ class GoogleCalendarIntegration:
             Tuple[同步任务数量, 错误信息列表]
         """
         
-        if not self.google_auth.is_google_authenticated():
+        if not self.google_auth.is_google_authenticated(self.account_alias):
             return 0, ["未通过Google认证，请先运行: pm auth login google"]
         
         try:
             # 获取日程事件
-            events = self._fetch_calendar_events(days_ahead)
+            # 只把主日历的事件转为任务，订阅的日历（节假日、同事日历等）不转换
+            events = self._fetch_calendar_events(days_ahead, calendar_ids=['primary'])
             
             if not events:
                 logger.info("No calendar events found", days_ahead=days_ahead)
@@ -247,9 +224,11 @@ class GoogleCalendarIntegration:
             synced_count = 0
             errors = []
             
-            for event in events:
+            classifications = classify_events(events)
+
+            for event, classification in zip(events, classifications):
                 try:
-                    task = event.to_task()
+                    task = event.to_task(classification)
                     
                     # 检查是否已存在相同的任务（通过source_id）
                     existing_tasks = agent.storage.get_all_tasks()
@@ -288,119 +267,304 @@ class GoogleCalendarIntegration:
             logger.error("Calendar sync failed", error=str(e))
             return 0, [error_msg]
     
-    def get_today_schedule(self) -> List[CalendarEvent]:
-        """获取今日日程"""
+    def get_today_schedule(self, fields: Optional[str] = None,
+                           calendar_ids: Optional[List[str]] = None) -> List[CalendarEvent]:
+        """获取今日日程
+
+        Args:
+            fields: 字段掩码，默认 EVENT_FIELDS
+            calendar_ids: 要读取的日历，默认 selected_calendar_ids()
+        """
         
-        if not self.google_auth.is_google_authenticated():
+        if not self.google_auth.is_google_authenticated(self.account_alias):
             return []
         
         try:
-            events = self._fetch_calendar_events(days_ahead=1)
-            today_events = [event for event in events if event.is_today]
-            
-            # 按开始时间排序
-            today_events.sort(key=lambda x: x.start_time)
-            
-            return today_events
+            events = self._fetch_calendar_events(days_ahead=1, fields=fields,
+                                                 calendar_ids=calendar_ids)
+            # 多个日历已归并为按开始时间排序的时间线
+            return [event for event in events if event.is_today]
         
         except Exception as e:
             logger.error("Error fetching today's schedule", error=str(e))
             return []
     
-    def get_upcoming_events(self, days_ahead: int = 7) -> List[CalendarEvent]:
-        """获取即将到来的事件"""
+    def get_upcoming_events(self, days_ahead: int = 7, fields: Optional[str] = None,
+                            calendar_ids: Optional[List[str]] = None) -> List[CalendarEvent]:
+        """获取即将到来的事件
+
+        Args:
+            days_ahead: 未来天数
+            fields: 字段掩码，默认 EVENT_FIELDS
+            calendar_ids: 要读取的日历，默认 selected_calendar_ids()
+        """
         
-        if not self.google_auth.is_google_authenticated():
+        if not self.google_auth.is_google_authenticated(self.account_alias):
             return []
         
         try:
-            events = self._fetch_calendar_events(days_ahead)
-            
-            # 按开始时间排序
-            events.sort(key=lambda x: x.start_time)
-            
-            return events
+            return self._fetch_calendar_events(days_ahead, fields=fields,
+                                               calendar_ids=calendar_ids)
         
         except Exception as e:
             logger.error("Error fetching upcoming events", error=str(e))
             return []
     
-    def _fetch_calendar_events(self, days_ahead: int) -> List[CalendarEvent]:
-        """从Google Calendar获取事件数据"""
-        
-        # 检查认证状态
-        token = self.google_auth.get_google_token()
+    @metered("get_calendar_list")
+    def get_calendar_list(self) -> List[Dict[str, Any]]:
+        """获取账号可访问的日历列表（calendarList）
+
+        结果经响应缓存保存，并在实例内复用；失败时返回空列表。
+        """
+
+        if self._calendars is not None:
+            return self._calendars
+
+        token = self.google_auth.get_google_token(self.account_alias)
         if not token or token.is_expired:
             logger.warning("No valid token for Google Calendar API")
             return []
-        
+
         try:
-            # 计算时间范围
-            now = datetime.now()
-            time_min = now.isoformat() + 'Z'
-            time_max = (now + timedelta(days=days_ahead)).isoformat() + 'Z'
-            
-            # Google Calendar API 参数
-            params = {
-                'timeMin': time_min,
-                'timeMax': time_max,
-                'singleEvents': True,
-                'orderBy': 'startTime',
-                'maxResults': 50
-            }
-            
-            # 调用Google Calendar API
-            headers = {
-                'Authorization': token.authorization_header,
-                'Accept': 'application/json'
-            }
-            
-            calendar_api_url = 'https://www.googleapis.com/calendar/v3/calendars/primary/events'
-            
-            logger.info("Fetching calendar events from Google API", 
-                       days_ahead=days_ahead,
-                       time_range=f"{time_min} to {time_max}")
-            
-            response = requests.get(
-                calendar_api_url,
-                params=params,
-                headers=headers,
+            response = self.http_cache.get(
+                f'{self.api_base_url}/calendar/v3/users/me/calendarList',
+                endpoint='calendar.calendarList',
+                headers={
+                    'Authorization': token.authorization_header,
+                    'Accept': 'application/json'
+                },
+                params={'maxResults': 250, 'fields': self.CALENDAR_LIST_FIELDS},
+                account=self._cache_account(),
                 timeout=30
             )
-            
-            if response.status_code == 200:
-                calendar_data = response.json()
-                events = []
-                
-                for item in calendar_data.get('items', []):
-                    try:
-                        event = self._parse_google_calendar_event(item)
-                        if event:
-                            events.append(event)
-                    except Exception as e:
-                        logger.error("Error parsing calendar event", 
-                                   event_id=item.get('id'), error=str(e))
-                
-                logger.info("Successfully fetched calendar events", 
-                           count=len(events))
-                return events
-            
-            elif response.status_code == 401:
-                logger.error("Calendar API authentication failed - token may be expired")
-                return []
-            else:
-                logger.error("Calendar API request failed", 
-                           status_code=response.status_code,
-                           response=response.text)
+
+            if response.status_code != 200:
+                logger.error("Calendar list request failed", status_code=response.status_code)
                 return []
-                
+
+            self._calendars = list(iter_json_items(response))
+            logger.info("Fetched calendar list", count=len(self._calendars))
+            return self._calendars
+
         except requests.RequestException as e:
             logger.error("HTTP request to Calendar API failed", error=str(e))
             return []
-        except Exception as e:
-            logger.error("Error fetching calendar events", error=str(e))
+
+    def selected_calendar_ids(self) -> List[str]:
+        """默认读取的日历：配置的 google_calendar_ids，否则为勾选显示的日历（主日历在前）"""
+
+        if self.config.google_calendar_ids:
+            return list(self.config.google_calendar_ids)
+
+        calendars = [c for c in self.get_calendar_list() if c.get('primary') or c.get('selected')]
+        calendars.sort(key=lambda c: not c.get('primary'))
+        return [c['id'] for c in calendars] or ['primary']
+
+    @metered("fetch_calendar_events")
+    def _fetch_calendar_events(self, days_ahead: int, fields: Optional[str] = None,
+                               calendar_ids: Optional[List[str]] = None) -> List[CalendarEvent]:
+        """从Google Calendar获取事件数据
+
+        各日历并发读取，再把每个日历已排序的结果归并为一条按开始时间排序的时间线。
+
+        Args:
+            days_ahead: 未来天数
+            fields: 字段掩码，默认 EVENT_FIELDS（完整转换所需字段）；
+                启用增量同步时快照总是包含完整字段，忽略此参数
+            calendar_ids: 要读取的日历，默认 selected_calendar_ids()
+        """
+
+        # 检查认证状态
+        token = self.google_auth.get_google_token(self.account_alias)
+        if not token or token.is_expired:
+            logger.warning("No valid token for Google Calendar API")
             return []
-    
+
+        # 计算时间范围（UTC）
+        # 时间窗口对齐到5分钟，使相同查询可命中响应缓存
+        now = datetime.now(timezone.utc)
+        time_min = now.replace(minute=now.minute - now.minute % 5, second=0, microsecond=0)
+        time_max = time_min + timedelta(days=days_ahead)
+
+        headers = {
+            'Authorization': token.authorization_header,
+            'Accept': 'application/json'
+        }
+
+        calendar_ids = calendar_ids or self.selected_calendar_ids()
+        # 多个日历时需要日历名区分事件来源（日历列表已缓存）
+        calendars = self.get_calendar_list() if len(calendar_ids) > 1 else self._calendars or []
+        names = {c['id']: c.get('summary') for c in calendars}
+        names.update({'primary': c.get('summary') for c in calendars if c.get('primary')})
+
+        logger.info("Fetching calendar events from Google API",
+                   days_ahead=days_ahead,
+                   calendars=len(calendar_ids),
+                   time_range=f"{_rfc3339(time_min)} to {_rfc3339(time_max)}")
+
+        def fetch(calendar_id: str) -> List[CalendarEvent]:
+            events = self._fetch_one_calendar(calendar_id, headers, time_min, time_max, fields)
+            for event in events:
+                event.calendar_id = calendar_id
+                event.calendar_name = names.get(calendar_id) or calendar_id
+            return events
+
+        results = fan_out(calendar_ids, fetch)
+        events = [event for _, event in merge_sorted(results, key=lambda e: e.start_time)]
+
+        logger.info("Successfully fetched calendar events",
+                   count=len(events),
+                   failed_calendars=sum(1 for r in results if r.error))
+        return events
+
+    def _fetch_one_calendar(self, calendar_id: str, headers: Dict[str, str],
+                            time_min: datetime, time_max: datetime,
+                            fields: Optional[str]) -> List[CalendarEvent]:
+        """读取单个日历在时间窗口内的事件，按开始时间排序"""
+
+        if self.calendar_sync is not None:
+            items = self._sync_calendar(calendar_id, headers, time_min, time_max)
+        else:
+            items = self._list_calendar_window(calendar_id, headers, time_min, time_max, fields)
+
+        events = []
+        with span("parse calendar events", "parse") as current:
+            for item in items:
+                event = self._parse_google_calendar_event(item)
+                if event and event.end_time > time_min and event.start_time < time_max:
+                    events.append(event)
+            current.set(count=len(events))
+
+        events.sort(key=lambda e: e.start_time)
+        return events
+
+    def _events_url(self, calendar_id: str) -> str:
+        return f'{self.api_base_url}/calendar/v3/calendars/{quote(calendar_id, safe="")}/events'
+
+    def _list_calendar_window(self, calendar_id: str, headers: Dict[str, str],
+                              time_min: datetime, time_max: datetime,
+                              fields: Optional[str]) -> Iterator[Dict[str, Any]]:
+        """按时间窗口直接列出事件（未启用增量同步时），逐页读取"""
+
+        params = {
+            'timeMin': _rfc3339(time_min),
+            'timeMax': _rfc3339(time_max),
+            'singleEvents': True,
+            'orderBy': 'startTime',
+            'maxResults': 2500,
+            'fields': fields or self.EVENT_FIELDS
+        }
+
+        while True:
+            try:
+                response = self.http_cache.get(
+                    self._events_url(calendar_id),
+                    endpoint='calendar.events',
+                    headers=headers,
+                    params=params,
+                    account=self._cache_account(),
+                    timeout=30,
+                    stream=True
+                )
+            except requests.RequestException as e:
+                logger.error("HTTP request to Calendar API failed", calendar_id=calendar_id, error=str(e))
+                return
+
+            if response.status_code != 200:
+                if response.status_code == 401:
+                    logger.error("Calendar API authentication failed - token may be expired")
+                else:
+                    logger.error("Calendar API request failed",
+                               calendar_id=calendar_id,
+                               status_code=response.status_code,
+                               response=response.text)
+                return
+
+            # 逐条解码，无需先把整个响应解析成对象
+            page: Dict[str, Any] = {}
+            yield from iter_json_items(response, page=page)
+            if not page.get('nextPageToken'):
+                return
+            params['pageToken'] = page['nextPageToken']
+
+    def _sync_calendar(self, calendar_id: str, headers: Dict[str, str],
+                       time_min: datetime, time_max: datetime) -> Iterable[Dict[str, Any]]:
+        """通过 syncToken 增量同步单个日历，返回快照中的事件
+
+        快照覆盖请求窗口时只拉取上次同步之后的变更；令牌失效（410）或窗口
+        不够时全量同步。增量请求失败时退回到已有快照。
+        """
+
+        account = self._cache_account()
+        state = self.calendar_sync.load(account, calendar_id)
+
+        if state is not None and state.sync_token and \
+                state.covers(time_min, time_max, self.SYNC_WINDOW_MAX_AGE):
+            if time.time() - state.synced_at < self.SYNC_FRESH_SECONDS:
+                return state.events.values()
+            try:
+                if self._read_event_pages(calendar_id, headers, {'syncToken': state.sync_token}, state):
+                    self.calendar_sync.save(account, state)
+                    return state.events.values()
+                logger.info("Calendar sync token expired, running full sync", calendar_id=calendar_id)
+            except requests.RequestException as e:
+                logger.warning("Incremental calendar sync failed, using snapshot",
+                               calendar_id=calendar_id, error=str(e))
+                return state.events.values()
+
+        # 全量同步：从当天 0 点（UTC）开始，至少覆盖 SYNC_WINDOW_DAYS 天
+        window_start = time_min.replace(hour=0, minute=0)
+        window_end = max(time_max, window_start + timedelta(days=self.SYNC_WINDOW_DAYS))
+        state = CalendarSyncState(
+            calendar_id=calendar_id,
+            sync_token='',
+            window_start=_rfc3339(window_start),
+            window_end=_rfc3339(window_end)
+        )
+        params = {'timeMin': state.window_start, 'timeMax': state.window_end}
+        if not self._read_event_pages(calendar_id, headers, params, state):
+            raise requests.HTTPError(f"Full sync of calendar {calendar_id} returned 410")
+        self.calendar_sync.save(account, state)
+        logger.info("Calendar fully synced", calendar_id=calendar_id, events=len(state.events))
+        return state.events.values()
+
+    def _read_event_pages(self, calendar_id: str, headers: Dict[str, str],
+                          params: Dict[str, Any], state: CalendarSyncState) -> bool:
+        """读取所有分页并应用到快照，最后一页的 nextSyncToken 写入 state
+
+        Returns:
+            False 表示 syncToken 已失效（HTTP 410），需要全量同步
+
+        Raises:
+            requests.RequestException: 网络错误或其他非 200 响应
+        """
+
+        params = dict(params, singleEvents=True, maxResults=2500, fields=self.SYNC_FIELDS)
+        while True:
+            response = self.api_client.get(self._events_url(calendar_id), headers=headers,
+                                           params=params, timeout=30, stream=True)
+            if response.status_code == 410:
+                response.close()
+                return False
+            response.raise_for_status()
+
+            # 边解码边应用；分页与同步令牌在整页读完后可用
+            page: Dict[str, Any] = {}
+            with span("parse calendar sync page", "parse"):
+                changed = state.apply(iter_json_items(response, page=page))
+            logger.debug("Applied calendar sync page", calendar_id=calendar_id, changed=changed)
+
+            page_token = page.get('nextPageToken')
+            if not page_token:
+                state.sync_token = page.get('nextSyncToken', '')
+                state.synced_at = time.time()
+                return True
+            params['pageToken'] = page_token
+
+    def _cache_account(self) -> str:
+        """Account alias used to partition the HTTP response cache"""
+        return self.account_alias or self.google_auth.account_manager.get_default_account()
+
     def _parse_google_calendar_event(self, event_data: Dict[str, Any]) -> Optional[CalendarEvent]:
         """解析Google Calendar API返回的事件数据"""
         
@@ -413,20 +577,20 @@ class GoogleCalendarIntegration:
             # 解析开始时间
             start_info = event_data.get('start', {})
             if 'dateTime' in start_info:
-                start_time = datetime.fromisoformat(start_info['dateTime'].replace('Z', '+00:00'))
+                start_time = parse_rfc3339(start_info['dateTime'])
             elif 'date' in start_info:
                 # 全天事件
-                start_time = datetime.fromisoformat(start_info['date'] + 'T00:00:00+00:00')
+                start_time = parse_date_local(start_info['date'])
             else:
                 return None
             
             # 解析结束时间
             end_info = event_data.get('end', {})
             if 'dateTime' in end_info:
-                end_time = datetime.fromisoformat(end_info['dateTime'].replace('Z', '+00:00'))
+                end_time = parse_rfc3339(end_info['dateTime'])
             elif 'date' in end_info:
-                # 全天事件
-                end_time = datetime.fromisoformat(end_info['date'] + 'T23:59:59+00:00')
+                # 全天事件，end.date 是结束后的第一天（不含）
+                end_time = parse_date_local(end_info['date'])
             else:
                 end_time = start_time + timedelta(hours=1)  # 默认1小时
             
@@ -443,13 +607,15 @@ class GoogleCalendarIntegration:
                 end_time=end_time,
                 description=description,
                 location=location,
-                attendees=attendees
+                attendees=attendees,
+                all_day='dateTime' not in start_info
             )
             
         except Exception as e:
             logger.error("Error parsing Google Calendar event", error=str(e))
             return None
     
+    @metered("create_calendar_event")
     def create_calendar_event(self, task: Task) -> Tuple[bool, str]:
         """为GTD任务创建Google Calendar事件
         
@@ -460,7 +626,7 @@ class GoogleCalendarIntegration:
             Tuple[是否成功, 消息]
         """
         
-        if not self.google_auth.is_google_authenticated():
+        if not self.google_auth.is_google_authenticated(self.account_alias):
             return False, "未通过Google认证，请先运行: pm auth login google"
         
         if not task.due_date:
@@ -485,21 +651,23 @@ class GoogleCalendarIntegration:
                         task_id=task.id, error=str(e))
             return False, error_msg
     
-    def delete_calendar_event(self, event_id: str) -> Tuple[bool, str]:
+    @metered("delete_calendar_event")
+    def delete_calendar_event(self, event_id: str, calendar_id: str = "primary") -> Tuple[bool, str]:
         """删除Google Calendar事件
         
         Args:
             event_id: Google Calendar事件ID
+            calendar_id: 事件所在日历
             
         Returns:
             Tuple[是否成功, 消息]
         """
         
-        if not self.google_auth.is_google_authenticated():
+        if not self.google_auth.is_google_authenticated(self.account_alias):
             return False, "未通过Google认证，请先运行: pm auth login google"
         
         # 检查认证状态
-        token = self.google_auth.get_google_token()
+        token = self.google_auth.get_google_token(self.account_alias)
         if not token or token.is_expired:
             return False, "Google认证已过期，请重新认证"
         
@@ -510,17 +678,20 @@ class GoogleCalendarIntegration:
                 'Accept': 'application/json'
             }
             
-            delete_url = f'https://www.googleapis.com/calendar/v3/calendars/primary/events/{event_id}'
+            delete_url = f'{self._events_url(calendar_id)}/{event_id}'
             
             logger.info("Deleting calendar event from Google API", event_id=event_id)
             
-            response = requests.delete(
+            response = self.api_client.delete(
                 delete_url,
                 headers=headers,
                 timeout=30
             )
             
             if response.status_code == 204:
+                self.http_cache.invalidate(self._events_url(calendar_id))
+                if self.calendar_sync is not None:
+                    self.calendar_sync.expire(self._cache_account(), calendar_id)
                 logger.info("Successfully deleted calendar event", event_id=event_id)
                 return True, f"已成功删除日程事件 {event_id}"
             elif response.status_code == 404:
@@ -552,12 +723,13 @@ class GoogleCalendarIntegration:
             Tuple[删除数量, 错误信息列表]
         """
         
-        if not self.google_auth.is_google_authenticated():
+        if not self.google_auth.is_google_authenticated(self.account_alias):
             return 0, ["未通过Google认证，请先运行: pm auth login google"]
         
         try:
             # 获取接下来30天的所有事件
-            events = self._fetch_calendar_events(days_ahead=30)
+            events = self._fetch_calendar_events(days_ahead=30, fields=self.EVENT_SUMMARY_FIELDS,
+                                                 calendar_ids=['primary'])
             
             # 找到匹配的事件
             matching_events = []
@@ -573,7 +745,7 @@ class GoogleCalendarIntegration:
             errors = []
             
             for event in matching_events:
-                success, message = self.delete_calendar_event(event.event_id)
+                success, message = self.delete_calendar_event(event.event_id, event.calendar_id)
                 if success:
                     deleted_count += 1
                     logger.info("Deleted calendar event", 
@@ -4,26 +4,35 @@
 """
 
 import json
+import time
 import requests
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 import structlog
 
+from pathlib import Path
+
 from pm.core.config import PMConfig
+from pm.core.metrics import metered, metrics
+from pm.core.profiling import span
+from pm.core.timestamps import parse_rfc3339_column, parse_rfc3339_or_none
 from pm.models.task import Task, TaskStatus, TaskContext, TaskPriority, EnergyLevel
 from .google_auth import GoogleAuthManager
-from enum import Enum
+from .offline_queue import MutationQueue, PendingMutation, remote_changed_since
+from .google_api import GoogleApiClient, decode_json, iter_json_items
+from .http_cache import HttpResponseCache
+from .multi_account import fan_out
+from .task_list_cache import TaskListIdCache
+from .task_list_sync import TaskListSyncState, TaskListSyncStore
+from .classification import Classification, TaskCategory, classify_tasks, split_category_prefix
 from pm.storage.daily_task_tracker import DailyTaskTracker
 from datetime import date
 
 logger = structlog.get_logger()
 
 
-class TaskCategory(Enum):
-    """任务分类枚举"""
-    HABIT = "habit"      # 习惯
-    EVENT = "event"      # 日程/事件
-    TASK = "task"        # 普通任务
+class TaskListReadError(Exception):
+    """任务列表读取失败（未认证、网络或服务端错误），与列表为空区分"""
 
 
 class GoogleTask:
@@ -38,7 +47,9 @@ class GoogleTask:
                  completed: Optional[datetime] = None,
                  parent: Optional[str] = None,
                  position: Optional[str] = None,
-                 updated: Optional[datetime] = None):
+                 updated: Optional[datetime] = None,
+                 list_id: Optional[str] = None,
+                 list_title: Optional[str] = None):
         self.task_id = task_id
         self.title = title
         self.notes = notes
@@ -48,6 +59,9 @@ class GoogleTask:
         self.parent = parent  # 父任务ID（用于子任务）
         self.position = position
         self.updated = updated
+        # 任务所在列表（多列表视图中设置）
+        self.list_id = list_id
+        self.list_title = list_title or list_id
     
     @property
     def is_completed(self) -> bool:
@@ -63,60 +77,28 @@ class GoogleTask:
 
     def get_task_category(self) -> TaskCategory:
         """识别任务分类（基于前缀）"""
-        title_lower = self.title.lower()
-
-        # 检查习惯前缀
-        habit_prefixes = ['[habit]', '习惯:', 'habit:', '[习惯]']
-        for prefix in habit_prefixes:
-            if title_lower.startswith(prefix.lower()):
-                return TaskCategory.HABIT
-
-        # 检查日程/事件前缀
-        event_prefixes = ['[event]', '日程:', 'event:', '[日程]', '事件:', '[事件]']
-        for prefix in event_prefixes:
-            if title_lower.startswith(prefix.lower()):
-                return TaskCategory.EVENT
-
-        # 检查任务前缀或默认
-        task_prefixes = ['[task]', '任务:', 'task:', '[任务]']
-        for prefix in task_prefixes:
-            if title_lower.startswith(prefix.lower()):
-                return TaskCategory.TASK
-
-        # 默认为普通任务
-        return TaskCategory.TASK
+        return split_category_prefix(self.title)[0]
 
     def get_clean_title(self) -> str:
         """获取去除前缀的标题"""
-        # 定义所有前缀
-        all_prefixes = [
-            '[habit]', '习惯:', 'habit:', '[习惯]',
-            '[event]', '日程:', 'event:', '[日程]', '事件:', '[事件]',
-            '[task]', '任务:', 'task:', '[任务]'
-        ]
-
-        clean_title = self.title
-        title_lower = self.title.lower()
-
-        # 去除前缀
-        for prefix in all_prefixes:
-            if title_lower.startswith(prefix.lower()):
-                clean_title = self.title[len(prefix):].strip()
-                break
-
-        return clean_title
+        return split_category_prefix(self.title)[1]
     
-    def to_gtd_task(self) -> Task:
-        """转换为GTD任务"""
+    def classify(self) -> Classification:
+        """一次性推断分类、上下文、优先级和精力"""
+        return classify_tasks([self])[0]
 
-        # 根据任务内容推断上下文
-        context = self._infer_context()
+    def to_gtd_task(self, classification: Optional[Classification] = None) -> Task:
+        """转换为GTD任务
 
-        # 根据截止时间推断优先级
-        priority = self._infer_priority()
+        Args:
+            classification: 预先批量计算的分类结果（见 classify_tasks）
+        """
+        if classification is None:
+            classification = self.classify()
 
-        # 根据任务复杂度推断所需精力
-        energy = self._infer_energy_level()
+        context = classification.context
+        priority = classification.priority
+        energy = classification.energy
 
         # 转换状态
         if self.is_completed:
@@ -125,10 +107,10 @@ class GoogleTask:
             gtd_status = TaskStatus.NEXT_ACTION
 
         # 获取任务分类
-        category = self.get_task_category()
+        category = classification.category
 
         # 使用清理后的标题，但保留分类信息
-        clean_title = self.get_clean_title()
+        clean_title = classification.clean_title
 
         # 根据分类添加不同的表情前缀
         if category == TaskCategory.HABIT:
@@ -156,71 +138,15 @@ class GoogleTask:
     
     def _infer_context(self) -> TaskContext:
         """根据任务内容推断执行上下文"""
-        
-        title_lower = self.title.lower()
-        notes_lower = (self.notes or "").lower()
-        combined = f"{title_lower} {notes_lower}"
-        
-        # 上下文关键词映射
-        context_keywords = {
-            TaskContext.PHONE: ['打电话', '联系', '通话', 'call', '咨询', '沟通'],
-            TaskContext.COMPUTER: ['编程', '开发', '写代码', '系统', '网站', '程序', '测试', '部署'],
-            TaskContext.MEETING: ['会议', '讨论', 'meeting', '面谈', '汇报', '开会'],
-            TaskContext.FOCUS: ['思考', '规划', '设计', '分析', '研究', '学习', '写作'],
-            TaskContext.OFFICE: ['办公', '文档', '整理', '归档', '报告', '表格'],
-            TaskContext.READING: ['阅读', '学习', '看书', '培训', '教程'],
-            TaskContext.ERRANDS: ['购买', '取', '送', '邮寄', '银行', '医院']
-        }
-        
-        for context, keywords in context_keywords.items():
-            if any(keyword in combined for keyword in keywords):
-                return context
-        
-        # 默认上下文
-        return TaskContext.FOCUS
+        return self.classify().context
     
     def _infer_priority(self) -> TaskPriority:
         """根据截止时间推断优先级"""
-
-        if not self.due:
-            return TaskPriority.MEDIUM
-
-        # 确保时间对象都有时区信息
-        from datetime import timezone
-        now = datetime.now(timezone.utc)
-        if self.due.tzinfo is None:
-            due_date = self.due.replace(tzinfo=timezone.utc)
-        else:
-            due_date = self.due
-
-        time_until_due = (due_date - now).total_seconds()
-        hours_until = time_until_due / 3600
-
-        if hours_until <= 6:
-            return TaskPriority.HIGH
-        elif hours_until <= 48:
-            return TaskPriority.MEDIUM
-        else:
-            return TaskPriority.LOW
+        return self.classify().priority
     
     def _infer_energy_level(self) -> EnergyLevel:
         """根据任务复杂度推断所需精力水平"""
-        
-        # 分析标题和描述的复杂度
-        title_words = len(self.title.split())
-        notes_length = len(self.notes or "")
-        
-        # 包含多个步骤或复杂词汇的任务需要更高精力
-        complex_keywords = ['设计', '分析', '规划', '开发', '创建', '制定', '评估', '研究']
-        has_complex_words = any(word in self.title.lower() or word in (self.notes or "").lower() 
-                               for word in complex_keywords)
-        
-        if has_complex_words or notes_length > 100 or title_words > 8:
-            return EnergyLevel.HIGH
-        elif notes_length > 20 or title_words > 4:
-            return EnergyLevel.MEDIUM
-        else:
-            return EnergyLevel.LOW
+        return self.classify().energy
     
     def _generate_description(self) -> str:
         """生成任务描述"""
@@ -247,49 +173,97 @@ class GoogleTask:
     @classmethod
     def from_api_response(cls, task_data: Dict[str, Any]) -> 'GoogleTask':
         """从Google Tasks API响应创建实例"""
-        
-        # 解析日期字段
-        due_date = None
-        if task_data.get('due'):
-            try:
-                due_date = datetime.fromisoformat(task_data['due'].replace('Z', '+00:00'))
-            except:
-                pass
-        
-        completed_date = None
-        if task_data.get('completed'):
-            try:
-                completed_date = datetime.fromisoformat(task_data['completed'].replace('Z', '+00:00'))
-            except:
-                pass
-        
-        updated_date = None
-        if task_data.get('updated'):
+        return cls._from_api_fields(
+            task_data,
+            due=parse_rfc3339_or_none(task_data.get('due')),
+            completed=parse_rfc3339_or_none(task_data.get('completed')),
+            updated=parse_rfc3339_or_none(task_data.get('updated'))
+        )
+
+    @classmethod
+    def from_api_responses(cls, items: List[Dict[str, Any]]) -> List['GoogleTask']:
+        """批量创建实例，按列解析时间字段（相同时间字符串只解析一次）
+
+        无法解析的条目记录日志后跳过。
+        """
+        dues = parse_rfc3339_column(item.get('due') for item in items)
+        completeds = parse_rfc3339_column(item.get('completed') for item in items)
+        updateds = parse_rfc3339_column(item.get('updated') for item in items)
+
+        tasks = []
+        for task_data, due, completed, updated in zip(items, dues, completeds, updateds):
             try:
-                updated_date = datetime.fromisoformat(task_data['updated'].replace('Z', '+00:00'))
-            except:
-                pass
-        
+                tasks.append(cls._from_api_fields(task_data, due, completed, updated))
+            except Exception as e:
+                logger.error("Error parsing Google task", task_data=task_data, error=str(e))
+        return tasks
+
+    @classmethod
+    def _from_api_fields(cls, task_data: Dict[str, Any], due: Optional[datetime],
+                         completed: Optional[datetime],
+                         updated: Optional[datetime]) -> 'GoogleTask':
         return cls(
             task_id=task_data['id'],
             title=task_data['title'],
             notes=task_data.get('notes'),
             status=task_data.get('status', 'needsAction'),
-            due=due_date,
-            completed=completed_date,
+            due=due,
+            completed=completed,
             parent=task_data.get('parent'),
             position=task_data.get('position'),
-            updated=updated_date
+            updated=updated
         )
 
 
 class GoogleTasksIntegration:
     """Google Tasks集成管理器"""
+
+    # 部分响应字段掩码（fields=），只下载调用方实际用到的字段；任务列表分页读取，需保留 nextPageToken
+    # 转换为GTD任务和 NEXT 同步需要的全部字段
+    TASK_FIELDS = "nextPageToken,items(id,title,notes,status,due,completed,parent,position,updated)"
+    # 仅展示（pm today / pm inbox）时只需标题、状态和截止日期
+    TASK_SUMMARY_FIELDS = "nextPageToken,items(id,title,status,due)"
+    TASK_LIST_FIELDS = "items(id,title,updated)"
+    # 增量同步需要 deleted/hidden 识别移除的任务，快照要满足所有调用方，取完整字段
+    TASK_SYNC_FIELDS = ("nextPageToken,"
+                        "items(id,title,notes,status,due,completed,parent,position,updated,deleted,hidden)")
+    # 距上次同步不足该秒数时直接使用快照（与响应缓存中 tasks.tasks 的 TTL 一致）
+    TASK_SYNC_FRESH_SECONDS = 60
+    # 每隔这么久做一次完整读取，修正增量同步可能的偏差
+    TASK_FULL_SYNC_INTERVAL = 24 * 3600
+    # 流式解码时每攒够这么多条就批量转换一次
+    PARSE_CHUNK_SIZE = 500
     
-    def __init__(self, config: PMConfig):
+    def __init__(self, config: PMConfig, account_alias: Optional[str] = None):
         self.config = config
+        # 使用的Google账号别名，None 表示默认账号
+        self.account_alias = account_alias
         self.google_auth = GoogleAuthManager(config)
+        self.api_base_url = config.google_api_base_url.rstrip('/')
         self.task_tracker = DailyTaskTracker()
+        queue_name = (f"pending_mutations_{account_alias}.json"
+                      if account_alias and account_alias != "default" else "pending_mutations.json")
+        self.mutation_queue = MutationQueue(config.data_dir / queue_name)
+        self.api_client = GoogleApiClient(max_retries=config.google_api_max_retries)
+        self.http_cache = HttpResponseCache(
+            config.data_dir / "http_cache",
+            max_bytes=config.http_cache_max_mb * 1024 * 1024,
+            enabled=config.http_cache_enabled,
+            client=self.api_client
+        )
+        self.task_list_ids = TaskListIdCache(config.data_dir / "task_list_ids.json")
+        # 每个任务列表的 updatedMin 游标与任务快照
+        self.task_sync = (
+            TaskListSyncStore(config.data_dir / "task_sync")
+            if config.task_sync_enabled else None
+        )
+        self._task_lists: Optional[List[Dict[str, Any]]] = None
+
+        if config.api_metrics_enabled:
+            metrics.persist_to(
+                config.data_dir / "api_metrics.json",
+                Path(config.api_metrics_textfile).expanduser() if config.api_metrics_textfile else None
+            )
 
         logger.info("Google Tasks integration initialized")
     
@@ -303,7 +277,7 @@ class GoogleTasksIntegration:
             Tuple[新增任务数, 更新任务数, 错误信息列表]
         """
         
-        if not self.google_auth.is_google_authenticated():
+        if not self.google_auth.is_google_authenticated(self.account_alias):
             return 0, 0, ["未通过Google认证，请先运行: pm auth login google"]
         
         try:
@@ -329,9 +303,11 @@ class GoogleTasksIntegration:
                 if task.source_id and task.source == "google_tasks"
             }
             
-            for google_task in google_tasks:
+            classifications = classify_tasks(google_tasks)
+
+            for google_task, classification in zip(google_tasks, classifications):
                 try:
-                    gtd_task = google_task.to_gtd_task()
+                    gtd_task = google_task.to_gtd_task(classification)
                     
                     if google_task.task_id in existing_by_source_id:
                         # 更新现有任务
@@ -386,6 +362,7 @@ class GoogleTasksIntegration:
             logger.error("Google Tasks sync failed", error=str(e))
             return 0, 0, [error_msg]
     
+    @metered("sync_task_to_google")
     def sync_task_to_google(self, gtd_task: Task, list_id: str = '@default') -> Tuple[bool, str]:
         """将GTD任务同步到Google Tasks
         
@@ -397,11 +374,11 @@ class GoogleTasksIntegration:
             Tuple[是否成功, 消息]
         """
         
-        if not self.google_auth.is_google_authenticated():
+        if not self.google_auth.is_google_authenticated(self.account_alias):
             return False, "未通过Google认证，请先运行: pm auth login google"
         
         # 检查认证状态
-        token = self.google_auth.get_google_token()
+        token = self.google_auth.get_google_token(self.account_alias)
         if not token or token.is_expired:
             return False, "Google认证已过期，请重新认证"
         
@@ -418,7 +395,7 @@ class GoogleTasksIntegration:
                 task_data['due'] = gtd_task.due_date.isoformat()
             
             # Google Tasks API URL
-            api_url = f'https://www.googleapis.com/tasks/v1/lists/{list_id}/tasks'
+            api_url = f'{self.api_base_url}/tasks/v1/lists/{list_id}/tasks'
             
             headers = {
                 'Authorization': token.authorization_header,
@@ -431,7 +408,7 @@ class GoogleTasksIntegration:
                        list_id=list_id,
                        task_data=task_data)
             
-            response = requests.post(
+            response = self.api_client.post(
                 api_url,
                 headers=headers,
                 json=task_data,
@@ -439,9 +416,11 @@ class GoogleTasksIntegration:
             )
             
             if response.status_code == 200:
-                created_task = response.json()
+                created_task = decode_json(response)
                 google_task_id = created_task.get('id')
                 
+                self._invalidate_list_cache(list_id)
+
                 # 更新GTD任务的source信息
                 gtd_task.source = "google_tasks"
                 gtd_task.source_id = google_task_id
@@ -471,21 +450,22 @@ class GoogleTasksIntegration:
                         task_id=gtd_task.id, error=str(e))
             return False, error_msg
     
+    @metered("get_google_tasks_lists")
     def get_google_tasks_lists(self) -> List[Dict[str, Any]]:
         """获取Google Tasks列表"""
         
-        if not self.google_auth.is_google_authenticated():
+        if not self.google_auth.is_google_authenticated(self.account_alias):
             return []
         
         # 检查认证状态
-        token = self.google_auth.get_google_token()
+        token = self.google_auth.get_google_token(self.account_alias)
         if not token or token.is_expired:
             logger.warning("No valid token for Google Tasks API")
             return []
         
         try:
             # Google Tasks API URL for task lists
-            api_url = 'https://www.googleapis.com/tasks/v1/users/@me/lists'
+            api_url = f'{self.api_base_url}/tasks/v1/users/@me/lists'
             
             headers = {
                 'Authorization': token.authorization_header,
@@ -494,20 +474,23 @@ class GoogleTasksIntegration:
             
             # API参数
             params = {
-                'maxResults': 100
+                'maxResults': 100,
+                'fields': self.TASK_LIST_FIELDS
             }
             
             logger.info("Fetching Google Tasks lists from API")
             
-            response = requests.get(
+            response = self.http_cache.get(
                 api_url,
+                endpoint='tasks.lists',
                 headers=headers,
                 params=params,
+                account=self._cache_account(),
                 timeout=30
             )
             
             if response.status_code == 200:
-                lists_data = response.json()
+                lists_data = decode_json(response)
                 task_lists = []
                 
                 for list_data in lists_data.get('items', []):
@@ -520,6 +503,7 @@ class GoogleTasksIntegration:
                 
                 logger.info("Successfully fetched Google Tasks lists", 
                            count=len(task_lists))
+                self._task_lists = task_lists
                 return task_lists
             
             elif response.status_code == 401:
@@ -538,86 +522,256 @@ class GoogleTasksIntegration:
             logger.error("Error fetching Google Tasks lists", error=str(e))
             return []
     
-    def _fetch_google_tasks(self, list_id: str = '@default') -> List[GoogleTask]:
-        """从Google Tasks API获取任务数据"""
+    @metered("fetch_google_tasks")
+    def _fetch_google_tasks(self, list_id: str = '@default', fields: Optional[str] = None,
+                            strict: bool = False) -> List[GoogleTask]:
+        """从Google Tasks API获取任务数据
+
+        Args:
+            list_id: 任务列表ID
+            fields: 字段掩码，默认 TASK_FIELDS（完整转换所需字段）；
+                启用增量同步时快照总是以完整字段下载，掩码只用于裁剪
+                快照中的任务，不减少下载量
+            strict: 读取失败时抛出 TaskListReadError，而不是返回空列表
+
+        Raises:
+            TaskListReadError: strict 为 True 且读取失败（列表不存在仍返回空列表）
+        """
         
         # 检查认证状态
-        token = self.google_auth.get_google_token()
+        token = self.google_auth.get_google_token(self.account_alias)
         if not token or token.is_expired:
             logger.warning("No valid token for Google Tasks API")
-            return []
+            return self._read_failed(strict, "Google认证已过期或未认证")
         
         try:
             # Google Tasks API URL
-            api_url = f'https://www.googleapis.com/tasks/v1/lists/{list_id}/tasks'
+            api_url = f'{self.api_base_url}/tasks/v1/lists/{list_id}/tasks'
             
             headers = {
                 'Authorization': token.authorization_header,
                 'Accept': 'application/json'
             }
+
+            if self.task_sync is not None:
+                items = self._sync_task_list(list_id, headers)
+                if fields:
+                    items = self._mask_items(items, fields)
+                with span("parse Google tasks", "parse") as current:
+                    google_tasks = GoogleTask.from_api_responses(items)
+                    current.set(count=len(google_tasks))
+                logger.info("Successfully fetched Google tasks",
+                           list_id=list_id, count=len(google_tasks))
+                return google_tasks
             
             # API参数
             params = {
-                'maxResults': 100,  # 最多获取100个任务
+                'maxResults': 100,  # 每页最多100个任务，其余按 nextPageToken 分页读取
                 'showCompleted': True,  # 包含已完成的任务
                 'showDeleted': False,
-                'showHidden': False
+                'showHidden': False,
+                'fields': fields or self.TASK_FIELDS
             }
             
             logger.info("Fetching Google tasks from API", 
                        list_id=list_id, 
                        api_url=api_url)
             
-            response = requests.get(
-                api_url,
-                headers=headers,
-                params=params,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                tasks_data = response.json()
-                google_tasks = []
-                
-                for task_data in tasks_data.get('items', []):
-                    try:
-                        google_task = GoogleTask.from_api_response(task_data)
-                        google_tasks.append(google_task)
-                    except Exception as e:
-                        logger.error("Error parsing Google task", 
-                                   task_data=task_data, error=str(e))
-                
-                logger.info("Successfully fetched Google tasks", 
-                           count=len(google_tasks))
-                return google_tasks
-            
-            elif response.status_code == 401:
+            google_tasks = []
+            while True:
+                response = self.http_cache.get(
+                    api_url,
+                    endpoint='tasks.tasks',
+                    headers=headers,
+                    params=params,
+                    account=self._cache_account(),
+                    timeout=30,
+                    stream=True
+                )
+                if response.status_code != 200:
+                    break
+
+                # 边解码边分块转换，无需先把整个响应解析成对象
+                page: Dict[str, Any] = {}
+                with span("parse Google tasks", "parse") as current:
+                    chunk = []
+                    for task_data in iter_json_items(response, page=page):
+                        chunk.append(task_data)
+                        if len(chunk) == self.PARSE_CHUNK_SIZE:
+                            google_tasks.extend(GoogleTask.from_api_responses(chunk))
+                            chunk = []
+                    google_tasks.extend(GoogleTask.from_api_responses(chunk))
+                    current.set(count=len(google_tasks))
+
+                if not page.get('nextPageToken'):
+                    logger.info("Successfully fetched Google tasks",
+                               count=len(google_tasks))
+                    return google_tasks
+                params['pageToken'] = page['nextPageToken']
+
+            if response.status_code == 401:
                 logger.error("Google Tasks API authentication failed - token may be expired")
-                return []
+                return self._read_failed(strict, "Google认证失败")
             elif response.status_code == 404:
                 logger.warning("Google Tasks list not found", list_id=list_id)
+                self.task_list_ids.invalidate_id(self._cache_account(), list_id)
                 return []
             else:
                 logger.error("Google Tasks API request failed", 
                            status_code=response.status_code,
                            response=response.text)
-                return []
+                return self._read_failed(strict, f"HTTP {response.status_code}")
                 
         except requests.RequestException as e:
             logger.error("HTTP request to Google Tasks API failed", error=str(e))
-            return []
+            return self._read_failed(strict, f"网络请求失败: {str(e)}")
         except Exception as e:
             logger.error("Error fetching Google tasks", error=str(e))
-            return []
+            return self._read_failed(strict, str(e))
+
+    @staticmethod
+    def _read_failed(strict: bool, reason: str) -> List[GoogleTask]:
+        """读取失败：strict 时抛出 TaskListReadError，否则按空列表处理"""
+        if strict:
+            raise TaskListReadError(reason)
+        return []
     
+    @staticmethod
+    def _mask_items(items: List[Dict[str, Any]], fields: str) -> List[Dict[str, Any]]:
+        """按 "items(...)" 字段掩码裁剪快照中的任务，与未启用同步时的响应一致"""
+        start = fields.find('items(')
+        if start < 0:
+            return items
+        keys = fields[start + len('items('):fields.index(')', start)].split(',')
+        return [{key: item[key] for key in keys if key in item} for item in items]
+
+    def _sync_task_list(self, list_id: str, headers: Dict[str, str]) -> List[Dict[str, Any]]:
+        """通过 updatedMin 游标增量同步单个列表，返回快照中的任务
+
+        快照较新时直接返回；否则只拉取游标之后修改过的任务。没有快照或距
+        上次完整读取超过 TASK_FULL_SYNC_INTERVAL 时完整读取。增量请求失败时
+        退回到已有快照。
+        """
+
+        account = self._cache_account()
+        state = self.task_sync.load(account, list_id)
+
+        if state is not None and state.cursor and \
+                time.time() - state.full_synced_at < self.TASK_FULL_SYNC_INTERVAL:
+            if self.task_sync.is_fresh(account, state, self.TASK_SYNC_FRESH_SECONDS):
+                return list(state.tasks.values())
+            params = {'updatedMin': state.cursor, 'showDeleted': True, 'showHidden': True}
+            try:
+                found = self._read_task_pages(list_id, headers, params, state)
+            except requests.RequestException as e:
+                logger.warning("Incremental task sync failed, using snapshot",
+                               list_id=list_id, error=str(e))
+                return list(state.tasks.values())
+            if found:
+                self.task_sync.save(account, state)
+                return list(state.tasks.values())
+        else:
+            state = TaskListSyncState(list_id=list_id)
+            if self._read_task_pages(list_id, headers, {'showDeleted': False, 'showHidden': False}, state):
+                state.full_synced_at = state.synced_at
+                self.task_sync.save(account, state)
+                logger.info("Task list fully synced", list_id=list_id, tasks=len(state.tasks))
+                return list(state.tasks.values())
+
+        logger.warning("Google Tasks list not found", list_id=list_id)
+        self.task_list_ids.invalidate_id(account, list_id)
+        self.task_sync.drop(account, list_id)
+        return []
+
+    def _read_task_pages(self, list_id: str, headers: Dict[str, str],
+                         params: Dict[str, Any], state: TaskListSyncState) -> bool:
+        """读取所有分页并应用到快照
+
+        Returns:
+            False 表示列表不存在（HTTP 404）
+
+        Raises:
+            requests.RequestException: 网络错误或其他非 200 响应
+        """
+
+        url = f'{self.api_base_url}/tasks/v1/lists/{list_id}/tasks'
+        params = dict(params, showCompleted=True, maxResults=100, fields=self.TASK_SYNC_FIELDS)
+        while True:
+            response = self.api_client.get(url, headers=headers, params=params, timeout=30, stream=True)
+            if response.status_code == 404:
+                response.close()
+                return False
+            response.raise_for_status()
+
+            # 边解码边应用；nextPageToken 在整页读完后可用
+            page: Dict[str, Any] = {}
+            with span("parse task sync page", "parse"):
+                changed = state.apply(iter_json_items(response, page=page))
+            logger.debug("Applied task sync page", list_id=list_id, changed=changed)
+
+            page_token = page.get('nextPageToken')
+            if not page_token:
+                state.synced_at = time.time()
+                return True
+            params['pageToken'] = page_token
+
+    def selected_task_list_ids(self) -> List[str]:
+        """默认读取的任务列表：配置的 google_task_list_ids，否则为全部列表"""
+
+        if self.config.google_task_list_ids:
+            return list(self.config.google_task_list_ids)
+        lists = self._task_lists if self._task_lists is not None else self.get_google_tasks_lists()
+        return [task_list['id'] for task_list in lists if task_list.get('id')] or ['@default']
+
+    def fetch_tasks_from_lists(self, list_ids: Optional[List[str]] = None,
+                               fields: Optional[str] = None) -> List[GoogleTask]:
+        """并发读取多个任务列表，按列表顺序合并并按任务ID去重
+
+        Args:
+            list_ids: 要读取的列表，默认 selected_task_list_ids()
+            fields: 字段掩码，同 _fetch_google_tasks
+
+        Returns:
+            带 list_id / list_title 的任务
+        """
+
+        list_ids = list_ids or self.selected_task_list_ids()
+        # 多个列表时需要列表名区分任务来源（列表清单已缓存）
+        lists = self._task_lists
+        if lists is None:
+            lists = self.get_google_tasks_lists() if len(list_ids) > 1 else []
+        titles = {task_list['id']: task_list.get('title') for task_list in lists}
+
+        def fetch(list_id: str) -> List[GoogleTask]:
+            tasks = self._fetch_google_tasks(list_id, fields=fields)
+            for task in tasks:
+                task.list_id = list_id
+                task.list_title = titles.get(list_id) or list_id
+            return tasks
+
+        merged = []
+        seen = set()
+        for result in fan_out(list_ids, fetch):
+            for task in result.items:
+                if task.task_id not in seen:
+                    seen.add(task.task_id)
+                    merged.append(task)
+        return merged
+
+    @metered("mark_google_task_completed")
     def mark_google_task_completed(self, task_id: str, list_id: str = '@default') -> Tuple[bool, str]:
         """标记Google Tasks中的任务为已完成"""
-        
-        if not self.google_auth.is_google_authenticated():
+
+        # 尚未推送到Google的本地任务，直接合并到离线队列
+        if task_id.startswith("local_"):
+            self.mutation_queue.enqueue_patch(list_id, task_id, {'status': 'completed'})
+            return True, f"任务 {task_id[:14]} 已标记完成（离线队列）"
+
+        if not self.google_auth.is_google_authenticated(self.account_alias):
             return False, "未通过Google认证"
         
         # 检查认证状态
-        token = self.google_auth.get_google_token()
+        token = self.google_auth.get_google_token(self.account_alias)
         if not token or token.is_expired:
             return False, "Google认证已过期，请重新认证"
         
@@ -628,7 +782,7 @@ class GoogleTasksIntegration:
             }
             
             # Google Tasks API URL for updating task
-            api_url = f'https://www.googleapis.com/tasks/v1/lists/{list_id}/tasks/{task_id}'
+            api_url = f'{self.api_base_url}/tasks/v1/lists/{list_id}/tasks/{task_id}'
             
             headers = {
                 'Authorization': token.authorization_header,
@@ -640,7 +794,7 @@ class GoogleTasksIntegration:
                        task_id=task_id,
                        list_id=list_id)
             
-            response = requests.patch(
+            response = self.api_client.patch(
                 api_url,
                 headers=headers,
                 json=task_data,
@@ -648,6 +802,7 @@ class GoogleTasksIntegration:
             )
             
             if response.status_code == 200:
+                self._invalidate_list_cache(list_id)
                 logger.info("Successfully marked Google task as completed", 
                            task_id=task_id)
                 return True, f"已标记Google任务 {task_id[:8]} 为完成"
@@ -663,7 +818,12 @@ class GoogleTasksIntegration:
                            status_code=response.status_code,
                            response=response.text)
                 return False, f"更新Google任务失败 (HTTP {response.status_code})"
-                
+
+        except (requests.ConnectionError, requests.Timeout) as e:
+            logger.warning("Google Tasks unreachable, queueing completion",
+                          task_id=task_id, error=str(e))
+            self.mutation_queue.enqueue_patch(list_id, task_id, {'status': 'completed'})
+            return True, f"网络不可用，已将任务 {task_id[:8]} 的完成状态加入离线队列"
         except requests.RequestException as e:
             error_msg = f"网络请求失败: {str(e)}"
             logger.error("HTTP request to Google Tasks API failed", error=str(e))
@@ -674,33 +834,40 @@ class GoogleTasksIntegration:
                         task_id=task_id, error=str(e))
             return False, error_msg
 
-    def delete_google_task(self, task_id: str) -> bool:
+    @metered("delete_google_task")
+    def delete_google_task(self, task_id: str, list_id: str = '@default') -> bool:
         """从Google Tasks删除任务
 
         Args:
             task_id: Google Task ID
+            list_id: 任务所在列表ID
 
         Returns:
             是否成功删除
         """
+        if task_id.startswith("local_"):
+            self.mutation_queue.enqueue_delete(list_id, task_id)
+            return True
+
         try:
-            if not self.google_auth.is_google_authenticated():
+            if not self.google_auth.is_google_authenticated(self.account_alias):
                 logger.warning("Google未认证，无法删除任务")
                 return False
 
-            token = self.google_auth.get_google_token()
+            token = self.google_auth.get_google_token(self.account_alias)
             if not token:
                 return False
 
             # 删除任务
-            api_url = f'https://www.googleapis.com/tasks/v1/lists/@default/tasks/{task_id}'
+            api_url = f'{self.api_base_url}/tasks/v1/lists/{list_id}/tasks/{task_id}'
             headers = {
                 'Authorization': token.authorization_header,
             }
 
-            response = requests.delete(api_url, headers=headers)
+            response = self.api_client.delete(api_url, headers=headers)
 
             if response.status_code == 204:  # No content - 删除成功
+                self._invalidate_list_cache(list_id)
                 logger.info("Successfully deleted Google task", task_id=task_id)
                 return True
             else:
@@ -710,10 +877,16 @@ class GoogleTasksIntegration:
                            response=response.text if response.text else "No response")
                 return False
 
+        except (requests.ConnectionError, requests.Timeout) as e:
+            logger.warning("Google Tasks unreachable, queueing deletion",
+                          task_id=task_id, error=str(e))
+            self.mutation_queue.enqueue_delete(list_id, task_id)
+            return True
         except Exception as e:
             logger.error("Error deleting Google task", task_id=task_id, error=str(e))
             return False
 
+    @metered("create_task_list")
     def create_task_list(self, title: str) -> Optional[str]:
         """Create a new task list in Google Tasks
 
@@ -723,17 +896,17 @@ class GoogleTasksIntegration:
         Returns:
             list_id if created successfully, None otherwise
         """
-        if not self.google_auth.is_google_authenticated():
+        if not self.google_auth.is_google_authenticated(self.account_alias):
             logger.warning("Google未认证，无法创建任务列表")
             return None
 
-        token = self.google_auth.get_google_token()
+        token = self.google_auth.get_google_token(self.account_alias)
         if not token or token.is_expired:
             logger.warning("No valid token for creating task list")
             return None
 
         try:
-            api_url = 'https://www.googleapis.com/tasks/v1/users/@me/lists'
+            api_url = f'{self.api_base_url}/tasks/v1/users/@me/lists'
 
             headers = {
                 'Authorization': token.authorization_header,
@@ -745,7 +918,7 @@ class GoogleTasksIntegration:
 
             logger.info("Creating Google Tasks list", title=title)
 
-            response = requests.post(
+            response = self.api_client.post(
                 api_url,
                 headers=headers,
                 json=task_list_data,
@@ -753,8 +926,9 @@ class GoogleTasksIntegration:
             )
 
             if response.status_code == 200:
-                created_list = response.json()
+                created_list = decode_json(response)
                 list_id = created_list.get('id')
+                self.http_cache.invalidate(api_url)
                 logger.info("Successfully created Google Tasks list",
                            title=title, list_id=list_id)
                 return list_id
@@ -784,15 +958,50 @@ class GoogleTasksIntegration:
             list_id if found or created, None otherwise
         """
         # First try to find existing list
+        list_id = self.resolve_task_list_id(title)
+        if list_id:
+            return list_id
+
+        # Create new list if not found
+        list_id = self.create_task_list(title)
+        if list_id:
+            self.task_list_ids.put(self._cache_account(), title, list_id)
+        return list_id
+
+    def resolve_task_list_id(self, title: str) -> Optional[str]:
+        """Resolve a task list id by title, memoized per account
+
+        The cached id is trusted until a list operation returns 404, which
+        invalidates it; only then is the task list listing fetched again.
+
+        Args:
+            title: Name of the task list (case insensitive)
+
+        Returns:
+            list_id if the list exists, None otherwise
+        """
+        account = self._cache_account()
+        list_id = self.task_list_ids.get(account, title)
+        if list_id:
+            logger.debug("Resolved task list id from cache", title=title, list_id=list_id)
+            return list_id
+
         existing_lists = self.get_google_tasks_lists()
+        if existing_lists:
+            self.task_list_ids.update(account, existing_lists)
+
         for task_list in existing_lists:
-            if task_list.get('title', '').lower() == title.lower():
+            if (task_list.get('title') or '').lower() == title.lower():
                 logger.info("Found existing task list", title=title, list_id=task_list['id'])
                 return task_list['id']
 
-        # Create new list if not found
-        return self.create_task_list(title)
+        return None
 
+    def is_task_list_id_valid(self, list_id: str) -> bool:
+        """Whether a list id is still known (not invalidated by a 404)"""
+        return self.task_list_ids.contains_id(self._cache_account(), list_id)
+
+    @metered("create_task")
     def create_task(
         self,
         list_id: str,
@@ -811,15 +1020,15 @@ class GoogleTasksIntegration:
         Returns:
             Tuple[success, message or task_id]
         """
-        if not self.google_auth.is_google_authenticated():
+        if not self.google_auth.is_google_authenticated(self.account_alias):
             return False, "未通过Google认证，请先运行: pm sync"
 
-        token = self.google_auth.get_google_token()
+        token = self.google_auth.get_google_token(self.account_alias)
         if not token or token.is_expired:
             return False, "Google认证已过期，请重新认证"
 
         try:
-            api_url = f'https://www.googleapis.com/tasks/v1/lists/{list_id}/tasks'
+            api_url = f'{self.api_base_url}/tasks/v1/lists/{list_id}/tasks'
 
             headers = {
                 'Authorization': token.authorization_header,
@@ -839,7 +1048,7 @@ class GoogleTasksIntegration:
             logger.info("Creating task in Google Tasks",
                        list_id=list_id, title=title)
 
-            response = requests.post(
+            response = self.api_client.post(
                 api_url,
                 headers=headers,
                 json=task_data,
@@ -847,20 +1056,30 @@ class GoogleTasksIntegration:
             )
 
             if response.status_code == 200:
-                created_task = response.json()
+                created_task = decode_json(response)
                 task_id = created_task.get('id')
+                self._invalidate_list_cache(list_id)
                 logger.info("Successfully created Google task",
                            title=title, task_id=task_id)
                 return True, task_id
             elif response.status_code == 401:
                 logger.error("Google Tasks API authentication failed")
                 return False, "Google认证失败，请重新登录"
+            elif response.status_code == 404:
+                logger.warning("Google Tasks list not found", list_id=list_id)
+                self.task_list_ids.invalidate_id(self._cache_account(), list_id)
+                return False, "任务列表不存在 (HTTP 404)"
             else:
                 logger.error("Failed to create Google task",
                            status_code=response.status_code,
                            response=response.text)
                 return False, f"创建任务失败 (HTTP {response.status_code})"
 
+        except (requests.ConnectionError, requests.Timeout) as e:
+            logger.warning("Google Tasks unreachable, queueing task creation",
+                          list_id=list_id, title=title, error=str(e))
+            local_id = self.mutation_queue.enqueue_create(list_id, task_data)
+            return True, local_id
         except requests.RequestException as e:
             error_msg = f"网络请求失败: {str(e)}"
             logger.error("HTTP request failed when creating task", error=str(e))
@@ -882,13 +1101,163 @@ class GoogleTasksIntegration:
         all_tasks = self._fetch_google_tasks(list_id)
         return [t for t in all_tasks if t.is_completed]
 
-    def get_tasks_from_list(self, list_id: str) -> List[GoogleTask]:
+    def get_tasks_from_list(self, list_id: str, strict: bool = False) -> List[GoogleTask]:
         """Get all tasks from a specific list
 
         Args:
             list_id: The task list ID
+            strict: Raise instead of returning [] when the list cannot be read
 
         Returns:
             List of GoogleTask objects
+
+        Raises:
+            TaskListReadError: `strict` is set and the read failed
+        """
+        return self._fetch_google_tasks(list_id, strict=strict)
+
+    def _cache_account(self) -> str:
+        """Account alias used to partition the HTTP response cache"""
+        return self.account_alias or self.google_auth.account_manager.get_default_account()
+
+    def _invalidate_list_cache(self, list_id: str) -> None:
+        """Drop cached task reads for a list after a local write"""
+        if list_id == '@default':
+            # Reads are cached under the real list ids (fetch_tasks_from_lists),
+            # and which of them @default stands for is not known locally
+            self.http_cache.invalidate(f'{self.api_base_url}/tasks/v1/lists/')
+        else:
+            self.http_cache.invalidate(f'{self.api_base_url}/tasks/v1/lists/{list_id}/tasks')
+        if self.task_sync is not None:
+            self.task_sync.expire_account(self._cache_account())
+
+    @metered("flush_pending_mutations")
+    def flush_pending_mutations(self) -> Tuple[int, int, List[str]]:
+        """Replay mutations queued while offline
+
+        Each patch/delete is checked against the remote task first: if the
+        task was updated on Google after the local edit was queued, the
+        remote version wins and the mutation is recorded as a conflict.
+        The fetched ETag is sent as If-Match so a concurrent remote edit
+        between check and write is detected as well.
+
+        Returns:
+            Tuple[applied count, conflict count, error messages]
+        """
+        pending = self.mutation_queue.pending()
+        if not pending:
+            return 0, 0, []
+
+        token = self.google_auth.get_google_token(self.account_alias)
+        if not token or token.is_expired:
+            return 0, 0, ["Google认证已过期，离线操作暂未同步"]
+
+        applied = 0
+        conflicts = 0
+        errors = []
+
+        logger.info("Replaying offline mutations", count=len(pending))
+
+        for op in pending:
+            try:
+                outcome = self._replay_mutation(op, token)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                logger.info("Still offline, keeping remaining mutations",
+                           remaining=len(self.mutation_queue), error=str(e))
+                break
+            except Exception as e:
+                self.mutation_queue.record_attempt(op)
+                errors.append(f"离线操作 {op.kind} {op.task_id[:8]} 失败: {str(e)}")
+                logger.error("Error replaying offline mutation",
+                            kind=op.kind, task_id=op.task_id, error=str(e))
+                continue
+
+            if outcome == "applied":
+                applied += 1
+            elif outcome == "conflict":
+                conflicts += 1
+            elif outcome == "unauthorized":
+                errors.append("Google认证失败，离线操作暂未同步")
+                break
+            else:
+                self.mutation_queue.record_attempt(op)
+                errors.append(f"离线操作 {op.kind} {op.task_id[:8]} 失败: {outcome}")
+
+        logger.info("Offline mutation replay completed",
+                   applied=applied, conflicts=conflicts, errors=len(errors))
+
+        return applied, conflicts, errors
+
+    def _replay_mutation(self, op: PendingMutation, token) -> str:
+        """Replay a single queued mutation
+
+        Returns:
+            "applied", "conflict", "unauthorized" or an error description
         """
-        return self._fetch_google_tasks(list_id)
\ No newline at end of file
+        headers = {
+            'Authorization': token.authorization_header,
+            'Content-Type': 'application/json',
+            'Accept': 'application/json'
+        }
+
+        if op.kind == "create":
+            api_url = f'{self.api_base_url}/tasks/v1/lists/{op.list_id}/tasks'
+            response = self.api_client.post(api_url, headers=headers, json=op.body, timeout=30)
+            if response.status_code == 200:
+                self.mutation_queue.complete(op)
+                self._invalidate_list_cache(op.list_id)
+                logger.info("Replayed offline task creation",
+                           local_id=op.task_id, task_id=decode_json(response).get('id'))
+                return "applied"
+            if response.status_code == 401:
+                return "unauthorized"
+            return f"HTTP {response.status_code}"
+
+        task_url = f'{self.api_base_url}/tasks/v1/lists/{op.list_id}/tasks/{op.task_id}'
+
+        # Conflict detection against the current remote version
+        fields = ",".join(["id", "etag", "updated", *(op.body or {})])
+        response = self.api_client.get(task_url, headers=headers, params={'fields': fields}, timeout=30)
+        if response.status_code == 401:
+            return "unauthorized"
+        if response.status_code == 404:
+            if op.kind == "delete":
+                self.mutation_queue.complete(op)
+                return "applied"
+            self.mutation_queue.record_conflict(op, "remote task deleted")
+            return "conflict"
+        if response.status_code != 200:
+            return f"HTTP {response.status_code}"
+
+        remote = decode_json(response)
+
+        if op.kind == "patch" and all(remote.get(k) == v for k, v in op.body.items()):
+            # Remote already has the desired state
+            self.mutation_queue.complete(op)
+            return "applied"
+
+        if remote_changed_since(remote, op.queued_at):
+            self.mutation_queue.record_conflict(op, "remote task updated after local edit", remote)
+            return "conflict"
+
+        if remote.get('etag'):
+            headers['If-Match'] = remote['etag']
+
+        if op.kind == "patch":
+            response = self.api_client.patch(task_url, headers=headers, json=op.body, timeout=30)
+            success = response.status_code == 200
+        else:
+            response = self.api_client.delete(task_url, headers=headers, timeout=30)
+            success = response.status_code in (204, 404)
+
+        if success:
+            self.mutation_queue.complete(op)
+            self._invalidate_list_cache(op.list_id)
+            logger.info("Replayed offline mutation", kind=op.kind, task_id=op.task_id)
+            return "applied"
+        if response.status_code == 412:
+            self.mutation_queue.record_conflict(op, "etag mismatch", remote)
+            return "conflict"
+        if response.status_code == 401:
+            return "unauthorized"
+        return f"HTTP {response.status_code}"
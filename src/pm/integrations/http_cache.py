@@ -0,0 +1,277 @@
+"""HTTP response cache for Google API reads
+
+Stores response bodies on disk together with their ETags so repeated reads
+can be answered locally (within a per-endpoint TTL) or revalidated with a
+cheap conditional request (If-None-Match -> 304).
+
+Every cache instance (one per integration and account, possibly in several
+processes) shares the same directory. Changes to the index reload it under
+the file lock and save the merged result, so no instance drops the entries
+of another and leaves their body files behind. Cache hits only update the
+access time in memory; it is saved with the next change.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+import requests
+import structlog
+
+from pm.core.atomic import atomic_write, file_lock
+from pm.core.metrics import metrics
+from pm.core.profiling import timed
+
+logger = structlog.get_logger()
+
+
+class CachedResponse:
+    """Minimal stand-in for requests.Response served from the cache"""
+
+    def __init__(self, content: bytes, headers: Optional[Dict[str, str]] = None):
+        self.status_code = 200
+        self.content = content
+        self.headers = headers or {}
+        self.from_cache = True
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8')
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+class HttpResponseCache:
+    """On-disk ETag cache with LRU eviction and per-endpoint TTLs
+
+    Entries are keyed by account, URL and query parameters. A fresh entry
+    (younger than its endpoint TTL) is returned without any network access;
+    a stale entry is revalidated with If-None-Match and a 304 refreshes it.
+    """
+
+    # Seconds an entry is served without revalidation
+    DEFAULT_TTLS = {
+        'tasks.lists': 300,
+        'tasks.tasks': 60,
+        'calendar.events': 120,
+        'calendar.calendarList': 3600,
+    }
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 20 * 1024 * 1024,
+                 ttls: Optional[Dict[str, int]] = None, enabled: bool = True,
+                 client: Any = None):
+        self.cache_dir = cache_dir
+        # Anything with a requests-style get(); defaults to the requests module
+        self.client = client or requests
+        self.max_bytes = max_bytes
+        self.ttls = dict(self.DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.enabled = enabled
+        self._index: Dict[str, Dict[str, Any]] = {}
+        # One instance serves concurrent fetches (several calendars at once)
+        self._lock = threading.RLock()
+
+        if self.enabled:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._index = self._load_index()
+
+    @timed("http_cache.load_index", "io")
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        index_file = self.cache_dir / self.INDEX_FILE
+        if not index_file.exists():
+            return {}
+        try:
+            with open(index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning("Discarding unreadable HTTP cache index", error=str(e))
+            return {}
+
+    @timed("http_cache.save_index", "io")
+    def _save_index(self) -> None:
+        try:
+            atomic_write(self.cache_dir / self.INDEX_FILE, json.dumps(self._index))
+        except Exception as e:
+            logger.error("Failed to save HTTP cache index", error=str(e))
+
+    @contextmanager
+    def _update_index(self) -> Iterator[None]:
+        """Reload the index, let the block change it, evict and save, under the file lock
+
+        The index on disk decides which entries exist (another instance may
+        have stored or dropped some); access times seen only in memory are
+        carried over.
+        """
+        with self._lock, file_lock(self.cache_dir / self.INDEX_FILE):
+            index = self._load_index()
+            for key, entry in index.items():
+                mine = self._index.get(key)
+                if mine is not None and mine['last_access'] > entry['last_access']:
+                    entry['last_access'] = mine['last_access']
+            self._index = index
+            yield
+            self._evict()
+            self._save_index()
+
+    @staticmethod
+    def _make_key(account: str, url: str, params: Optional[Dict[str, Any]]) -> str:
+        parts = [account, url]
+        for name in sorted(params or {}):
+            parts.append(f"{name}={params[name]}")
+        return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+    def _body_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.body"
+
+    @timed("http_cache.read", "io")
+    def _read_body(self, key: str) -> Optional[bytes]:
+        try:
+            return self._body_path(key).read_bytes()
+        except OSError:
+            return None
+
+    def get(self,
+            url: str,
+            endpoint: str,
+            headers: Dict[str, str],
+            params: Optional[Dict[str, Any]] = None,
+            account: str = "default",
+            timeout: int = 30,
+            stream: bool = False):
+        """GET with local caching and ETag revalidation
+
+        Args:
+            url: Request URL
+            endpoint: Endpoint name used for TTL lookup (e.g. "tasks.lists")
+            headers: Request headers (Authorization etc.)
+            params: Query parameters
+            account: Account alias, part of the cache key
+            timeout: Request timeout in seconds
+            stream: Leave the body unread so the caller can decode it
+                incrementally. Only applies while caching is disabled, since
+                a cached response has to be read in full to be stored.
+
+        Returns:
+            requests.Response for network responses, CachedResponse for hits
+        """
+        if not self.enabled:
+            return self.client.get(url, headers=headers, params=params, timeout=timeout,
+                                   stream=stream)
+
+        key = self._make_key(account, url, params)
+        entry = self._index.get(key)
+        now = time.time()
+
+        if entry:
+            ttl = self.ttls.get(endpoint, 0)
+            if now - entry['stored_at'] < ttl:
+                body = self._read_body(key)
+                if body is not None:
+                    entry['last_access'] = now
+                    logger.debug("HTTP cache hit", endpoint=endpoint)
+                    metrics.record_cache_hit(url)
+                    return CachedResponse(body)
+
+        request_headers = dict(headers)
+        if entry and entry.get('etag'):
+            request_headers['If-None-Match'] = entry['etag']
+
+        response = self.client.get(url, headers=request_headers, params=params, timeout=timeout)
+
+        if response.status_code == 304 and entry:
+            body = self._read_body(key)
+            if body is not None:
+                with self._update_index():
+                    entry = self._index.get(key)
+                    if entry is not None:
+                        entry['stored_at'] = now
+                        entry['last_access'] = now
+                logger.debug("HTTP cache revalidated", endpoint=endpoint)
+                return CachedResponse(body)
+            # Body vanished from disk, fetch unconditionally
+            with self._update_index():
+                self._drop(key)
+            return self.client.get(url, headers=headers, params=params, timeout=timeout)
+
+        if response.status_code == 200:
+            self._store(key, url, endpoint, response, now)
+
+        return response
+
+    @timed("http_cache.store", "io")
+    def _store(self, key: str, url: str, endpoint: str, response, now: float) -> None:
+        # Without an ETag header the entry is only served within its TTL and
+        # fetched in full afterwards; the body is not decoded just to find one
+        etag = response.headers.get('ETag')
+
+        content = response.content
+        if len(content) > self.max_bytes:
+            return
+
+        try:
+            atomic_write(self._body_path(key), content)
+        except OSError as e:
+            logger.warning("Failed to write HTTP cache entry", error=str(e))
+            return
+
+        with self._update_index():
+            self._index[key] = {
+                'url': url,
+                'endpoint': endpoint,
+                'etag': etag,
+                'size': len(content),
+                'stored_at': now,
+                'last_access': now,
+            }
+
+    def _drop(self, key: str) -> None:
+        with self._lock:
+            self._index.pop(key, None)
+        try:
+            self._body_path(key).unlink()
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        """Evict least recently used entries until under the size bound"""
+        total = sum(e['size'] for e in self._index.values())
+        if total <= self.max_bytes:
+            return
+
+        for key in sorted(self._index, key=lambda k: self._index[k]['last_access']):
+            total -= self._index[key]['size']
+            self._drop(key)
+            if total <= self.max_bytes:
+                break
+
+    def invalidate(self, url_prefix: str) -> int:
+        """Drop all entries whose URL starts with url_prefix
+
+        Returns:
+            Number of entries removed
+        """
+        if not self.enabled:
+            return 0
+
+        with self._update_index():
+            keys = [k for k, e in self._index.items() if e['url'].startswith(url_prefix)]
+            for key in keys:
+                self._drop(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        """Remove every cached response"""
+        if not self.enabled:
+            return
+
+        with self._update_index():
+            for key in list(self._index):
+                self._drop(key)
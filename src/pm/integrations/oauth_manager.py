@@ -4,6 +4,7 @@
 """
 
 import json
+import threading
 import time
 import secrets
 import hashlib
@@ -12,10 +13,13 @@ import requests
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Any, Tuple
 from pathlib import Path
-from urllib.parse import urlencode, parse_qs
+from urllib.parse import urlencode, parse_qs, urlsplit
 import structlog
 
+from pm.core.atomic import atomic_write
 from pm.core.config import PMConfig
+from pm.core.metrics import metrics
+from pm.core.profiling import span
 
 logger = structlog.get_logger()
 
@@ -95,6 +99,13 @@ class OAuthManager:
         
         # OAuth 2.0 安全参数
         self._pending_states: Dict[str, Dict[str, Any]] = {}
+
+        # 按账号缓存已加载的token：{服务名: (文件mtime, token)}
+        # 文件被其他进程更新后 mtime 变化，缓存自动失效
+        self._token_cache: Dict[str, Tuple[int, OAuthTokenInfo]] = {}
+        # 每个账号一把锁，并发请求同一账号时只读取/刷新一次
+        self._token_locks: Dict[str, threading.Lock] = {}
+        self._token_locks_guard = threading.Lock()
         
         logger.info("OAuth Manager initialized", tokens_dir=self.tokens_dir)
     
@@ -295,34 +306,51 @@ class OAuthManager:
 
         token_file = self.tokens_dir / f"{token_service_name}_token.json"
 
-        if not token_file.exists():
-            return None
-
-        try:
-            with open(token_file, 'r', encoding='utf-8') as f:
-                token_data = json.load(f)
-
-            token_info = OAuthTokenInfo.from_dict(token_data)
-
-            # 检查是否过期
-            if token_info.is_expired:
-                logger.info("Token expired, attempting refresh",
-                           service=token_service_name,
-                           account=account_alias)
-                # 尝试刷新token
-                refreshed_token = self.refresh_token(token_service_name, token_info)
-                if refreshed_token:
-                    return refreshed_token
+        with self._token_lock(token_service_name):
+            try:
+                mtime = token_file.stat().st_mtime_ns
+            except OSError:
+                self._token_cache.pop(token_service_name, None)
                 return None
 
-            return token_info
+            cached = self._token_cache.get(token_service_name)
+            if cached and cached[0] == mtime and not cached[1].is_expired:
+                return cached[1]
 
-        except Exception as e:
-            logger.error("Error loading token",
-                        service=token_service_name,
-                        account=account_alias,
-                        error=str(e))
-            return None
+            try:
+                with span("token.load", "auth", service=token_service_name):
+                    with open(token_file, 'r', encoding='utf-8') as f:
+                        token_data = json.load(f)
+
+                    token_info = OAuthTokenInfo.from_dict(token_data)
+
+                # 检查是否过期
+                if token_info.is_expired:
+                    logger.info("Token expired, attempting refresh",
+                               service=token_service_name,
+                               account=account_alias)
+                    # 尝试刷新token（成功后由 save_token 写入缓存）
+                    refreshed_token = self.refresh_token(token_service_name, token_info)
+                    if refreshed_token:
+                        return refreshed_token
+                    return None
+
+                self._token_cache[token_service_name] = (mtime, token_info)
+                return token_info
+
+            except Exception as e:
+                logger.error("Error loading token",
+                            service=token_service_name,
+                            account=account_alias,
+                            error=str(e))
+                return None
+
+    def _token_lock(self, token_service_name: str) -> threading.Lock:
+        with self._token_locks_guard:
+            lock = self._token_locks.get(token_service_name)
+            if lock is None:
+                lock = self._token_locks[token_service_name] = threading.Lock()
+            return lock
     
     def save_token(self, service_name: str, token_info: OAuthTokenInfo, account_alias: Optional[str] = None) -> bool:
         """安全保存token信息
@@ -345,11 +373,9 @@ class OAuthManager:
             # 确保tokens目录权限安全
             self.tokens_dir.chmod(0o700)
 
-            with open(token_file, 'w', encoding='utf-8') as f:
-                json.dump(token_info.to_dict(), f, indent=2)
-
-            # 设置文件权限为仅当前用户可读写
-            token_file.chmod(0o600)
+            # 写入前即设为仅当前用户可读写，避免令牌短暂可被他人读取
+            atomic_write(token_file, json.dumps(token_info.to_dict(), indent=2), mode=0o600)
+            self._token_cache[token_service_name] = (token_file.stat().st_mtime_ns, token_info)
 
             logger.info("Token saved securely",
                        service=token_service_name,
@@ -400,7 +426,7 @@ class OAuthManager:
             import requests
 
             # Google的token刷新端点
-            refresh_url = "https://oauth2.googleapis.com/token"
+            refresh_url = self.config.google_oauth_token_url
 
             # 准备刷新请求数据
             refresh_data = {
@@ -413,7 +439,15 @@ class OAuthManager:
             logger.info("Attempting to refresh token", service=service_name)
 
             # 发送刷新请求
-            response = requests.post(refresh_url, data=refresh_data)
+            with span("token.refresh", "auth", service=service_name):
+                with span(f"POST {urlsplit(refresh_url).path}", "http") as current:
+                    started = time.perf_counter()
+                    response = requests.post(refresh_url, data=refresh_data, timeout=30)
+                    current.set(status=response.status_code)
+            metrics.record_request("POST", refresh_url, response.status_code,
+                                   time.perf_counter() - started, len(response.content),
+                                   quota_error=response.status_code == 429,
+                                   operation="refresh_token")
 
             if response.status_code == 200:
                 token_response = response.json()
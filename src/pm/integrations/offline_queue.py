@@ -0,0 +1,251 @@
+"""Offline mutation queue for Google Tasks
+
+Persists task mutations (create/patch/delete) that could not reach Google
+while offline, coalescing them so that only the net effect is replayed on
+reconnect.
+"""
+
+import json
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import uuid4
+
+import structlog
+
+from pm.core.atomic import atomic_write, file_lock
+from pm.core.profiling import timed
+from pm.core.timestamps import parse_rfc3339
+
+logger = structlog.get_logger()
+
+
+LOCAL_ID_PREFIX = "local_"
+
+
+@dataclass
+class PendingMutation:
+    """A single queued mutation against Google Tasks"""
+    op_id: str
+    kind: str  # "create", "patch" or "delete"
+    list_id: str
+    task_id: str  # local placeholder id for creates
+    body: Dict[str, Any] = field(default_factory=dict)
+    queued_at: str = ""  # RFC 3339 UTC, time of the first local edit
+    attempts: int = 0
+
+    @property
+    def is_local(self) -> bool:
+        """Whether the mutation targets a task that only exists locally"""
+        return self.task_id.startswith(LOCAL_ID_PREFIX)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PendingMutation':
+        return cls(**data)
+
+
+class MutationQueue:
+    """Persistent, coalescing operation log of pending task mutations
+
+    Coalescing rules (per task_id; task ids are unique across lists, and
+    callers that do not know a task's list pass '@default'):
+    - patch after create: merged into the create body
+    - patch after patch: fields merged, later values win
+    - delete after create: both dropped, the task never reaches Google
+    - delete after patch: the patch is replaced by the delete
+    - anything after delete: ignored, the task is gone
+    - create after create with the same title in the same list: merged
+
+    Every change reloads the file, applies itself and saves under the file
+    lock, so processes queueing at the same time do not drop each other's ops.
+    """
+
+    def __init__(self, queue_file: Path):
+        self.queue_file = queue_file
+        self._ops: List[PendingMutation] = []
+        self._conflicts: List[Dict[str, Any]] = []
+        self._load()
+
+    @timed("mutation_queue.load", "io")
+    def _load(self) -> None:
+        if not self.queue_file.exists():
+            self._ops = []
+            self._conflicts = []
+            return
+
+        try:
+            with open(self.queue_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._ops = [PendingMutation.from_dict(op) for op in data.get('ops', [])]
+            self._conflicts = data.get('conflicts', [])
+        except Exception as e:
+            logger.error("Failed to load mutation queue",
+                        file=str(self.queue_file), error=str(e))
+            self._ops = []
+            self._conflicts = []
+
+    @timed("mutation_queue.save", "io")
+    def _save(self) -> bool:
+        try:
+            data = {
+                'updated_at': datetime.now().isoformat(),
+                'ops': [op.to_dict() for op in self._ops],
+                'conflicts': self._conflicts,
+            }
+            atomic_write(self.queue_file, json.dumps(data, ensure_ascii=False, indent=2))
+            return True
+        except Exception as e:
+            logger.error("Failed to save mutation queue",
+                        file=str(self.queue_file), error=str(e))
+            return False
+
+    @contextmanager
+    def _update(self) -> Iterator[None]:
+        """Reload the queue, let the block change it and save it, under the file lock"""
+        with file_lock(self.queue_file):
+            self._load()
+            yield
+            self._save()
+
+    def __len__(self) -> int:
+        return len(self._ops)
+
+    def pending(self) -> List[PendingMutation]:
+        """Pending mutations in replay order"""
+        return list(self._ops)
+
+    def conflicts(self) -> List[Dict[str, Any]]:
+        """Mutations that were dropped during replay because of remote changes"""
+        return list(self._conflicts)
+
+    def _find(self, task_id: str) -> Optional[PendingMutation]:
+        for op in self._ops:
+            if op.task_id == task_id:
+                return op
+        return None
+
+    def enqueue_create(self, list_id: str, body: Dict[str, Any]) -> str:
+        """Queue a task creation
+
+        A create with the same title already queued for the list is updated
+        instead, so repeated offline pushes do not create the task twice.
+
+        Returns:
+            Local placeholder task id, usable for follow-up patches/deletes
+        """
+        title = body.get('title')
+        with self._update():
+            for op in self._ops:
+                if op.kind == "create" and op.list_id == list_id and op.body.get('title') == title:
+                    op.body.update(body)
+                    logger.info("Merged offline task creation", list_id=list_id, local_id=op.task_id)
+                    return op.task_id
+
+            local_id = f"{LOCAL_ID_PREFIX}{uuid4().hex[:12]}"
+            self._ops.append(PendingMutation(
+                op_id=uuid4().hex,
+                kind="create",
+                list_id=list_id,
+                task_id=local_id,
+                body=dict(body),
+                queued_at=_utc_now(),
+            ))
+        logger.info("Queued offline task creation", list_id=list_id, local_id=local_id)
+        return local_id
+
+    def enqueue_patch(self, list_id: str, task_id: str, fields: Dict[str, Any]) -> None:
+        """Queue a partial update, coalescing with earlier mutations"""
+        with self._update():
+            existing = self._find(task_id)
+
+            if existing is None:
+                self._ops.append(PendingMutation(
+                    op_id=uuid4().hex,
+                    kind="patch",
+                    list_id=list_id,
+                    task_id=task_id,
+                    body=dict(fields),
+                    queued_at=_utc_now(),
+                ))
+            elif existing.kind == "delete":
+                logger.debug("Ignoring patch for task pending deletion", task_id=task_id)
+                return
+            else:
+                existing.body.update(fields)
+
+        logger.info("Queued offline task patch", list_id=list_id, task_id=task_id)
+
+    def enqueue_delete(self, list_id: str, task_id: str) -> None:
+        """Queue a deletion, cancelling out any pending create"""
+        with self._update():
+            existing = self._find(task_id)
+
+            if existing is None:
+                self._ops.append(PendingMutation(
+                    op_id=uuid4().hex,
+                    kind="delete",
+                    list_id=list_id,
+                    task_id=task_id,
+                    queued_at=_utc_now(),
+                ))
+            elif existing.kind == "create":
+                self._ops.remove(existing)
+            elif existing.kind == "patch":
+                existing.kind = "delete"
+                existing.body = {}
+            else:
+                return
+
+        logger.info("Queued offline task deletion", list_id=list_id, task_id=task_id)
+
+    def complete(self, op: PendingMutation) -> None:
+        """Remove a successfully replayed mutation"""
+        with self._update():
+            self._ops = [o for o in self._ops if o.op_id != op.op_id]
+
+    def record_conflict(self, op: PendingMutation, reason: str,
+                        remote: Optional[Dict[str, Any]] = None) -> None:
+        """Drop a mutation that lost against a newer remote change"""
+        with self._update():
+            self._ops = [o for o in self._ops if o.op_id != op.op_id]
+            self._conflicts.append({
+                'op': op.to_dict(),
+                'reason': reason,
+                'remote_updated': (remote or {}).get('updated'),
+                'resolved_at': _utc_now(),
+            })
+        logger.warning("Dropped offline mutation due to conflict",
+                      kind=op.kind, task_id=op.task_id, reason=reason)
+
+    def record_attempt(self, op: PendingMutation) -> None:
+        op.attempts += 1
+        with self._update():
+            for queued in self._ops:
+                if queued.op_id == op.op_id:
+                    queued.attempts = op.attempts
+
+    def clear_conflicts(self) -> None:
+        with self._update():
+            self._conflicts = []
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def remote_changed_since(remote: Dict[str, Any], queued_at: str) -> bool:
+    """Whether the remote resource was updated after the local edit was queued"""
+    remote_updated = remote.get('updated')
+    if not remote_updated or not queued_at:
+        return False
+    try:
+        remote_time = parse_rfc3339(remote_updated)
+        local_time = parse_rfc3339(queued_at)
+    except ValueError:
+        return False
+    return remote_time > local_time
@@ -0,0 +1,94 @@
+"""Persistent task-list title -> id cache
+
+Google Tasks list ids are stable, so resolving a list by title only needs a
+network round-trip the first time. Entries are validated lazily: callers
+invalidate an id when a list operation returns 404.
+
+All accounts share one file. A change reloads it under the file lock and
+rewrites only the changed account, so processes working with different
+accounts do not overwrite each other's entries.
+"""
+
+import json
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import structlog
+
+from pm.core.atomic import atomic_write, file_lock
+from pm.core.profiling import timed
+
+logger = structlog.get_logger()
+
+
+class TaskListIdCache:
+    """Per-account mapping of lower-cased list titles to list ids"""
+
+    def __init__(self, cache_file: Path):
+        self.cache_file = cache_file
+        self._accounts: Dict[str, Dict[str, str]] = self._load()
+
+    @timed("task_list_ids.load", "io")
+    def _load(self) -> Dict[str, Dict[str, str]]:
+        if not self.cache_file.exists():
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning("Discarding unreadable task list id cache", error=str(e))
+            return {}
+
+    @timed("task_list_ids.save", "io")
+    def _save(self) -> None:
+        try:
+            atomic_write(self.cache_file, json.dumps(self._accounts, ensure_ascii=False, indent=2))
+        except Exception as e:
+            logger.error("Failed to save task list id cache", error=str(e))
+
+    @contextmanager
+    def _edit(self, account: str) -> Iterator[Dict[str, str]]:
+        """Fresh title -> id mapping of an account, saved when the block exits"""
+        with file_lock(self.cache_file):
+            self._accounts = self._load()
+            yield self._accounts.setdefault(account, {})
+            self._save()
+
+    def get(self, account: str, title: str) -> Optional[str]:
+        """Cached list id for a title, or None"""
+        return self._accounts.get(account, {}).get(title.lower())
+
+    def put(self, account: str, title: str, list_id: str) -> None:
+        if self._accounts.get(account, {}).get(title.lower()) != list_id:
+            with self._edit(account) as titles:
+                titles[title.lower()] = list_id
+
+    def update(self, account: str, task_lists: List[Dict[str, str]]) -> None:
+        """Replace an account's mapping from a fresh task list listing"""
+        with self._edit(account) as titles:
+            titles.clear()
+            titles.update({
+                (task_list.get('title') or '').lower(): task_list['id']
+                for task_list in task_lists
+                if task_list.get('id')
+            })
+
+    def contains_id(self, account: str, list_id: str) -> bool:
+        return list_id in self._accounts.get(account, {}).values()
+
+    def invalidate_id(self, account: str, list_id: str) -> bool:
+        """Forget a list id that no longer exists on Google
+
+        Returns:
+            True if an entry was removed
+        """
+        if not self.contains_id(account, list_id):
+            return False
+        with self._edit(account) as titles:
+            stale = [title for title, cached_id in titles.items() if cached_id == list_id]
+            for title in stale:
+                del titles[title]
+        if stale:
+            logger.info("Invalidated cached task list id", account=account, list_id=list_id)
+        return bool(stale)
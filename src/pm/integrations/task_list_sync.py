@@ -0,0 +1,121 @@
+"""Per-list incremental sync state for Google Tasks
+
+Every task list keeps a snapshot of its visible tasks and an ``updatedMin``
+cursor: the newest ``updated`` timestamp seen from the server. Later reads
+ask only for tasks modified since the cursor (including deleted and hidden
+ones, which are removed from the snapshot), so reading several lists costs
+one small request per list instead of a full listing. Cursors come from the
+server's own timestamps, which keeps them immune to local clock skew.
+"""
+
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import quote
+
+import structlog
+
+from pm.core.atomic import atomic_write
+from pm.core.profiling import timed
+
+logger = structlog.get_logger()
+
+
+@dataclass
+class TaskListSyncState:
+    """Cursor and task snapshot of one task list"""
+    list_id: str
+    # Newest `updated` value seen (RFC 3339), sent as updatedMin
+    cursor: str = ""
+    synced_at: float = 0.0
+    # Time of the last full listing
+    full_synced_at: float = 0.0
+    # Raw API resources by task id, in API order
+    tasks: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    def apply(self, items: Iterable[Dict[str, Any]]) -> int:
+        """Apply a page of tasks; deleted and hidden tasks are removed
+
+        Returns:
+            Number of changed tasks
+        """
+        changed = 0
+        for item in items:
+            task_id = item.get('id')
+            if not task_id:
+                continue
+            if item.get('deleted') or item.get('hidden'):
+                self.tasks.pop(task_id, None)
+            else:
+                self.tasks[task_id] = item
+            # RFC 3339 in UTC with a fixed format compares correctly as text
+            updated = item.get('updated') or ""
+            if updated > self.cursor:
+                self.cursor = updated
+            changed += 1
+        return changed
+
+
+class TaskListSyncStore:
+    """One JSON file per account and task list under `root`"""
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def _path(self, account: str, list_id: str) -> Path:
+        return self.root / quote(account, safe='') / f"{quote(list_id, safe='')}.json"
+
+    @timed("task_list_sync.load", "io")
+    def load(self, account: str, list_id: str) -> Optional[TaskListSyncState]:
+        path = self._path(account, list_id)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return TaskListSyncState(**json.load(f))
+        except Exception as e:
+            logger.warning("Discarding unreadable task list sync state",
+                           list_id=list_id, error=str(e))
+            return None
+
+    @timed("task_list_sync.save", "io")
+    def save(self, account: str, state: TaskListSyncState) -> None:
+        try:
+            atomic_write(self._path(account, state.list_id), json.dumps(asdict(state), ensure_ascii=False))
+        except OSError as e:
+            logger.error("Failed to save task list sync state",
+                         list_id=state.list_id, error=str(e))
+
+    def _expiry_marker(self, account: str) -> Path:
+        return self.root / quote(account, safe='') / ".expired"
+
+    def expire_account(self, account: str) -> None:
+        """Force the next read of every list of `account` to ask for changes
+
+        Local writes go through list ids as well as the ``@default`` alias,
+        so all of the account's snapshots are expired together by touching
+        a marker file instead of rewriting each snapshot.
+        """
+        marker = self._expiry_marker(account)
+        try:
+            marker.parent.mkdir(parents=True, exist_ok=True)
+            marker.touch()
+        except OSError as e:
+            logger.warning("Failed to expire task list sync state", account=account, error=str(e))
+
+    def is_fresh(self, account: str, state: TaskListSyncState, max_age: float) -> bool:
+        """Whether `state` can be served without asking the API for changes"""
+        if time.time() - state.synced_at >= max_age:
+            return False
+        try:
+            return state.synced_at > self._expiry_marker(account).stat().st_mtime
+        except OSError:
+            return True
+
+    def drop(self, account: str, list_id: str) -> None:
+        try:
+            self._path(account, list_id).unlink()
+        except OSError:
+            pass
@@ -10,6 +10,9 @@ from enum import Enum
 from pathlib import Path
 from typing import List, Optional
 
+from pm.core.atomic import atomic_write
+from pm.core.profiling import timed
+
 
 class TaskPriority(Enum):
     """Task priority levels based on NEXT.md sections"""
@@ -117,6 +120,7 @@ class NextMdParser:
     # Completed date pattern: ✓MM-DD or vMM-DD
     COMPLETED_DATE_PATTERN = re.compile(r'[✓v](\d{1,2})-(\d{1,2})$')
 
+    @timed("parse NEXT.md", "parse")
     def parse_file(self, file_path: Path, project_name: str) -> NextMdFile:
         """Parse a single NEXT.md file
 
@@ -173,6 +177,7 @@ class NextMdParser:
 
         return result
 
+    @timed("scan projects", "parse")
     def scan_projects(self, base_path: Path) -> List[NextMdFile]:
         """Scan all projects under base_path for NEXT.md files
 
@@ -260,6 +265,7 @@ class NextMdParser:
             line_number=line_number
         )
 
+    @timed("update NEXT.md", "io")
     def update_task_completion(
         self,
         file_path: Path,
@@ -320,7 +326,7 @@ class NextMdParser:
 
             # Clean up empty lines and write back
             content = '\n'.join(line for line in lines if line or line == '')
-            file_path.write_text(content, encoding='utf-8')
+            atomic_write(file_path, content)
 
             return True
 
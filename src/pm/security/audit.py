@@ -0,0 +1,178 @@
+"""Append-only audit log of the secrets vault.
+
+Events are written as one JSON line each to ``secrets.audit.log``, opened
+with ``O_APPEND`` so lines from concurrent processes never interleave. Once
+the file exceeds ``MAX_BYTES`` it is renamed to ``secrets.audit.log.1``
+(shifting older files up to ``BACKUP_COUNT``), so the trail on disk is
+bounded as well and the oldest events are dropped a whole file at a time.
+
+Queries stream the files from the newest line backwards and stop as soon as
+the limit or the start of the time range is reached, so asking for the last
+events does not read the whole trail.
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Collection, Dict, Iterator, List, Optional
+
+import structlog
+
+from pm.core.atomic import file_lock
+
+logger = structlog.get_logger()
+
+
+class AuditLog:
+    """Rotated JSON-lines audit trail."""
+
+    # Size at which the current file is rotated
+    MAX_BYTES = 5 << 20
+    # Rotated files kept (secrets.audit.log.1 .. .N)
+    BACKUP_COUNT = 5
+    # Bytes read per step when reading a file backwards
+    READ_BLOCK = 64 << 10
+
+    def __init__(self, path: Path, max_bytes: int = MAX_BYTES, backup_count: int = BACKUP_COUNT):
+        """Initialize the log.
+
+        Args:
+            path: Current log file; rotated files live next to it
+            max_bytes: Size at which the current file is rotated
+            backup_count: Number of rotated files kept
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+
+    def _rotated(self, n: int) -> Path:
+        return self.path.with_name(f"{self.path.name}.{n}")
+
+    def files(self) -> List[Path]:
+        """Existing log files, newest first."""
+        candidates = [self.path] + [self._rotated(n) for n in range(1, self.backup_count + 1)]
+        return [p for p in candidates if p.exists()]
+
+    # ----- writing -----
+
+    def append(self, event: Dict[str, Any]) -> None:
+        """Append an event to the current file.
+
+        A failing write is logged and otherwise ignored: auditing must not
+        break the operation being audited.
+        """
+        line = (json.dumps(event, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                os.write(fd, line)
+                size = os.fstat(fd).st_size
+            finally:
+                os.close(fd)
+            if size >= self.max_bytes:
+                self._rotate()
+        except OSError as e:
+            logger.warning("Failed to write audit event", path=str(self.path), error=str(e))
+
+    def _rotate(self) -> None:
+        with file_lock(self.path):
+            # Another process may have rotated while we waited for the lock
+            try:
+                if self.path.stat().st_size < self.max_bytes:
+                    return
+            except FileNotFoundError:
+                return
+            oldest = self._rotated(self.backup_count)
+            if oldest.exists():
+                oldest.unlink()
+            for n in range(self.backup_count - 1, 0, -1):
+                if self._rotated(n).exists():
+                    os.replace(self._rotated(n), self._rotated(n + 1))
+            if self.backup_count > 0:
+                os.replace(self.path, self._rotated(1))
+            else:
+                self.path.unlink()
+
+    def clear(self) -> None:
+        """Delete the trail on disk."""
+        with file_lock(self.path):
+            for path in self.files():
+                path.unlink()
+
+    # ----- reading -----
+
+    def query(self, limit: Optional[int] = 100, since: Optional[datetime] = None,
+              until: Optional[datetime] = None,
+              event_types: Optional[Collection[str]] = None) -> List[Dict[str, Any]]:
+        """Most recent matching events, oldest first.
+
+        Args:
+            limit: Maximum number of events (None: all)
+            since: Only events at or after this time (UTC)
+            until: Only events before this time (UTC)
+            event_types: Only events of these types
+
+        Returns:
+            Matching events in chronological order
+        """
+        if limit is not None and limit <= 0:
+            return []
+        events: List[Dict[str, Any]] = []
+        for event in self.iter_events(since, until, event_types):
+            events.append(event)
+            if limit is not None and len(events) >= limit:
+                break
+        events.reverse()
+        return events
+
+    def iter_events(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                    event_types: Optional[Collection[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Stream matching events from the trail on disk, newest first.
+
+        Events are appended in time order, so reading stops at the first
+        event older than `since`. Unreadable lines (a torn write) are skipped.
+        """
+        since_key = since.isoformat() if since else None
+        until_key = until.isoformat() if until else None
+        types = set(event_types) if event_types else None
+
+        for path in self.files():
+            try:
+                lines = self._reverse_lines(path)
+                for line in lines:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    timestamp = event.get('timestamp', '')
+                    if since_key and timestamp < since_key:
+                        return
+                    if until_key and timestamp >= until_key:
+                        continue
+                    if types is not None and event.get('event_type') not in types:
+                        continue
+                    yield event
+            except FileNotFoundError:
+                # Rotated away while reading; its events are in the next file
+                continue
+
+    def _reverse_lines(self, path: Path) -> Iterator[bytes]:
+        """Lines of a file from last to first, read in blocks from the end."""
+        with open(path, 'rb') as f:
+            position = f.seek(0, os.SEEK_END)
+            tail = b''
+            while position > 0:
+                step = min(self.READ_BLOCK, position)
+                position -= step
+                f.seek(position)
+                block = f.read(step) + tail
+                lines = block.split(b'\n')
+                # The first piece may be the end of a line from the previous block
+                tail = lines.pop(0)
+                for line in reversed(lines):
+                    if line:
+                        yield line
+            if tail:
+                yield tail
@@ -0,0 +1,109 @@
+"""Chunked, authenticated backup format for the secrets vault.
+
+A backup is written and read as a stream, so neither side holds the whole
+vault in memory::
+
+    MAGIC | salt (16 bytes) | PBKDF2 iterations (uint32) | frame*
+
+Every frame is a big-endian uint32 length followed by a Fernet token (AES
+plus HMAC) of one JSON chunk ``{"seq", "secrets", "final"}``. The sequence
+numbers and the final flag detect reordered, dropped and truncated frames;
+tampering with a frame fails its HMAC. Secret values are stored decrypted,
+protected by the password-derived key only, so a backup stays usable after
+the master key was rotated or lost.
+"""
+
+import base64
+import json
+import os
+import struct
+from typing import Any, BinaryIO, Dict, Iterator, List
+
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+MAGIC = b'PMBACKUP2\n'
+SALT_SIZE = 16
+ITERATIONS = 100000
+# Secrets per frame
+CHUNK_SIZE = 256
+
+_LENGTH = struct.Struct('>I')
+
+
+def derive_cipher(password: str, salt: bytes, iterations: int = ITERATIONS) -> Fernet:
+    """Fernet cipher for a backup password."""
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        iterations=iterations
+    )
+    return Fernet(base64.urlsafe_b64encode(kdf.derive(password.encode())))
+
+
+class BackupWriter:
+    """Write secrets to a backup stream, one frame per CHUNK_SIZE secrets."""
+
+    def __init__(self, f: BinaryIO, password: str, chunk_size: int = CHUNK_SIZE):
+        salt = os.urandom(SALT_SIZE)
+        self._f = f
+        self._cipher = derive_cipher(password, salt)
+        self._chunk_size = chunk_size
+        self._chunk: List[Dict[str, Any]] = []
+        self._seq = 0
+        self.count = 0
+        f.write(MAGIC + salt + _LENGTH.pack(ITERATIONS))
+
+    def write(self, secret: Dict[str, Any]) -> None:
+        """Add a serialized secret whose 'value' is the plaintext value."""
+        self._chunk.append(secret)
+        self.count += 1
+        if len(self._chunk) >= self._chunk_size:
+            self._flush(final=False)
+
+    def close(self) -> None:
+        """Write the final frame; without it the backup reads as truncated."""
+        self._flush(final=True)
+
+    def _flush(self, final: bool) -> None:
+        data = json.dumps({'seq': self._seq, 'secrets': self._chunk, 'final': final}).encode()
+        token = self._cipher.encrypt(data)
+        self._f.write(_LENGTH.pack(len(token)) + token)
+        self._seq += 1
+        self._chunk = []
+
+
+def is_chunked_backup(head: bytes) -> bool:
+    """Whether data starting with `head` is in this format (not the legacy one)."""
+    return head.startswith(MAGIC)
+
+
+def read_backup(f: BinaryIO, password: str) -> Iterator[List[Dict[str, Any]]]:
+    """Yield the secrets of a backup stream chunk by chunk.
+
+    Raises:
+        ValueError: Not a backup, or truncated or reordered frames
+        cryptography.fernet.InvalidToken: Wrong password or tampered frame
+    """
+    header = f.read(len(MAGIC) + SALT_SIZE + _LENGTH.size)
+    if not is_chunked_backup(header) or len(header) < len(MAGIC) + SALT_SIZE + _LENGTH.size:
+        raise ValueError("Not a chunked secrets backup")
+    salt = header[len(MAGIC):len(MAGIC) + SALT_SIZE]
+    (iterations,) = _LENGTH.unpack(header[-_LENGTH.size:])
+    cipher = derive_cipher(password, salt, iterations)
+
+    seq = 0
+    while True:
+        length = f.read(_LENGTH.size)
+        if len(length) < _LENGTH.size:
+            raise ValueError("Backup is truncated")
+        token = f.read(_LENGTH.unpack(length)[0])
+        chunk = json.loads(cipher.decrypt(token))
+        if chunk['seq'] != seq:
+            raise ValueError(f"Backup frame {chunk['seq']} out of order (expected {seq})")
+        yield chunk['secrets']
+        if chunk['final']:
+            return
+        seq += 1
@@ -0,0 +1,272 @@
+"""Secondary indexes over the secrets vault.
+
+Lookups by name, type and tag and the expiry and rotation checks used to scan
+every secret. :class:`SecretIndex` keeps, from the stored metadata of each
+secret (see ``SecretsManager._serialize_secret``):
+
+* ids by name, by type and by ``(tag, value)`` pair, for O(1) lookups;
+* min-heaps of ``(expires_at, id)`` and ``(next rotation, id)``. A due-items
+  query walks the heap from the root and never descends below an entry that
+  is not yet due, so it only touches the due entries and their children.
+
+Heap entries are not removed when a secret changes; an entry is live only
+while it matches the current key of its secret, and stale entries are dropped
+whenever they outnumber the live ones. The index is kept up to date by
+:class:`~pm.security.vault.VaultStore` and saved in the vault checkpoint.
+"""
+
+import heapq
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+# (sort key, secret id); keys are naive UTC datetime.isoformat() strings,
+# which order like the times they denote (the microseconds part is omitted
+# only when zero, and a shorter prefix sorts first)
+HeapEntry = Tuple[str, str]
+
+
+def _expiry_key(meta: Mapping[str, Any]) -> Optional[str]:
+    return meta.get('expires_at') or None
+
+
+def _rotation_key(meta: Mapping[str, Any]) -> Optional[str]:
+    if not meta.get('rotation_period') or not meta.get('last_rotated'):
+        return None
+    due = datetime.fromisoformat(meta['last_rotated']) + timedelta(seconds=meta['rotation_period'])
+    return due.isoformat()
+
+
+class _DueHeap:
+    """Min-heap of (time key, id) with lazy deletion."""
+
+    def __init__(self) -> None:
+        self.heap: List[HeapEntry] = []
+        self.keys: Dict[str, str] = {}
+
+    def set(self, secret_id: str, key: Optional[str]) -> None:
+        if key is None:
+            self.keys.pop(secret_id, None)
+            return
+        if self.keys.get(secret_id) == key:
+            return
+        self.keys[secret_id] = key
+        heapq.heappush(self.heap, (key, secret_id))
+        if len(self.heap) > 2 * len(self.keys) + 64:
+            self.load(self.live())
+
+    def live(self) -> List[HeapEntry]:
+        return self._live(self.heap)
+
+    def _live(self, entries: Iterable[HeapEntry]) -> List[HeapEntry]:
+        # A secret whose key changed back leaves an equal stale entry behind
+        found, seen = [], set()
+        for key, secret_id in entries:
+            if self.keys.get(secret_id) == key and secret_id not in seen:
+                seen.add(secret_id)
+                found.append((key, secret_id))
+        return found
+
+    def load(self, entries: Iterable[Iterable[str]]) -> None:
+        self.heap = [(key, secret_id) for key, secret_id in entries]
+        heapq.heapify(self.heap)
+        self.keys = {secret_id: key for key, secret_id in self.heap}
+
+    def due(self, before: str) -> List[HeapEntry]:
+        """Live entries with key <= `before`, in key order."""
+        found, stack, heap = [], [0], self.heap
+        while stack:
+            i = stack.pop()
+            if i >= len(heap) or heap[i][0] > before:
+                continue
+            found.append(heap[i])
+            stack.extend((2 * i + 1, 2 * i + 2))
+        found.sort()
+        return self._live(found)
+
+    def next_after(self, after: str) -> Optional[str]:
+        """Smallest live key greater than `after`.
+
+        Walks only the entries <= `after` and the first entry below each of
+        them that is greater.
+        """
+        best, stack, heap = None, [0], self.heap
+        while stack:
+            i = stack.pop()
+            if i >= len(heap):
+                continue
+            key, secret_id = heap[i]
+            if key <= after:
+                stack.extend((2 * i + 1, 2 * i + 2))
+            elif best is None or key < best:
+                if self.keys.get(secret_id) == key:
+                    best = key
+                else:
+                    # Stale: a live entry may still hide below it
+                    stack.extend((2 * i + 1, 2 * i + 2))
+        return best
+
+
+class SecretIndex:
+    """Secret ids by name, type, tag, expiry and next rotation."""
+
+    VERSION = 1
+
+    def __init__(self) -> None:
+        self.names: Dict[str, List[str]] = {}
+        self.types: Dict[str, Set[str]] = {}
+        self.tags: Dict[Tuple[str, str], Set[str]] = {}
+        self.expiry = _DueHeap()
+        self.rotation = _DueHeap()
+
+    # ----- maintenance -----
+
+    def rebuild(self, entries: Mapping[str, Mapping[str, Any]]) -> None:
+        """Index all entries from scratch."""
+        self.__init__()
+        expiry, rotation = [], []
+        for secret_id, meta in entries.items():
+            self.names.setdefault(meta['name'], []).append(secret_id)
+            self.types.setdefault(meta['type'], set()).add(secret_id)
+            for tag in (meta.get('tags') or {}).items():
+                self.tags.setdefault(tag, set()).add(secret_id)
+            key = _expiry_key(meta)
+            if key is not None:
+                expiry.append((key, secret_id))
+            key = _rotation_key(meta)
+            if key is not None:
+                rotation.append((key, secret_id))
+        self.expiry.load(expiry)
+        self.rotation.load(rotation)
+
+    def update(self, old: Optional[Mapping[str, Any]], new: Optional[Mapping[str, Any]]) -> None:
+        """Reindex a secret whose metadata changed from `old` to `new` (None: absent)."""
+        if old is None or new is None or old['name'] != new['name']:
+            if old is not None:
+                self.remove(old)
+            if new is not None:
+                self.add(new)
+            return
+        # Same name: keep its position among secrets of that name
+        secret_id = new['id']
+        if old['type'] != new['type']:
+            self._discard(self.types, old['type'], secret_id)
+            self.types.setdefault(new['type'], set()).add(secret_id)
+        old_tags, new_tags = old.get('tags') or {}, new.get('tags') or {}
+        if old_tags != new_tags:
+            for tag in old_tags.items():
+                self._discard(self.tags, tag, secret_id)
+            for tag in new_tags.items():
+                self.tags.setdefault(tag, set()).add(secret_id)
+        self.expiry.set(secret_id, _expiry_key(new))
+        self.rotation.set(secret_id, _rotation_key(new))
+
+    def add(self, meta: Mapping[str, Any]) -> None:
+        """Index a secret that is not indexed yet."""
+        secret_id = meta['id']
+        self.names.setdefault(meta['name'], []).append(secret_id)
+        self.types.setdefault(meta['type'], set()).add(secret_id)
+        for tag in (meta.get('tags') or {}).items():
+            self.tags.setdefault(tag, set()).add(secret_id)
+        self.expiry.set(secret_id, _expiry_key(meta))
+        self.rotation.set(secret_id, _rotation_key(meta))
+
+    def remove(self, meta: Mapping[str, Any]) -> None:
+        """Drop a secret, given its currently indexed metadata."""
+        secret_id = meta['id']
+        self._discard(self.names, meta['name'], secret_id)
+        self._discard(self.types, meta['type'], secret_id)
+        for tag in (meta.get('tags') or {}).items():
+            self._discard(self.tags, tag, secret_id)
+        self.expiry.set(secret_id, None)
+        self.rotation.set(secret_id, None)
+
+    @staticmethod
+    def _discard(index: Dict[Any, Any], key: Any, secret_id: str) -> None:
+        ids = index.get(key)
+        if ids is None:
+            return
+        if isinstance(ids, list):
+            if secret_id in ids:
+                ids.remove(secret_id)
+        else:
+            ids.discard(secret_id)
+        if not ids:
+            del index[key]
+
+    # ----- persistence -----
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable form, saved next to the vault checkpoint.
+
+        Every id is stored once in ``ids`` and referred to by position, which
+        keeps the saved form (and the time to load it) small.
+        """
+        ids: List[str] = []
+        position: Dict[str, int] = {}
+        for name_ids in self.names.values():
+            for secret_id in name_ids:
+                position[secret_id] = len(ids)
+                ids.append(secret_id)
+
+        def refs(secret_ids: Iterable[str]) -> List[int]:
+            return sorted(position[secret_id] for secret_id in secret_ids)
+
+        tags: Dict[str, Dict[str, List[int]]] = {}
+        for (name, value), secret_ids in self.tags.items():
+            tags.setdefault(name, {})[value] = refs(secret_ids)
+        expiry, rotation = self.expiry.live(), self.rotation.live()
+        return {
+            'version': self.VERSION,
+            'ids': ids,
+            'names': {name: [position[secret_id] for secret_id in name_ids]
+                      for name, name_ids in self.names.items()},
+            'types': {name: refs(secret_ids) for name, secret_ids in self.types.items()},
+            'tags': tags,
+            'expiry': [[key for key, _ in expiry], [position[sid] for _, sid in expiry]],
+            'rotation': [[key for key, _ in rotation], [position[sid] for _, sid in rotation]],
+        }
+
+    def load(self, data: Mapping[str, Any]) -> bool:
+        """Restore from to_dict() output; False if it is from another version."""
+        if data.get('version') != self.VERSION:
+            return False
+        ids = data['ids']
+        self.names = {name: [ids[i] for i in refs] for name, refs in data['names'].items()}
+        self.types = {name: {ids[i] for i in refs} for name, refs in data['types'].items()}
+        self.tags = {(name, value): {ids[i] for i in refs}
+                     for name, values in data['tags'].items() for value, refs in values.items()}
+        for heap, (keys, refs) in ((self.expiry, data['expiry']), (self.rotation, data['rotation'])):
+            heap.load(zip(keys, (ids[i] for i in refs)))
+        return True
+
+    # ----- queries -----
+
+    def by_name(self, name: str) -> List[str]:
+        """Ids of secrets named `name`, in the order they were first stored."""
+        return list(self.names.get(name, ()))
+
+    def matching(self, secret_type: Optional[str] = None,
+                 tags: Optional[Mapping[str, str]] = None) -> Optional[Set[str]]:
+        """Ids having the type and all the tags, or None when nothing is filtered."""
+        candidates = []
+        if secret_type is not None:
+            candidates.append(self.types.get(secret_type, set()))
+        for tag in (tags or {}).items():
+            candidates.append(self.tags.get(tag, set()))
+        if not candidates:
+            return None
+        candidates.sort(key=len)
+        return set(candidates[0]).intersection(*candidates[1:])
+
+    def expiring_before(self, when: datetime) -> List[str]:
+        """Ids of secrets expiring at or before `when` (naive UTC), soonest first."""
+        return [secret_id for _, secret_id in self.expiry.due(when.isoformat())]
+
+    def rotation_due_before(self, when: datetime) -> List[str]:
+        """Ids of secrets due for rotation at or before `when` (naive UTC), most overdue first."""
+        return [secret_id for _, secret_id in self.rotation.due(when.isoformat())]
+
+    def next_rotation_after(self, when: datetime) -> Optional[datetime]:
+        """Earliest rotation time of any secret after `when` (naive UTC)."""
+        key = self.rotation.next_after(when.isoformat())
+        return datetime.fromisoformat(key) if key is not None else None
@@ -6,25 +6,78 @@ API keys, passwords, tokens, and configuration secrets.
 
 import base64
 import hashlib
+import io
 import json
 import os
 import platform
-from cryptography.fernet import Fernet
+import threading
+from cryptography.fernet import Fernet, InvalidToken
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import datetime, timedelta
 from enum import Enum
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import BinaryIO, Callable, Collection, Dict, Any, Optional, List, Tuple
 from uuid import uuid4
 
+from pm.core.atomic import atomic_write
+from pm.security.audit import AuditLog
+from pm.security.backup import CHUNK_SIZE, BackupWriter, derive_cipher, is_chunked_backup, read_backup
+from pm.security.vault import VaultStore
+
 try:
     import keyring
     KEYRING_AVAILABLE = True
 except ImportError:
     KEYRING_AVAILABLE = False
 
+# Environment variable naming a file descriptor to read the unlocked master
+# key from, so a process started by an unlocked one (e.g. the daemon) does
+# not have to query the keyring itself
+MASTER_KEY_FD_ENV = 'PM_MASTER_KEY_FD'
+
+# Master keys and ciphers by (service, key file, keyring use), shared by all
+# SecretsManager instances of the process: a keyring lookup can be a D-Bus
+# round-trip
+_cipher_cache: Dict[Tuple[str, str, bool], Tuple[bytes, Fernet]] = {}
+_cipher_cache_lock = threading.Lock()
+_handed_off_key: Optional[bytes] = None
+
+
+def invalidate_key_cache() -> None:
+    """Forget cached master keys so the next SecretsManager reads the key again.
+
+    Called after rotate_master_key(); call it as well when the key may have
+    been rotated by another process.
+    """
+    global _handed_off_key
+    with _cipher_cache_lock:
+        _cipher_cache.clear()
+        _handed_off_key = None
+
+
+def _read_handed_off_key() -> Optional[bytes]:
+    """Master key passed through MASTER_KEY_FD_ENV (read once per process)."""
+    global _handed_off_key
+    fd_value = os.environ.pop(MASTER_KEY_FD_ENV, None)
+    if fd_value is not None:
+        try:
+            fd = int(fd_value)
+            chunks = []
+            while True:
+                chunk = os.read(fd, 4096)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            os.close(fd)
+            key = b''.join(chunks).strip()
+            Fernet(key)  # validate
+            _handed_off_key = key
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring master key from {MASTER_KEY_FD_ENV}: {e}")
+    return _handed_off_key
+
 
 class SecretType(Enum):
     """Types of secrets managed by the system."""
@@ -45,7 +98,7 @@ class Secret:
     id: str
     name: str
     type: SecretType
-    value: str  # Encrypted value
+    value: str  # Encrypted value; empty until first read from the vault log
     description: Optional[str]
     created_at: datetime
     updated_at: datetime
@@ -89,18 +142,46 @@ class SecretsManager:
         self.use_keyring = use_keyring and KEYRING_AVAILABLE
         self.service_name = "PersonalManager"
         self.secrets: Dict[str, Secret] = {}
-        self.audit_log: List[Dict[str, Any]] = []
+        self.audit = AuditLog(self.vault_path.with_suffix('.audit.log'))
+        self._cache_key = (self.service_name, str(self.master_key_path), self.use_keyring)
         self.cipher = self._initialize_encryption()
+        self.store = VaultStore(self.vault_path, self.cipher)
         self._load_vault()
 
     def _initialize_encryption(self) -> Fernet:
         """Initialize encryption cipher with master key.
 
+        The key is looked up once per process: a key handed off through
+        MASTER_KEY_FD_ENV wins, then the keyring or key file.
+
         Returns:
             Fernet cipher for encryption/decryption
         """
-        key = self._get_or_create_master_key()
-        return Fernet(key)
+        with _cipher_cache_lock:
+            cached = _cipher_cache.get(self._cache_key)
+            if cached is None:
+                key = _read_handed_off_key() or self._get_or_create_master_key()
+                cached = _cipher_cache[self._cache_key] = (key, Fernet(key))
+        return cached[1]
+
+    def master_key_fd(self) -> int:
+        """Pipe the unlocked master key to a child process.
+
+        Returns:
+            Inheritable read end of a pipe holding the key; pass it to the
+            child (``pass_fds``) and set MASTER_KEY_FD_ENV to its number
+        """
+        with _cipher_cache_lock:
+            cached = _cipher_cache.get(self._cache_key)
+        key = cached[0] if cached else self._get_or_create_master_key()
+        read_fd, write_fd = os.pipe()
+        try:
+            os.write(write_fd, key)
+        finally:
+            os.close(write_fd)
+        os.set_inheritable(read_fd, True)
+        self._log_audit_event("master_key_handed_off", {})
+        return read_fd
 
     def _get_or_create_master_key(self) -> bytes:
         """Get or create master encryption key using keyring when available.
@@ -158,11 +239,8 @@ class SecretsManager:
 
     def _store_key_to_file(self, key: bytes) -> None:
         """Store master key to file with secure permissions."""
-        self.master_key_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.master_key_path, 'wb') as f:
-            f.write(key)
-        # Restrict access to owner only
-        self.master_key_path.chmod(0o600)
+        # Restrict access to owner only, before the key is written
+        atomic_write(self.master_key_path, key, mode=0o600)
         self._log_audit_event("master_key_created", {"source": "file"})
 
     def _generate_master_key(self) -> bytes:
@@ -185,50 +263,119 @@ class SecretsManager:
         return key
 
     def _load_vault(self):
-        """Load and decrypt secrets vault."""
-        if self.vault_path.exists():
+        """Load the vault index; secret values are read on first access."""
+        try:
+            self._finish_pending_rotation()
             try:
-                with open(self.vault_path, 'rb') as f:
-                    encrypted_data = f.read()
+                self.store.open()
+            except InvalidToken:
+                # The key may have been rotated by another process since it was cached
+                invalidate_key_cache()
+                self.cipher = self.store.cipher = self._initialize_encryption()
+                self.store.open()
+            self.secrets = {
+                secret_id: self._deserialize_secret(meta)
+                for secret_id, meta in self.store.entries.items()
+            }
+        except Exception as e:
+            print(f"Warning: Failed to load secrets vault: {e}")
+            # Initialize empty vault on error
+            self.secrets = {}
 
-                # Decrypt vault
-                decrypted_data = self.cipher.decrypt(encrypted_data)
-                vault_data = json.loads(decrypted_data.decode())
+    def _save_secret(self, secret: Secret, value_changed: bool = True) -> None:
+        """Append one secret to the vault log.
 
-                # Load secrets
-                for secret_data in vault_data.get('secrets', []):
-                    secret = self._deserialize_secret(secret_data)
-                    self.secrets[secret.id] = secret
+        Args:
+            secret: Secret to persist
+            value_changed: Whether the encrypted value has to be written too
+        """
+        def write() -> List[str]:
+            meta = self._serialize_secret(secret)
+            value = meta.pop('value')
+            return self.store.put(meta, value if value_changed else None)
+
+        self._sync_secrets(self._write_vault(write, [secret]))
+
+    def _save_secrets(self, secrets: List[Secret]) -> None:
+        """Append several secrets (values included) with a single fsync."""
+        def write() -> List[str]:
+            items = []
+            for secret in secrets:
+                meta = self._serialize_secret(secret)
+                items.append((meta, meta.pop('value')))
+            return self.store.put_many(items)
+
+        changed = self._write_vault(write, secrets)
+        for secret in secrets:
+            self.secrets[secret.id] = secret
+        self._sync_secrets(changed)
+
+    def _delete_from_vault(self, secret_id: str) -> None:
+        """Append a deletion record to the vault log."""
+        self._sync_secrets(self._write_vault(lambda: self.store.delete(secret_id), []))
+
+    def _write_vault(self, write: Callable[[], List[str]], secrets: List[Secret]) -> List[str]:
+        """Run a vault write, retrying once if the master key was rotated.
+
+        Another process (or another instance) may have rotated the master key
+        since this one loaded it. The write then fails with InvalidToken before
+        anything is appended; the key and vault are loaded again, the values of
+        the secrets being written are re-encrypted with the new key, and the
+        write is retried.
 
-            except Exception as e:
-                print(f"Warning: Failed to load secrets vault: {e}")
-                # Initialize empty vault on error
-                self.secrets = {}
+        Args:
+            write: Performs the append and returns the ids changed by others
+            secrets: Secrets whose encrypted values are written
 
-    def _save_vault(self):
-        """Encrypt and save secrets vault."""
-        try:
-            # Serialize secrets
-            vault_data = {
-                'version': '1.0.0',
-                'updated_at': datetime.utcnow().isoformat(),
-                'secrets': [self._serialize_secret(s) for s in self.secrets.values()]
-            }
+        Returns:
+            Ids of the secrets changed by other processes
 
-            # Encrypt vault
-            data = json.dumps(vault_data).encode()
-            encrypted_data = self.cipher.encrypt(data)
+        Raises:
+            RuntimeError: If the vault could not be written
+        """
+        try:
+            try:
+                return write()
+            except InvalidToken:
+                old_cipher = self.cipher
+                invalidate_key_cache()
+                self._load_vault()
+                for secret in secrets:
+                    if secret.value:
+                        secret.value = self.cipher.encrypt(old_cipher.decrypt(secret.value.encode())).decode()
+                return write()
+        except Exception as e:
+            raise RuntimeError(f"Failed to save secrets vault: {e}")
 
-            # Save to file
-            self.vault_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.vault_path, 'wb') as f:
-                f.write(encrypted_data)
+    def _sync_secrets(self, secret_ids: List[str]) -> None:
+        """Reload secrets changed in the vault by other processes."""
+        for secret_id in secret_ids:
+            meta = self.store.entries.get(secret_id)
+            if meta is None:
+                self.secrets.pop(secret_id, None)
+            else:
+                self.secrets[secret_id] = self._deserialize_secret(meta)
 
-            # Restrict access
-            self.vault_path.chmod(0o600)
+    def refresh(self) -> List[str]:
+        """Pick up secrets changed by other processes (for long-running processes).
 
-        except Exception as e:
-            raise RuntimeError(f"Failed to save secrets vault: {e}")
+        Returns:
+            Ids of the secrets that changed
+        """
+        try:
+            changed = self.store.refresh()
+        except InvalidToken:
+            # The master key was rotated by another process
+            self._load_vault()
+            return list(self.secrets)
+        self._sync_secrets(changed)
+        return changed
+
+    def _encrypted_value(self, secret: Secret) -> str:
+        """Encrypted value of a secret, read from the vault log on first use."""
+        if not secret.value:
+            secret.value = self.store.read_value(secret.id) or ''
+        return secret.value
 
     def _serialize_secret(self, secret: Secret) -> Dict[str, Any]:
         """Serialize secret for storage."""
@@ -253,7 +400,7 @@ class SecretsManager:
             id=data['id'],
             name=data['name'],
             type=SecretType(data['type']),
-            value=data['value'],
+            value=data.get('value', ''),
             description=data.get('description'),
             created_at=datetime.fromisoformat(data['created_at']),
             updated_at=datetime.fromisoformat(data['updated_at']),
@@ -307,9 +454,9 @@ class SecretsManager:
             metadata=metadata or {}
         )
 
-        # Store and save
+        # Persist first: a failed append must not leave the secret in memory
+        self._save_secret(secret)
         self.secrets[secret.id] = secret
-        self._save_vault()
 
         return secret
 
@@ -337,7 +484,7 @@ class SecretsManager:
 
         # Decrypt and return
         try:
-            decrypted = self.cipher.decrypt(secret.value.encode())
+            decrypted = self.cipher.decrypt(self._encrypted_value(secret).encode())
             return decrypted.decode()
         except Exception as e:
             print(f"Error decrypting secret {secret_id}: {e}")
@@ -352,9 +499,9 @@ class SecretsManager:
         Returns:
             Decrypted secret value or None
         """
-        for secret in self.secrets.values():
-            if secret.name == name:
-                return self.get_secret(secret.id)
+        for secret_id in self.store.index.by_name(name):
+            if secret_id in self.secrets:
+                return self.get_secret(secret_id)
         return None
 
     def update_secret(self, secret_id: str, new_value: str) -> bool:
@@ -371,18 +518,27 @@ class SecretsManager:
         if not secret:
             return False
 
-        # Encrypt new value
-        encrypted_value = self.cipher.encrypt(new_value.encode()).decode()
+        self._replace_value(secret, new_value)
+        return True
 
-        # Update secret
-        secret.value = encrypted_value
-        secret.updated_at = datetime.utcnow()
-        if secret.rotation_period:
-            secret.last_rotated = datetime.utcnow()
+    def _replace_value(self, secret: Secret, new_value: str, **changes: Any) -> Secret:
+        """Persist a secret with a new value (and other field changes).
 
-        # Save changes
-        self._save_vault()
-        return True
+        The vault is written before this instance is changed, so a failed
+        write leaves the secret as it was.
+
+        Returns:
+            The updated secret
+        """
+        now = datetime.utcnow()
+        updated = replace(secret,
+                          value=self.cipher.encrypt(new_value.encode()).decode(),
+                          updated_at=now,
+                          last_rotated=now if secret.rotation_period else secret.last_rotated,
+                          **changes)
+        self._save_secret(updated)
+        self.secrets[updated.id] = updated
+        return updated
 
     def rotate_secret(self, secret_id: str, new_value: str) -> bool:
         """Rotate a secret with audit trail.
@@ -398,17 +554,16 @@ class SecretsManager:
         if not secret:
             return False
 
-        # Store rotation in metadata
-        if 'rotation_history' not in secret.metadata:
-            secret.metadata['rotation_history'] = []
-
-        secret.metadata['rotation_history'].append({
+        # Store rotation in metadata (of a copy, see _replace_value)
+        metadata = dict(secret.metadata)
+        metadata['rotation_history'] = list(metadata.get('rotation_history', [])) + [{
             'rotated_at': datetime.utcnow().isoformat(),
-            'previous_hash': hashlib.sha256(secret.value.encode()).hexdigest()
-        })
+            'previous_hash': hashlib.sha256(self._encrypted_value(secret).encode()).hexdigest()
+        }]
 
-        # Update secret
-        return self.update_secret(secret_id, new_value)
+        self._replace_value(secret, new_value, metadata=metadata)
+        self._log_audit_event("secret_rotated", {"secret_id": secret_id})
+        return True
 
     def delete_secret(self, secret_id: str) -> bool:
         """Delete a secret permanently.
@@ -420,8 +575,8 @@ class SecretsManager:
             True if deleted successfully
         """
         if secret_id in self.secrets:
-            del self.secrets[secret_id]
-            self._save_vault()
+            self._delete_from_vault(secret_id)
+            self.secrets.pop(secret_id, None)
             return True
         return False
 
@@ -441,20 +596,19 @@ class SecretsManager:
         """
         results = []
 
-        for secret in self.secrets.values():
-            # Filter by type
-            if secret_type and secret.type != secret_type:
-                continue
+        # Filter by type and tags
+        matching = self.store.index.matching(secret_type.value if secret_type else None, tags)
+        if matching is None:
+            candidates = list(self.secrets.values())
+        else:
+            candidates = sorted((self.secrets[sid] for sid in matching if sid in self.secrets),
+                                key=lambda secret: secret.created_at)
 
+        for secret in candidates:
             # Filter by expiration
             if not include_expired and secret.is_expired:
                 continue
 
-            # Filter by tags
-            if tags:
-                if not all(secret.tags.get(k) == v for k, v in tags.items()):
-                    continue
-
             # Add to results (without sensitive value)
             results.append({
                 'id': secret.id,
@@ -483,8 +637,9 @@ class SecretsManager:
         expiring = []
         threshold = datetime.utcnow() + timedelta(days=days)
 
-        for secret in self.secrets.values():
-            if secret.expires_at and secret.expires_at <= threshold:
+        for secret_id in self.store.index.expiring_before(threshold):
+            secret = self.secrets.get(secret_id)
+            if secret and secret.expires_at:
                 expiring.append({
                     'id': secret.id,
                     'name': secret.name,
@@ -503,8 +658,9 @@ class SecretsManager:
         """
         needing_rotation = []
 
-        for secret in self.secrets.values():
-            if secret.needs_rotation:
+        for secret_id in self.store.index.rotation_due_before(datetime.utcnow()):
+            secret = self.secrets.get(secret_id)
+            if secret and secret.needs_rotation:
                 needing_rotation.append({
                     'id': secret.id,
                     'name': secret.name,
@@ -522,75 +678,115 @@ class SecretsManager:
             password: Password for backup encryption
 
         Returns:
-            Encrypted backup data
+            Encrypted backup data (see export_backup_to())
         """
-        # Generate backup key from password
-        salt = os.urandom(16)
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
-        backup_cipher = Fernet(key)
-
-        # Prepare backup data
-        backup_data = {
-            'version': '1.0.0',
-            'created_at': datetime.utcnow().isoformat(),
-            'secrets': [self._serialize_secret(s) for s in self.secrets.values()]
-        }
+        buffer = io.BytesIO()
+        self.export_backup_to(buffer, password)
+        return buffer.getvalue()
 
-        # Encrypt backup
-        data = json.dumps(backup_data).encode()
-        encrypted_backup = backup_cipher.encrypt(data)
+    def export_backup_to(self, f: BinaryIO, password: str,
+                         progress: Optional[Callable[[int, int], None]] = None) -> int:
+        """Stream an encrypted backup of all secrets to a binary file.
 
-        # Include salt for key derivation
-        return salt + encrypted_backup
+        Secrets are read, decrypted and written in chunks (see
+        pm.security.backup), so memory does not grow with the vault.
+
+        Args:
+            f: Writable binary file
+            password: Password for backup encryption
+            progress: Called with (secrets written, total) after every chunk
+
+        Returns:
+            Number of secrets written
+        """
+        writer = BackupWriter(f, password)
+        total = len(self.secrets)
+        for secret_id, value in self.store.iter_values(list(self.secrets)):
+            secret = self.secrets.get(secret_id)
+            if secret is None:
+                continue
+            data = self._serialize_secret(secret)
+            data['value'] = self.cipher.decrypt((value or secret.value).encode()).decode()
+            writer.write(data)
+            if progress is not None and writer.count % CHUNK_SIZE == 0:
+                progress(writer.count, total)
+        writer.close()
+        if progress is not None:
+            progress(writer.count, total)
+
+        self._log_audit_event("backup_exported", {"secret_count": writer.count})
+        return writer.count
 
     def import_backup(self, backup_data: bytes, password: str) -> bool:
         """Import encrypted backup of secrets.
 
         Args:
-            backup_data: Encrypted backup data
+            backup_data: Encrypted backup data, chunked or legacy format
             password: Password for backup decryption
 
         Returns:
             True if import successful
         """
+        if is_chunked_backup(backup_data):
+            return self.import_backup_from(io.BytesIO(backup_data), password)
+
         try:
-            # Extract salt and encrypted data
+            # Legacy format: salt followed by one Fernet token of the whole vault,
+            # with values encrypted under the master key that was in use
             salt = backup_data[:16]
             encrypted_data = backup_data[16:]
 
             # Derive key from password
-            kdf = PBKDF2(
-                algorithm=hashes.SHA256(),
-                length=32,
-                salt=salt,
-                iterations=100000
-            )
-            key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
-            backup_cipher = Fernet(key)
+            backup_cipher = derive_cipher(password, salt)
 
             # Decrypt backup
             decrypted_data = backup_cipher.decrypt(encrypted_data)
             backup = json.loads(decrypted_data.decode())
 
-            # Import secrets
-            for secret_data in backup.get('secrets', []):
-                secret = self._deserialize_secret(secret_data)
-                self.secrets[secret.id] = secret
-
-            # Save imported secrets
-            self._save_vault()
+            # Import and save secrets
+            secrets = [self._deserialize_secret(data) for data in backup.get('secrets', [])]
+            self._save_secrets(secrets)
             return True
 
         except Exception as e:
             print(f"Failed to import backup: {e}")
             return False
 
+    def import_backup_from(self, f: BinaryIO, password: str,
+                           progress: Optional[Callable[[int, int], None]] = None) -> bool:
+        """Import a chunked backup from a binary file, one chunk at a time.
+
+        Every chunk is appended to the vault as it is read; secrets already
+        in the vault with the same id are replaced, so an interrupted import
+        can simply be run again.
+
+        Args:
+            f: Readable binary file
+            password: Password for backup decryption
+            progress: Called with (secrets imported, 0) after every chunk
+
+        Returns:
+            True if the whole backup was imported
+        """
+        imported = 0
+        try:
+            for chunk in read_backup(f, password):
+                secrets = []
+                for data in chunk:
+                    data['value'] = self.cipher.encrypt(data['value'].encode()).decode()
+                    secrets.append(self._deserialize_secret(data))
+                self._save_secrets(secrets)
+                imported += len(secrets)
+                if progress is not None:
+                    progress(imported, 0)
+        except Exception as e:
+            print(f"Failed to import backup: {e}")
+            self._log_audit_event("backup_import_failed", {"imported": imported, "error": str(e)})
+            return False
+
+        self._log_audit_event("backup_imported", {"secret_count": imported})
+        return True
+
     def _log_audit_event(self, event_type: str, details: Dict[str, Any]) -> None:
         """Log audit event for security monitoring."""
         event = {
@@ -600,47 +796,42 @@ class SecretsManager:
             'user': os.getenv('USER', 'unknown'),
             'platform': platform.system()
         }
-        self.audit_log.append(event)
+        self.audit.append(event)
 
-        # Keep only last 1000 events
-        if len(self.audit_log) > 1000:
-            self.audit_log = self.audit_log[-1000:]
-
-    def rotate_master_key(self) -> bool:
+    def rotate_master_key(self, progress: Optional[Callable[[int, int], None]] = None) -> bool:
         """Rotate the master encryption key.
 
+        The vault is re-encrypted record by record into new files that
+        replace the old ones only once complete (see VaultStore.rotate()).
+        An interrupted rotation is resumed by the next call, or completed on
+        the next load if it was interrupted after the new key was written.
+
+        Args:
+            progress: Called with (secrets re-encrypted, total) during rotation
+
         Returns:
             True if rotation successful
         """
         try:
-            # Generate new master key
-            new_key = self._generate_master_key()
-            new_cipher = Fernet(new_key)
-
-            # Re-encrypt all secrets with new key
-            for secret in self.secrets.values():
-                # Decrypt with old cipher
-                decrypted_value = self.cipher.decrypt(secret.value.encode())
-                # Re-encrypt with new cipher
-                secret.value = new_cipher.encrypt(decrypted_value).decode()
-
-            # Update cipher
-            old_cipher = self.cipher
-            self.cipher = new_cipher
-
-            # Store new key
-            key_id = f"{self.service_name}_master_key"
-            if self.use_keyring:
+            new_key = None
+            pending = self.store.pending_rotation()
+            if pending is not None:
                 try:
-                    encoded_key = base64.urlsafe_b64encode(new_key).decode()
-                    keyring.set_password(self.service_name, key_id, encoded_key)
-                except Exception:
-                    self._store_key_to_file(new_key)
-            else:
-                self._store_key_to_file(new_key)
+                    new_key = self.cipher.decrypt(pending['new_key'].encode())
+                except (InvalidToken, KeyError):
+                    self.store.abort_rotation()
+            if new_key is None:
+                # Generate new master key
+                new_key = self._generate_master_key()
+            new_cipher = Fernet(new_key)
 
-            # Save vault with re-encrypted secrets
-            self._save_vault()
+            self.store.rotate(new_cipher, {
+                # Lets the holder of the current key resume or finish the rotation
+                'new_key': self.cipher.encrypt(new_key).decode(),
+                # Recognizes the new key once it is the one in use
+                'key_check': new_cipher.encrypt(b'pm-vault').decode(),
+            }, lambda: self._store_master_key(new_key), progress)
+            self._use_master_key(new_key, new_cipher)
 
             self._log_audit_event("master_key_rotated", {
                 "secret_count": len(self.secrets)
@@ -653,6 +844,45 @@ class SecretsManager:
             self._log_audit_event("master_key_rotation_failed", {"error": str(e)})
             return False
 
+    def _finish_pending_rotation(self) -> None:
+        """Complete a rotation interrupted after its files were written."""
+        pending = self.store.pending_rotation()
+        if pending is None or pending.get('phase') != 'commit':
+            return
+
+        try:
+            new_key = self.cipher.decrypt(pending['new_key'].encode())
+        except InvalidToken:
+            # The new key was stored already and is the one we hold
+            self.cipher.decrypt(pending['key_check'].encode())
+            self.store.finish_rotation(None)
+        else:
+            self.store.finish_rotation(lambda: self._store_master_key(new_key))
+            self._use_master_key(new_key, Fernet(new_key))
+        self._log_audit_event("master_key_rotation_completed", {})
+
+    def _store_master_key(self, key: bytes) -> None:
+        """Store a new master key where the current one is kept."""
+        key_id = f"{self.service_name}_master_key"
+        if self.use_keyring:
+            try:
+                encoded_key = base64.urlsafe_b64encode(key).decode()
+                keyring.set_password(self.service_name, key_id, encoded_key)
+                return
+            except Exception:
+                pass
+        self._store_key_to_file(key)
+
+    def _use_master_key(self, key: bytes, cipher: Fernet) -> None:
+        """Switch this instance and the process key cache to a new master key."""
+        self.cipher = self.store.cipher = cipher
+        # Values are read again from the re-encrypted vault
+        for secret in self.secrets.values():
+            secret.value = ''
+        invalidate_key_cache()
+        with _cipher_cache_lock:
+            _cipher_cache[self._cache_key] = (key, cipher)
+
     def schedule_rotation(self, secret_id: str, rotation_period: timedelta) -> bool:
         """Schedule automatic rotation for a secret.
 
@@ -667,10 +897,9 @@ class SecretsManager:
         if not secret:
             return False
 
-        secret.rotation_period = rotation_period
-        secret.last_rotated = datetime.utcnow()
-
-        self._save_vault()
+        updated = replace(secret, rotation_period=rotation_period, last_rotated=datetime.utcnow())
+        self._save_secret(updated, value_changed=False)
+        self.secrets[secret_id] = updated
         self._log_audit_event("rotation_scheduled", {
             "secret_id": secret_id,
             "period_days": rotation_period.days
@@ -678,20 +907,28 @@ class SecretsManager:
 
         return True
 
-    def get_audit_log(self, limit: int = 100) -> List[Dict[str, Any]]:
+    def get_audit_log(self, limit: Optional[int] = 100, since: Optional[datetime] = None,
+                      until: Optional[datetime] = None,
+                      event_types: Optional[Collection[str]] = None) -> List[Dict[str, Any]]:
         """Get recent audit log entries.
 
+        Entries are read from the persisted trail of all processes, newest
+        first, so only as much of it is read as the query needs.
+
         Args:
-            limit: Maximum number of entries to return
+            limit: Maximum number of entries to return (None: all)
+            since: Only entries at or after this UTC time
+            until: Only entries before this UTC time
+            event_types: Only entries of these event types
 
         Returns:
-            List of audit log entries
+            List of audit log entries, oldest first
         """
-        return self.audit_log[-limit:] if self.audit_log else []
+        return self.audit.query(limit, since, until, event_types)
 
     def clear_audit_log(self) -> None:
         """Clear audit log (use with caution)."""
-        self.audit_log.clear()
+        self.audit.clear()
         self._log_audit_event("audit_log_cleared", {})
 
     def get_keyring_status(self) -> Dict[str, Any]:
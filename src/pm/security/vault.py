@@ -0,0 +1,559 @@
+"""Log-structured storage for the secrets vault.
+
+The vault is split in two files:
+
+``secrets.vault``
+    A checkpoint of the vault index: the metadata of every secret (no
+    values) and the location of its value in the log, encrypted as a whole.
+``secrets.vault.log``
+    An append-only log. The first line is a header naming the log
+    generation; every other line is one record, ``put`` (metadata and
+    value), ``meta`` (metadata only) or ``del``, each field encrypted on
+    its own.
+
+Opening the vault decrypts the checkpoint and replays only the records
+appended after it, so no secret value is decrypted until it is asked for.
+Writes append and fsync a single record; the checkpoint is rewritten every
+``CHECKPOINT_INTERVAL`` records, and the log is compacted once most of it is
+superseded. Both files are only ever replaced atomically, and a torn record
+at the end of the log (crash during an append) is ignored and cut off by the
+next writer. Appends from other processes are picked up before each write.
+
+The secondary indexes (see :mod:`pm.security.index`) are saved to
+``secrets.vault.index`` with each checkpoint, stamped with the log position
+they describe. They are only read when a query first needs them and brought
+up to date from the records replayed since; opening the vault does not pay
+for them.
+
+A version 1 vault (one encrypted JSON document holding all secrets) is
+migrated on first open; the original file is kept as ``secrets.vault.v1``.
+"""
+
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import uuid4
+
+from cryptography.fernet import Fernet, InvalidToken
+
+from pm.core.atomic import atomic_open, atomic_write, file_lock
+from pm.security.index import SecretIndex
+
+# Location of a record in the log: (offset, length)
+Location = Tuple[int, int]
+
+
+class VaultStore:
+    """Index checkpoint plus append-only record log of one vault."""
+
+    VERSION = '2.0.0'
+    LOG_FORMAT = 'pm-vault-log'
+    # Records appended between checkpoints
+    CHECKPOINT_INTERVAL = 64
+    # Compact when superseded records exceed this share of the log
+    COMPACT_RATIO = 0.5
+    COMPACT_MIN_BYTES = 1 << 20
+    # Records re-encrypted between fsyncs of a rotation
+    ROTATION_BATCH = 1000
+
+    def __init__(self, path: Path, cipher: Fernet):
+        """Initialize the store; call open() before use.
+
+        Args:
+            path: Checkpoint path; the log lives next to it
+            cipher: Cipher for checkpoint and records
+        """
+        self.path = path
+        self.log_path = path.with_name(path.name + '.log')
+        self.cipher = cipher
+        # Secret metadata by id, as produced by SecretsManager._serialize_secret
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.locations: Dict[str, Location] = {}
+        self.index_path = path.with_name(path.name + '.index')
+        self._index: Optional[SecretIndex] = None
+        # (generation, log offset) of the loaded checkpoint, and the changes
+        # replayed since as (offset, old, new), for bringing a saved index up
+        # to date
+        self._index_stamp: Optional[Tuple[str, int]] = None
+        self._index_pending: List[Tuple[int, Optional[Dict[str, Any]], Optional[Dict[str, Any]]]] = []
+        self._generation: Optional[str] = None
+        self._end = 0
+        self._since_checkpoint = 0
+        self._live_bytes = 0
+
+    # ----- reading -----
+
+    def open(self) -> None:
+        """Load the checkpoint and replay the log (migrating a v1 vault).
+
+        Raises:
+            cryptography.fernet.InvalidToken: The checkpoint does not match the key
+        """
+        self.entries, self.locations = {}, {}
+        self._index, self._index_stamp, self._index_pending = None, None, []
+        self._generation, self._end = None, 0
+
+        checkpoint = self._read_checkpoint()
+        if checkpoint is not None and not checkpoint.get('version', '').startswith('2'):
+            self._migrate_v1(checkpoint)
+            return
+
+        generation = self._read_log_header()
+        if checkpoint is not None and checkpoint.get('generation') == generation:
+            self.entries = checkpoint['secrets']
+            self.locations = {sid: tuple(loc) for sid, loc in checkpoint['locations'].items()}
+            self._generation = generation
+            self._end = checkpoint['log_offset']
+            # A saved index is only usable if it covers at least this checkpoint
+            self._index_stamp = (generation, self._end)
+        elif generation is not None:
+            # The log was compacted after this checkpoint was written: rebuild from it
+            self._generation = generation
+            self._end = self._header_length()
+
+        self._replay()
+        self._live_bytes = sum(length for _, length in self.locations.values())
+
+    @property
+    def index(self) -> SecretIndex:
+        """Secondary indexes, loaded or rebuilt (and saved) on first use."""
+        if self._index is None:
+            index = SecretIndex()
+            saved = self._read_index()
+            if saved is not None and self._index_stamp is not None and \
+                    saved.get('generation') == self._index_stamp[0] and \
+                    self._index_stamp[1] <= saved.get('log_offset', -1) <= self._end and \
+                    index.load(saved['index']):
+                for offset, old, new in self._index_pending:
+                    if offset >= saved['log_offset']:
+                        index.update(old, new)
+                self._index = index
+            else:
+                index.rebuild(self.entries)
+                self._index = index
+                if self._generation is not None:
+                    self._write_index()
+            self._index_pending = []
+        return self._index
+
+    def _read_index(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.index_path, 'rb') as f:
+                return json.loads(self.cipher.decrypt(f.read()))
+        except (OSError, ValueError, InvalidToken):
+            return None
+
+    def _update_index(self, offset: int, old: Optional[Dict[str, Any]],
+                      new: Optional[Dict[str, Any]]) -> None:
+        if self._index is not None:
+            self._index.update(old, new)
+        elif self._index_stamp is not None:
+            self._index_pending.append((offset, old, new))
+
+    def _write_index(self) -> None:
+        """Save the index, stamped with the log position it describes."""
+        index = {'generation': self._generation, 'log_offset': self._end,
+                 'index': self._index.to_dict()}
+        atomic_write(self.index_path, self.cipher.encrypt(json.dumps(index).encode()), mode=0o600)
+
+    def _read_checkpoint(self) -> Optional[Dict[str, Any]]:
+        if not self.path.exists():
+            return None
+        with open(self.path, 'rb') as f:
+            return json.loads(self.cipher.decrypt(f.read()).decode())
+
+    def _read_log_header(self) -> Optional[str]:
+        try:
+            with open(self.log_path, 'rb') as f:
+                header = json.loads(f.readline())
+        except (OSError, ValueError):
+            return None
+        if header.get('format') != self.LOG_FORMAT:
+            raise ValueError(f"Not a vault log: {self.log_path}")
+        return header['generation']
+
+    def _header_length(self) -> int:
+        with open(self.log_path, 'rb') as f:
+            return len(f.readline())
+
+    def _replay(self) -> List[str]:
+        """Apply records after the current end of the log.
+
+        Returns:
+            Ids of the secrets that changed
+        """
+        if self._generation is None:
+            return []
+        if self._read_log_header() != self._generation:
+            # Compacted by another process: reload everything
+            before = set(self.entries)
+            self.open()
+            return sorted(before | set(self.entries))
+
+        changed = []
+        with open(self.log_path, 'rb') as f:
+            f.seek(self._end)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # torn record from an interrupted append
+                try:
+                    record = json.loads(line)
+                    secret_id = self._apply(record, (self._end, len(line)))
+                except ValueError:
+                    break
+                self._end += len(line)
+                self._since_checkpoint += 1
+                changed.append(secret_id)
+        return changed
+
+    def _apply(self, record: Dict[str, Any], location: Location,
+               meta: Optional[Dict[str, Any]] = None) -> str:
+        secret_id = record['id']
+        op = record['op']
+        if op == 'del':
+            self._update_index(location[0], self.entries.pop(secret_id, None), None)
+            self.locations.pop(secret_id, None)
+            return secret_id
+
+        if meta is None:
+            meta = json.loads(self.cipher.decrypt(record['meta'].encode()))
+        self._update_index(location[0], self.entries.get(secret_id), meta)
+        self.entries[secret_id] = meta
+        if op == 'put':
+            self.locations[secret_id] = location
+        return secret_id
+
+    def read_value(self, secret_id: str) -> Optional[str]:
+        """Encrypted value of a secret (a Fernet token), read from the log."""
+        location = self.locations.get(secret_id)
+        if location is None:
+            return None
+        offset, length = location
+        with open(self.log_path, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.read(length))['value']
+
+    def iter_values(self, ids: Iterable[str]) -> Iterator[Tuple[str, Optional[str]]]:
+        """Encrypted values of many secrets, read through one file handle."""
+        with self._value_reader() as read_value:
+            for secret_id in ids:
+                yield secret_id, read_value(secret_id)
+
+    def refresh(self) -> List[str]:
+        """Pick up records appended by other processes.
+
+        Returns:
+            Ids of the secrets that changed
+        """
+        return self._replay()
+
+    # ----- writing -----
+
+    def put(self, meta: Dict[str, Any], value: Optional[str]) -> List[str]:
+        """Append a secret's metadata and, unless None, its encrypted value.
+
+        Returns:
+            Ids changed by other processes since the last read or write
+        """
+        return self.put_many([(meta, value)])
+
+    def put_many(self, items: Iterable[Tuple[Dict[str, Any], Optional[str]]]) -> List[str]:
+        """Append several secrets under one lock and one fsync (see put())."""
+        records = []
+        for meta, value in items:
+            record = {'op': 'put' if value is not None else 'meta', 'id': meta['id'],
+                      'meta': self.cipher.encrypt(json.dumps(meta).encode()).decode()}
+            if value is not None:
+                record['value'] = value
+            records.append((record, meta))
+        return self._append(records)
+
+    def delete(self, secret_id: str) -> List[str]:
+        """Append a deletion record."""
+        return self._append([({'op': 'del', 'id': secret_id}, None)])
+
+    def _append(self, records: List[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]) -> List[str]:
+        with file_lock(self.log_path):
+            if self._generation is None and self.log_path.exists():
+                # Another process started the log after we opened the vault
+                before = set(self.entries)
+                self.open()
+                changed = sorted(before | set(self.entries))
+            else:
+                changed = self._replay()
+            if self._generation is None:
+                self._start_log()
+
+            fd = os.open(self.log_path, os.O_WRONLY)
+            try:
+                # Cut off a torn record left by a crashed writer
+                os.ftruncate(fd, self._end)
+                os.lseek(fd, self._end, os.SEEK_SET)
+                for record, meta in records:
+                    line = (json.dumps(record, separators=(',', ':')) + '\n').encode()
+                    os.write(fd, line)
+                    previous = self.locations.get(record['id'])
+                    self._apply(record, (self._end, len(line)), meta)
+                    self._end += len(line)
+                    self._since_checkpoint += 1
+                    if record['op'] != 'meta':
+                        self._live_bytes -= previous[1] if previous else 0
+                        self._live_bytes += len(line) if record['op'] == 'put' else 0
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+            if self._end > self.COMPACT_MIN_BYTES and \
+                    self._live_bytes < self._end * (1 - self.COMPACT_RATIO):
+                self._compact_locked()
+            elif self._since_checkpoint >= self.CHECKPOINT_INTERVAL:
+                self._write_checkpoint()
+        return changed
+
+    def _start_log(self) -> None:
+        self._generation = uuid4().hex
+        header = json.dumps({'format': self.LOG_FORMAT, 'generation': self._generation}) + '\n'
+        atomic_write(self.log_path, header.encode(), mode=0o600)
+        self._end = len(header.encode())
+
+    def _write_checkpoint(self, path: Optional[Path] = None) -> None:
+        data = {
+            'version': self.VERSION,
+            'updated_at': datetime.utcnow().isoformat(),
+            'generation': self._generation,
+            'log_offset': self._end,
+            'secrets': self.entries,
+            'locations': self.locations,
+        }
+        if path is None and self._index is not None:
+            self._write_index()
+        atomic_write(path or self.path, self.cipher.encrypt(json.dumps(data).encode()), mode=0o600)
+        self._since_checkpoint = 0
+
+    def checkpoint(self) -> None:
+        """Write the checkpoint now (e.g. before exit of a long-running process)."""
+        with file_lock(self.log_path):
+            self._replay()
+            if self._generation is not None:
+                self._write_checkpoint()
+
+    def compact(self) -> None:
+        """Rewrite the log with one record per live secret and a new checkpoint."""
+        with file_lock(self.log_path):
+            self._replay()
+            self._compact_locked()
+
+    def _compact_locked(self, values: Optional[Dict[str, str]] = None) -> None:
+        """Stream the live records into a new log, then replace the old one.
+
+        Args:
+            values: Encrypted values by id instead of reading them from the log
+        """
+        generation = uuid4().hex
+        with self._value_reader() as read_value, \
+                atomic_open(self.log_path, binary=True, mode=0o600) as f:
+            locations = self._write_records(f, generation, sorted(self.entries), self.cipher,
+                                            values.get if values is not None else read_value)
+            end = f.tell()
+        self._switch_to(generation, locations, end)
+        self._write_checkpoint()
+
+    def _write_records(self, f: IO[bytes], generation: Optional[str], ids: Iterable[str],
+                       cipher: Fernet, value_of: Callable[[str], str],
+                       reencrypt: Optional[Callable[[str], str]] = None) -> Dict[str, Location]:
+        """Write one put record per secret to `f` (after a header, if `generation`)."""
+        if generation is not None:
+            f.write((json.dumps({'format': self.LOG_FORMAT, 'generation': generation}) + '\n').encode())
+        locations = {}
+        for secret_id in ids:
+            value = value_of(secret_id) or ''
+            record = {'op': 'put', 'id': secret_id,
+                      'meta': cipher.encrypt(json.dumps(self.entries[secret_id]).encode()).decode(),
+                      'value': reencrypt(value) if reencrypt is not None else value}
+            line = (json.dumps(record, separators=(',', ':')) + '\n').encode()
+            locations[secret_id] = (f.tell(), len(line))
+            f.write(line)
+        return locations
+
+    def _switch_to(self, generation: str, locations: Dict[str, Location], end: int) -> None:
+        # Offsets in the old log no longer match a saved index
+        self._index_stamp, self._index_pending = None, []
+        self.locations = locations
+        self._generation = generation
+        self._end = end
+        self._live_bytes = sum(length for _, length in locations.values())
+
+    @contextmanager
+    def _value_reader(self) -> Iterator[Callable[[str], Optional[str]]]:
+        """read_value() on a single open handle, for reading many values."""
+        try:
+            f = open(self.log_path, 'rb')
+        except FileNotFoundError:
+            yield lambda secret_id: None
+            return
+        with f:
+            def read(secret_id: str) -> Optional[str]:
+                location = self.locations.get(secret_id)
+                if location is None:
+                    return None
+                f.seek(location[0])
+                return json.loads(f.read(location[1]))['value']
+            yield read
+
+    # ----- master key rotation -----
+
+    @property
+    def _rotation_journal(self) -> Path:
+        return self.path.with_name(self.path.name + '.rotation')
+
+    @property
+    def _rotation_log(self) -> Path:
+        return self.log_path.with_name(self.log_path.name + '.rotating')
+
+    @property
+    def _rotation_checkpoint(self) -> Path:
+        return self.path.with_name(self.path.name + '.rotating')
+
+    def pending_rotation(self) -> Optional[Dict[str, Any]]:
+        """Journal of an interrupted rotate() (phase ``rewrite`` or ``commit``), if any."""
+        try:
+            with open(self._rotation_journal, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def rotate(self, new_cipher: Fernet, journal: Dict[str, Any],
+               commit_key: Callable[[], None],
+               progress: Optional[Callable[[int, int], None]] = None) -> None:
+        """Re-encrypt every record and the index under `new_cipher`.
+
+        Records are streamed into a new log in batches of ROTATION_BATCH;
+        after each batch the new log is fsynced and the journal notes how far
+        it got, so memory stays bounded and an interrupted rotation resumes
+        where it stopped (as long as the vault was not written in between).
+        The old files stay untouched until the new ones are complete:
+
+        1. phase ``rewrite``: records go to ``secrets.vault.log.rotating``
+        2. the new checkpoint goes to ``secrets.vault.rotating``, phase ``commit``
+        3. ``commit_key()`` stores the new master key
+        4. both files replace the old ones and the journal is removed
+
+        A crash before 3 leaves the old vault and key in use; a crash after
+        it is completed by finish_rotation().
+
+        Args:
+            new_cipher: Cipher of the new master key
+            journal: Data saved in the journal for finish_rotation(), e.g. the
+                new key wrapped by the old one
+            commit_key: Stores the new master key
+            progress: Called with (records done, total) after every batch
+        """
+        with file_lock(self.log_path):
+            self._replay()
+            ids = sorted(self.entries)
+            source = [self._generation, self._end]
+            state = self.pending_rotation()
+
+            if state is not None and state.get('phase') == 'rewrite' and \
+                    state.get('source') == source and self._rotation_log.exists():
+                done, locations = state['done'], self._scan_rotation_log(state['size'])
+            else:
+                state = dict(journal, phase='rewrite', source=source, generation=uuid4().hex,
+                             done=0, size=0)
+                done, locations = 0, {}
+                with open(self._rotation_log, 'wb') as f:
+                    os.fchmod(f.fileno(), 0o600)
+
+            with self._value_reader() as read_value, open(self._rotation_log, 'r+b') as f:
+                f.truncate(state['size'])
+                f.seek(state['size'])
+                while done < len(ids) or state['size'] == 0:
+                    batch = ids[done:done + self.ROTATION_BATCH]
+                    locations.update(self._write_records(
+                        f, state['generation'] if state['size'] == 0 else None, batch, new_cipher,
+                        read_value, lambda value: new_cipher.encrypt(
+                            self.cipher.decrypt(value.encode())).decode() if value else value))
+                    f.flush()
+                    os.fsync(f.fileno())
+                    done += len(batch)
+                    state.update(done=done, size=f.tell())
+                    atomic_write(self._rotation_journal, json.dumps(state), mode=0o600)
+                    if progress is not None:
+                        progress(done, len(ids))
+                end = f.tell()
+
+            old_cipher = self.cipher
+            try:
+                self.cipher = new_cipher
+                self._switch_to(state['generation'], locations, end)
+                self._write_checkpoint(self._rotation_checkpoint)
+                state['phase'] = 'commit'
+                atomic_write(self._rotation_journal, json.dumps(state), mode=0o600)
+                commit_key()
+            except Exception:
+                # The old key and files are still the ones in use
+                self.abort_rotation()
+                self.cipher = old_cipher
+                self.open()
+                raise
+            self._swap_rotated_files()
+
+    def finish_rotation(self, commit_key: Optional[Callable[[], None]]) -> None:
+        """Complete a rotation that crashed in phase ``commit``.
+
+        Args:
+            commit_key: Stores the new master key, or None when it is already
+                the one in use
+        """
+        with file_lock(self.log_path):
+            if commit_key is not None:
+                commit_key()
+            self._swap_rotated_files()
+
+    def abort_rotation(self) -> None:
+        """Discard an unfinished rotation in phase ``rewrite``."""
+        for path in (self._rotation_log, self._rotation_checkpoint, self._rotation_journal):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def _scan_rotation_log(self, size: int) -> Dict[str, Location]:
+        """Locations of the records already written to the rotation log."""
+        locations = {}
+        with open(self._rotation_log, 'rb') as f:
+            offset = len(f.readline())
+            for line in f:
+                if offset + len(line) > size:
+                    break
+                locations[json.loads(line)['id']] = (offset, len(line))
+                offset += len(line)
+        return locations
+
+    def _swap_rotated_files(self) -> None:
+        if self._rotation_log.exists():
+            os.replace(self._rotation_log, self.log_path)
+        if self._rotation_checkpoint.exists():
+            os.replace(self._rotation_checkpoint, self.path)
+        # Encrypted under the old key; rebuilt and saved again on demand
+        if self.index_path.exists():
+            self.index_path.unlink()
+        self._rotation_journal.unlink()
+
+    # ----- migration -----
+
+    def _migrate_v1(self, vault: Dict[str, Any]) -> None:
+        """Move a v1 vault (all secrets in one document) into the log."""
+        with open(self.path, 'rb') as f:
+            atomic_write(self.path.with_name(self.path.name + '.v1'), f.read(), mode=0o600)
+
+        values = {}
+        for secret in vault.get('secrets', []):
+            self.entries[secret['id']] = {k: v for k, v in secret.items() if k != 'value'}
+            values[secret['id']] = secret['value']
+
+        with file_lock(self.log_path):
+            self._compact_locked(values)
@@ -1,17 +1,51 @@
 """每日任务追踪存储系统
 
 追踪每日任务完成状态，特别是未完成任务的延续
+
+记录保存在 SQLite（daily_tasks.db）中，按日期、source_id 和分类建立索引：
+单条状态更新只改一行，跨日期查询不必逐个打开每天的文件。旧版每天一个
+JSON 文件的数据在首次打开时批量导入，原文件移到 migrated/ 目录。
 """
 
 import json
+import shutil
+import sqlite3
+from contextlib import contextmanager
 from datetime import datetime, date, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass, asdict
+from typing import Dict, Iterator, List, Optional, Any, Tuple
+from dataclasses import dataclass, asdict, fields
 import structlog
+from pm.core.profiling import timed
 
 logger = structlog.get_logger()
 
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS days (
+    date TEXT PRIMARY KEY,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS daily_tasks (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    task_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    category TEXT NOT NULL,
+    due_date TEXT,
+    planned_date TEXT,
+    completed INTEGER NOT NULL DEFAULT 0,
+    completed_at TEXT,
+    carried_over_from TEXT,
+    notes TEXT,
+    source_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_daily_tasks_date ON daily_tasks (date, position);
+CREATE INDEX IF NOT EXISTS idx_daily_tasks_task ON daily_tasks (date, task_id);
+CREATE INDEX IF NOT EXISTS idx_daily_tasks_source ON daily_tasks (source_id, date);
+CREATE INDEX IF NOT EXISTS idx_daily_tasks_category ON daily_tasks (category, date);
+"""
+
 
 @dataclass
 class DailyTaskRecord:
@@ -34,10 +68,26 @@ class DailyTaskRecord:
     def from_dict(cls, data: Dict[str, Any]) -> 'DailyTaskRecord':
         return cls(**data)
 
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> 'DailyTaskRecord':
+        data = {name: row[name] for name in _RECORD_FIELDS}
+        data['completed'] = bool(data['completed'])
+        return cls(**data)
+
+    def to_row(self, date_str: str, position: int) -> Tuple[Any, ...]:
+        return (date_str, position, *(getattr(self, name) for name in _RECORD_FIELDS))
+
+
+_RECORD_FIELDS = [f.name for f in fields(DailyTaskRecord)]
+_COLUMNS = ", ".join(["date", "position"] + _RECORD_FIELDS)
+_PLACEHOLDERS = ", ".join("?" * (len(_RECORD_FIELDS) + 2))
+
 
 class DailyTaskTracker:
     """每日任务追踪器"""
 
+    DB_FILE = "daily_tasks.db"
+
     def __init__(self, data_dir: Optional[Path] = None):
         """初始化追踪器
 
@@ -49,15 +99,81 @@ class DailyTaskTracker:
 
         self.data_dir = data_dir
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.data_dir / self.DB_FILE
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+        if any(self.data_dir.glob("????-??-??.json")):
+            self.migrate_json_files()
 
         logger.info("Daily task tracker initialized", data_dir=str(self.data_dir))
 
-    def _get_date_file(self, date_str: str) -> Path:
-        """获取指定日期的数据文件路径"""
-        return self.data_dir / f"{date_str}.json"
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """一次操作一个连接，退出时提交（出错回滚）并关闭"""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _write_day(conn: sqlite3.Connection, date_str: str, tasks: List[DailyTaskRecord]) -> None:
+        conn.execute("DELETE FROM daily_tasks WHERE date = ?", (date_str,))
+        conn.executemany(
+            f"INSERT INTO daily_tasks ({_COLUMNS}) VALUES ({_PLACEHOLDERS})",
+            [task.to_row(date_str, position) for position, task in enumerate(tasks)]
+        )
+        conn.execute("INSERT OR REPLACE INTO days (date, updated_at) VALUES (?, ?)",
+                     (date_str, datetime.now().isoformat()))
+
+    @timed("daily_tasks.migrate", "io")
+    def migrate_json_files(self) -> int:
+        """把旧版每天一个 JSON 文件的记录批量导入数据库
+
+        全部文件在一个事务中导入，成功后移到 data_dir/migrated/。
 
+        Returns:
+            导入的天数
+        """
+        files = sorted(self.data_dir.glob("????-??-??.json"))
+        days = []
+        for file_path in files:
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                days.append((file_path.stem, [DailyTaskRecord.from_dict(t) for t in data.get("tasks", [])]))
+            except Exception as e:
+                logger.error("Skipping unreadable daily tasks file", file=str(file_path), error=str(e))
+
+        try:
+            with self._connect() as conn:
+                for date_str, tasks in days:
+                    self._write_day(conn, date_str, tasks)
+        except sqlite3.Error as e:
+            logger.error("Failed to migrate daily task files", error=str(e))
+            return 0
+
+        migrated_dir = self.data_dir / "migrated"
+        migrated_dir.mkdir(exist_ok=True)
+        for file_path in files:
+            shutil.move(str(file_path), str(migrated_dir / file_path.name))
+
+        logger.info("Migrated daily task files to SQLite", days=len(days))
+        return len(days)
+
+    def has_day(self, date_str: str) -> bool:
+        """某天是否已有记录（即使为空列表）"""
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM days WHERE date = ?", (date_str,)).fetchone() is not None
+
+    @timed("daily_tasks.save", "io")
     def save_daily_tasks(self, date_str: str, tasks: List[DailyTaskRecord]) -> bool:
-        """保存某天的任务记录
+        """保存某天的任务记录（整天替换）
 
         Args:
             date_str: 日期字符串 (YYYY-MM-DD)
@@ -67,16 +183,8 @@ class DailyTaskTracker:
             是否保存成功
         """
         try:
-            file_path = self._get_date_file(date_str)
-
-            data = {
-                "date": date_str,
-                "updated_at": datetime.now().isoformat(),
-                "tasks": [task.to_dict() for task in tasks]
-            }
-
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            with self._connect() as conn:
+                self._write_day(conn, date_str, tasks)
 
             logger.info("Daily tasks saved", date=date_str, task_count=len(tasks))
             return True
@@ -85,6 +193,7 @@ class DailyTaskTracker:
             logger.error("Failed to save daily tasks", date=date_str, error=str(e))
             return False
 
+    @timed("daily_tasks.load", "io")
     def load_daily_tasks(self, date_str: str) -> List[DailyTaskRecord]:
         """加载某天的任务记录
 
@@ -95,16 +204,12 @@ class DailyTaskTracker:
             任务记录列表
         """
         try:
-            file_path = self._get_date_file(date_str)
-
-            if not file_path.exists():
-                return []
-
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT * FROM daily_tasks WHERE date = ? ORDER BY position", (date_str,)
+                ).fetchall()
 
-            tasks = [DailyTaskRecord.from_dict(task_data)
-                    for task_data in data.get("tasks", [])]
+            tasks = [DailyTaskRecord.from_row(row) for row in rows]
 
             logger.info("Daily tasks loaded", date=date_str, task_count=len(tasks))
             return tasks
@@ -122,13 +227,21 @@ class DailyTaskTracker:
         Returns:
             未完成任务列表
         """
-        tasks = self.load_daily_tasks(date_str)
-        incomplete = [task for task in tasks if not task.completed]
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT * FROM daily_tasks WHERE date = ? AND completed = 0 ORDER BY position",
+                    (date_str,)
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.error("Failed to load incomplete tasks", date=date_str, error=str(e))
+            return []
+
+        incomplete = [DailyTaskRecord.from_row(row) for row in rows]
 
         logger.info("Incomplete tasks retrieved",
                    date=date_str,
-                   incomplete_count=len(incomplete),
-                   total_count=len(tasks))
+                   incomplete_count=len(incomplete))
 
         return incomplete
 
@@ -184,10 +297,9 @@ class DailyTaskTracker:
         yesterday = today - timedelta(days=1)
         yesterday_str = yesterday.isoformat()
 
-        # 检查今天的文件是否已存在
-        today_file = self.data_dir / f"{today_str}.json"
-        if today_file.exists():
-            logger.debug("Today's tasks file already exists", date=today_str)
+        # 检查今天的记录是否已存在
+        if self.has_day(today_str):
+            logger.debug("Today's tasks already exist", date=today_str)
             return True
 
         logger.info("Creating today's tasks file", date=today_str)
@@ -196,7 +308,7 @@ class DailyTaskTracker:
         today_tasks = []
 
         # 1. 延续昨天未完成的普通任务（不包括习惯任务）
-        if (self.data_dir / f"{yesterday_str}.json").exists():
+        if self.has_day(yesterday_str):
             incomplete = self.get_incomplete_tasks(yesterday_str)
             for task in incomplete:
                 # 习惯任务不延续，每天重新生成
@@ -288,21 +400,22 @@ class DailyTaskTracker:
         Returns:
             是否更新成功
         """
-        tasks = self.load_daily_tasks(date_str)
-
-        updated = False
-        for task in tasks:
-            if task.task_id == task_id:
-                task.completed = completed
-                if completed:
-                    task.completed_at = datetime.now().isoformat()
-                else:
-                    task.completed_at = None
-                updated = True
-                break
+        try:
+            with self._connect() as conn:
+                # 同一天有重复 task_id 时只更新第一条
+                cursor = conn.execute(
+                    """UPDATE daily_tasks SET completed = ?, completed_at = ?
+                       WHERE id = (SELECT id FROM daily_tasks WHERE date = ? AND task_id = ?
+                                   ORDER BY position LIMIT 1)""",
+                    (int(completed), datetime.now().isoformat() if completed else None,
+                     date_str, task_id)
+                )
+                updated = cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error("Failed to update task status", date=date_str, task_id=task_id, error=str(e))
+            return False
 
         if updated:
-            self.save_daily_tasks(date_str, tasks)
             logger.info("Task status updated",
                        date=date_str,
                        task_id=task_id,
@@ -364,44 +477,174 @@ class DailyTaskTracker:
         if date_str is None:
             date_str = date.today().isoformat()
 
-        # 获取现有任务（保留完成状态）
-        existing_tasks = self.load_daily_tasks(date_str)
-        existing_by_id = {t.source_id: t for t in existing_tasks if t.source_id}
-
-        # 转换Google Tasks为记录
-        daily_records = []
-        for gt in google_tasks:
-            # 获取分类
-            category = gt.get_task_category()
-
-            # 检查是否已存在
-            if gt.task_id in existing_by_id:
-                # 更新现有任务
-                record = existing_by_id[gt.task_id]
-                record.title = gt.get_clean_title()
-                record.completed = gt.is_completed
-                if gt.is_completed and gt.completed:
-                    record.completed_at = gt.completed.isoformat()
-            else:
-                # 创建新记录
-                record = DailyTaskRecord(
-                    task_id=f"gt_{gt.task_id[:8]}",
-                    title=gt.get_clean_title(),
-                    category=category.value,
-                    due_date=gt.due.isoformat() if gt.due else None,
-                    planned_date=date_str,
-                    completed=gt.is_completed,
-                    completed_at=gt.completed.isoformat() if gt.completed else None,
-                    source_id=gt.task_id
-                )
-
-            daily_records.append(record)
+        # 按 source_id 对比，只写入有变化的行，不重写整天
+        inserted = changed = 0
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM daily_tasks WHERE date = ? ORDER BY position", (date_str,)
+            ).fetchall()
+            existing_by_id = {row['source_id']: row for row in rows if row['source_id']}
+            kept = set()
+
+            for position, gt in enumerate(google_tasks):
+                row = existing_by_id.get(gt.task_id)
+                if row is not None and row['id'] not in kept:
+                    # 更新现有任务（保留其他字段）
+                    kept.add(row['id'])
+                    completed_at = row['completed_at']
+                    if gt.is_completed and gt.completed:
+                        completed_at = gt.completed.isoformat()
+                    values = (position, gt.get_clean_title(), int(gt.is_completed), completed_at)
+                    if values != (row['position'], row['title'], row['completed'], row['completed_at']):
+                        conn.execute(
+                            """UPDATE daily_tasks SET position = ?, title = ?, completed = ?, completed_at = ?
+                               WHERE id = ?""",
+                            (*values, row['id'])
+                        )
+                        changed += 1
+                else:
+                    # 创建新记录
+                    record = DailyTaskRecord(
+                        task_id=f"gt_{gt.task_id[:8]}",
+                        title=gt.get_clean_title(),
+                        category=gt.get_task_category().value,
+                        due_date=gt.due.isoformat() if gt.due else None,
+                        planned_date=date_str,
+                        completed=gt.is_completed,
+                        completed_at=gt.completed.isoformat() if gt.completed else None,
+                        source_id=gt.task_id
+                    )
+                    conn.execute(f"INSERT INTO daily_tasks ({_COLUMNS}) VALUES ({_PLACEHOLDERS})",
+                                 record.to_row(date_str, position))
+                    inserted += 1
 
-        # 保存记录
-        self.save_daily_tasks(date_str, daily_records)
+            # 不在 Google Tasks 中的记录不再保留
+            removed = [(row['id'],) for row in rows if row['id'] not in kept]
+            conn.executemany("DELETE FROM daily_tasks WHERE id = ?", removed)
+            conn.execute("INSERT OR REPLACE INTO days (date, updated_at) VALUES (?, ?)",
+                         (date_str, datetime.now().isoformat()))
 
         logger.info("Synced from Google Tasks",
                    date=date_str,
-                   task_count=len(daily_records))
+                   task_count=len(google_tasks),
+                   inserted=inserted,
+                   changed=changed,
+                   removed=len(removed))
+
+        return len(google_tasks)
+
+    def find_by_source_id(self, source_id: str) -> List[Tuple[str, DailyTaskRecord]]:
+        """某个 Google 任务在各天的记录，按日期排序
+
+        Returns:
+            [(日期, 记录), ...]
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM daily_tasks WHERE source_id = ? ORDER BY date, position", (source_id,)
+            ).fetchall()
+        return [(row['date'], DailyTaskRecord.from_row(row)) for row in rows]
+
+    def load_range(self, start_date: str, end_date: str,
+                   category: Optional[str] = None) -> Dict[str, List[DailyTaskRecord]]:
+        """[start_date, end_date] 内各天的记录，可按分类过滤
 
-        return len(daily_records)
\ No newline at end of file
+        Returns:
+            {日期: 记录列表}，只包含有记录的日期
+        """
+        query = "SELECT * FROM daily_tasks WHERE date BETWEEN ? AND ?"
+        params: List[Any] = [start_date, end_date]
+        if category is not None:
+            query += " AND category = ?"
+            params.append(category)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY date, position", params).fetchall()
+
+        result: Dict[str, List[DailyTaskRecord]] = {}
+        for row in rows:
+            result.setdefault(row['date'], []).append(DailyTaskRecord.from_row(row))
+        return result
+
+    # SQLite 中各分组方式对应的键表达式
+    # 周按 ISO 8601（周一开始，YYYY-Www）：所属周的周四决定年份与周数
+    _GROUP_KEYS = {
+        "category": "category",
+        "day": "date",
+        "week": ("strftime('%Y', date, '-3 days', 'weekday 4') || '-W' || "
+                 "printf('%02d', (strftime('%j', date, '-3 days', 'weekday 4') - 1) / 7 + 1)"),
+        "month": "substr(date, 1, 7)",
+    }
+
+    @timed("daily_tasks.stats", "io")
+    def completion_stats(self, start_date: str, end_date: str,
+                         group_by: str = "category") -> List[Dict[str, Any]]:
+        """[start_date, end_date] 内的完成情况，在数据库中聚合
+
+        Args:
+            start_date: 开始日期 (YYYY-MM-DD)
+            end_date: 结束日期 (YYYY-MM-DD，含)
+            group_by: category / day / week / month
+
+        Returns:
+            [{"key", "total", "completed", "carried_over", "completion_rate"}, ...]，按键排序
+        """
+        if group_by not in self._GROUP_KEYS:
+            raise ValueError(f"group_by 必须是 {', '.join(self._GROUP_KEYS)} 之一")
+
+        key = self._GROUP_KEYS[group_by]
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""SELECT {key} AS key, COUNT(*) AS total, SUM(completed) AS completed,
+                           COUNT(carried_over_from) AS carried_over
+                    FROM daily_tasks WHERE date BETWEEN ? AND ?
+                    GROUP BY key ORDER BY key""",
+                (start_date, end_date)
+            ).fetchall()
+
+        return [
+            {
+                "key": row['key'],
+                "total": row['total'],
+                "completed": row['completed'],
+                "carried_over": row['carried_over'],
+                "completion_rate": row['completed'] / row['total'] if row['total'] else 0.0,
+            }
+            for row in rows
+        ]
+
+    @timed("daily_tasks.stats", "io")
+    def carry_over_chains(self, start_date: str, end_date: str, min_days: int = 2,
+                          limit: int = 20) -> List[Dict[str, Any]]:
+        """被一天天延续下去的任务，延续天数多的在前
+
+        同一任务的各天记录通过 source_id（或去掉 _carried 后缀的 task_id）关联，
+        只统计至少延续过一次、出现不少于 min_days 天的任务。习惯每天重新生成，不计入。
+
+        Returns:
+            [{"key", "title", "first_date", "last_date", "days", "completed"}, ...]
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                """SELECT COALESCE(source_id, REPLACE(task_id, '_carried', '')) AS key,
+                          MAX(title) AS title, MIN(date) AS first_date, MAX(date) AS last_date,
+                          COUNT(DISTINCT date) AS days, MAX(completed) AS completed
+                   FROM daily_tasks
+                   WHERE date BETWEEN ? AND ? AND category != 'habit'
+                   GROUP BY key
+                   HAVING COUNT(carried_over_from) > 0 AND COUNT(DISTINCT date) >= ?
+                   ORDER BY days DESC, first_date
+                   LIMIT ?""",
+                (start_date, end_date, min_days, limit)
+            ).fetchall()
+
+        return [
+            {
+                "key": row['key'],
+                "title": row['title'],
+                "first_date": row['first_date'],
+                "last_date": row['last_date'],
+                "days": row['days'],
+                "completed": bool(row['completed']),
+            }
+            for row in rows
+        ]
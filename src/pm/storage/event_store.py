@@ -0,0 +1,136 @@
+"""按时间索引的日程存储
+
+把一批日程按开始时间排好序，用二分查找回答时间范围、重叠和空闲时段查询，
+供 cal / today / free 共用，不必每次渲染都重新分组排序或重新请求 API。
+"""
+
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from pm.integrations.google_calendar import CalendarEvent
+
+
+@dataclass(frozen=True)
+class TimeSlot:
+    """一个时间段 [start, end)"""
+    start: datetime
+    end: datetime
+
+    @property
+    def minutes(self) -> int:
+        return int((self.end - self.start).total_seconds() // 60)
+
+
+def local_time(day: date, hours: float = 0) -> datetime:
+    """本地时区某天 0 点之后 `hours` 小时（按墙上时间计），带时区"""
+    return (datetime.combine(day, time.min) + timedelta(hours=hours)).astimezone()
+
+
+def local_day_bounds(day: date) -> Tuple[datetime, datetime]:
+    """本地时区某天的 [0:00, 次日0:00)，带时区"""
+    return local_time(day), local_time(day + timedelta(days=1))
+
+
+class EventStore:
+    """按开始时间排序的日程索引
+
+    查询 [lo, hi) 时，与之重叠的事件开始时间必然在 (lo - 最长持续时间, hi)
+    之内，先用二分查找定位这段，再按结束时间过滤，复杂度 O(log n + k)。
+    """
+
+    def __init__(self, events: Iterable['CalendarEvent'] = ()):
+        self._events: List['CalendarEvent'] = sorted(events, key=lambda e: e.start_time)
+        self._starts = [event.start_time for event in self._events]
+        self._max_duration = max(
+            (event.end_time - event.start_time for event in self._events),
+            default=timedelta(0)
+        )
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __iter__(self):
+        return iter(self._events)
+
+    def add(self, event: 'CalendarEvent') -> None:
+        """插入一个事件，保持有序"""
+        index = bisect_left(self._starts, event.start_time)
+        self._starts.insert(index, event.start_time)
+        self._events.insert(index, event)
+        self._max_duration = max(self._max_duration, event.end_time - event.start_time)
+
+    def between(self, start: datetime, end: datetime) -> List['CalendarEvent']:
+        """与 [start, end) 有重叠的事件，按开始时间排序"""
+        first = bisect_left(self._starts, start - self._max_duration)
+        last = bisect_left(self._starts, end)
+        return [event for event in self._events[first:last] if event.end_time > start]
+
+    def starting_between(self, start: datetime, end: datetime) -> List['CalendarEvent']:
+        """开始时间落在 [start, end) 内的事件"""
+        return self._events[bisect_left(self._starts, start):bisect_left(self._starts, end)]
+
+    def on_date(self, day: date) -> List['CalendarEvent']:
+        """本地时区某天开始的事件"""
+        return self.starting_between(*local_day_bounds(day))
+
+    def conflicts(self, start: Optional[datetime] = None,
+                  end: Optional[datetime] = None) -> List[Tuple['CalendarEvent', 'CalendarEvent']]:
+        """时间重叠的事件对（全天事件除外）
+
+        按开始时间扫描，维护尚未结束的事件，每个事件只与它们比较。
+        """
+        events = self._events if start is None or end is None else self.between(start, end)
+        active: List['CalendarEvent'] = []
+        pairs = []
+        for event in events:
+            if event.all_day:
+                continue
+            active = [other for other in active if other.end_time > event.start_time]
+            pairs.extend((other, event) for other in active)
+            active.append(event)
+        return pairs
+
+    def busy(self, start: datetime, end: datetime) -> List[TimeSlot]:
+        """[start, end) 内被占用的时间段（已合并重叠，忽略全天事件）"""
+        merged: List[TimeSlot] = []
+        for event in self.between(start, end):
+            if event.all_day:
+                continue
+            slot_start = max(event.start_time, start)
+            slot_end = min(event.end_time, end)
+            if merged and slot_start <= merged[-1].end:
+                if slot_end > merged[-1].end:
+                    merged[-1] = TimeSlot(merged[-1].start, slot_end)
+            else:
+                merged.append(TimeSlot(slot_start, slot_end))
+        return merged
+
+    def free_slots(self, start: datetime, end: datetime, min_minutes: int = 0) -> List[TimeSlot]:
+        """[start, end) 内的空闲时段，短于 min_minutes 的忽略"""
+        slots = []
+        cursor = start
+        for slot in self.busy(start, end) + [TimeSlot(end, end)]:
+            if slot.start > cursor:
+                free = TimeSlot(cursor, slot.start)
+                if free.minutes >= min_minutes:
+                    slots.append(free)
+            cursor = max(cursor, slot.end)
+        return slots
+
+    def free_slots_by_day(self, first_day: date, days: int, day_start_hour: int,
+                          day_end_hour: int, min_minutes: int = 0) -> List[Tuple[date, List[TimeSlot]]]:
+        """连续多天在工作时间 [day_start_hour, day_end_hour) 内的空闲时段
+
+        今天的时段从当前时间开始计算。
+        """
+        now = datetime.now().astimezone()
+        result = []
+        for offset in range(days):
+            day = first_day + timedelta(days=offset)
+            start = max(local_time(day, day_start_hour), now)
+            end = local_time(day, day_end_hour)
+            result.append((day, self.free_slots(start, end, min_minutes) if start < end else []))
+        return result
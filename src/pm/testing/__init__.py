@@ -0,0 +1,11 @@
+"""PersonalManager 测试与基准工具
+
+提供本地模拟的 Google API 服务，用于负载、延迟和重试行为测试
+"""
+
+from .fake_google import FakeGoogleServer, FaultProfile
+
+__all__ = [
+    'FakeGoogleServer',
+    'FaultProfile',
+]
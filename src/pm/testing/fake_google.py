@@ -0,0 +1,850 @@
+"""In-process fake Google Tasks / Calendar / OAuth server
+
+A faithful-enough stand-in for the endpoints used by google_tasks.py,
+google_calendar.py and oauth_manager.py, for load, latency and retry testing
+without network access. Point the integrations at it with::
+
+    PM_GOOGLE_API_BASE_URL=<server.base_url>
+    PM_GOOGLE_OAUTH_TOKEN_URL=<server.token_url>
+
+Implemented:
+    - Tasks: task lists and tasks (list/get/insert/patch/update/delete/clear),
+      maxResults/pageToken pagination, showCompleted/showHidden/showDeleted,
+      updatedMin/dueMin/dueMax filters, ETags with If-Match / If-None-Match
+    - Partial responses: ``fields=`` masks such as ``items(id,start/dateTime)``
+    - gzip response bodies when the client sends ``Accept-Encoding: gzip``
+    - Calendar: calendarList, events (list/get/insert/patch/delete), time
+      window filtering, pagination and incremental sync via syncToken (410
+      when a token is no longer valid)
+    - Batch: multipart/mixed requests on /batch, /batch/tasks/v1 and
+      /batch/calendar/v3
+    - OAuth: /token (authorization_code and refresh_token grants), /revoke
+    - Faults: fixed and jittered latency, 503 error rate, 429 rate limiting
+      (random or every Nth request) with Retry-After
+
+Run standalone with ``python -m pm.testing.fake_google --port 8765``.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+from uuid import uuid4
+
+JsonBody = Optional[Dict[str, Any]]
+Reply = Tuple[int, Dict[str, str], bytes]
+
+STATUS_TEXT = {
+    200: "OK", 204: "No Content", 304: "Not Modified", 400: "Bad Request",
+    401: "Unauthorized", 404: "Not Found", 410: "Gone", 412: "Precondition Failed",
+    429: "Too Many Requests", 503: "Service Unavailable",
+}
+
+
+@dataclass
+class FaultProfile:
+    """Injected latency and failures, applied once per HTTP request
+
+    Attributes:
+        latency_ms: Fixed delay added to every response
+        jitter_ms: Extra uniformly distributed delay in [0, jitter_ms]
+        error_rate: Fraction of requests answered with 503
+        rate_limit_rate: Fraction of requests answered with 429
+        rate_limit_every: Answer every Nth request with 429 (0 = off)
+        retry_after: Retry-After seconds sent with 429/503
+        seed: Seed for the random choices, for reproducible runs
+    """
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    rate_limit_every: int = 0
+    retry_after: float = 1.0
+    seed: int = 0
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _rfc3339(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.") + \
+        f"{value.microsecond // 1000:03d}Z"
+
+
+def _parse_time(value: str) -> datetime:
+    if len(value) == 10:
+        return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _flag(query: Dict[str, str], name: str, default: bool) -> bool:
+    if name not in query:
+        return default
+    return query[name].lower() == "true"
+
+
+def _public(resource: Dict[str, Any]) -> Dict[str, Any]:
+    """Strip internal bookkeeping keys (prefixed with "_")"""
+    return {k: v for k, v in resource.items() if not k.startswith("_")}
+
+
+def parse_field_mask(mask: str) -> Dict[str, Any]:
+    """Parse a partial-response mask into a tree of {field: subtree or None}
+
+    Supports the syntax subset clients use: comma-separated fields, ``a/b``
+    paths and ``a(b,c)`` sub-selections. None selects the whole value.
+    """
+    tokens = re.findall(r"[^,()/\s]+|[,()/]", mask)
+    pos = 0
+
+    def subtree(node: Dict[str, Any], name: str) -> Dict[str, Any]:
+        if name in node and node[name] is None:
+            return {}  # already fully selected, parse and discard
+        return node.setdefault(name, {})
+
+    def parse_item(node: Dict[str, Any]) -> None:
+        nonlocal pos
+        name = tokens[pos]
+        pos += 1
+        following = tokens[pos] if pos < len(tokens) else ""
+        if following == "/":
+            pos += 1
+            parse_item(subtree(node, name))
+        elif following == "(":
+            pos += 1
+            parse_items(subtree(node, name))
+            pos += 1  # ")"
+        else:
+            node[name] = None
+
+    def parse_items(node: Dict[str, Any]) -> None:
+        nonlocal pos
+        parse_item(node)
+        while pos < len(tokens) and tokens[pos] == ",":
+            pos += 1
+            parse_item(node)
+
+    tree: Dict[str, Any] = {}
+    if tokens:
+        parse_items(tree)
+    return tree
+
+
+def apply_field_mask(value: Any, tree: Optional[Dict[str, Any]]) -> Any:
+    """Keep only the fields selected by a parse_field_mask() tree"""
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [apply_field_mask(item, tree) for item in value]
+    if not isinstance(value, dict):
+        return value
+    return {k: apply_field_mask(value[k], sub) for k, sub in tree.items() if k in value}
+
+
+def _error(status: int, message: str, reason: str = "") -> Tuple[int, JsonBody]:
+    error = {"code": status, "message": message}
+    if reason:
+        error["errors"] = [{"domain": "global", "reason": reason, "message": message}]
+    return status, {"error": error}
+
+
+class FakeGoogleServer:
+    """Threaded HTTP server backed by in-memory Tasks and Calendar state
+
+    Usage::
+
+        with FakeGoogleServer(FaultProfile(latency_ms=50)) as server:
+            server.add_task_list("NEXT Tasks")
+            ...  # point PM_GOOGLE_API_BASE_URL at server.base_url
+    """
+
+    TASKS_MAX_RESULTS = 100
+    TASKS_DEFAULT_RESULTS = 20
+    EVENTS_MAX_RESULTS = 2500
+    EVENTS_DEFAULT_RESULTS = 250
+    LISTS_MAX_RESULTS = 100
+
+    def __init__(self, faults: Optional[FaultProfile] = None, host: str = "127.0.0.1",
+                 port: int = 0, require_auth: bool = False, token_lifetime: int = 3600):
+        self.faults = faults or FaultProfile()
+        self.host = host
+        self.port = port
+        self.require_auth = require_auth
+        self.token_lifetime = token_lifetime
+
+        self.task_lists: Dict[str, Dict[str, Any]] = {}
+        self.tasks: Dict[str, List[Dict[str, Any]]] = {}
+        self.calendars: Dict[str, Dict[str, Any]] = {}
+        self.events: Dict[str, List[Dict[str, Any]]] = {}
+        self.access_tokens: Dict[str, float] = {}
+        self.refresh_tokens: set = set()
+
+        self.stats: Counter = Counter()
+        self._version = 0
+        self._min_sync_version = 0
+        self._request_index = 0
+        self._rng = random.Random(self.faults.seed)
+        self._lock = threading.RLock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+        self.add_calendar("primary", "Primary", primary=True)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> str:
+        """Start serving in a background thread and return the base URL"""
+        backend = self
+
+        class Handler(_Handler):
+            server_backend = backend
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True,
+                         name="fake-google").start()
+        return self.base_url
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeGoogleServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def token_url(self) -> str:
+        return f"{self.base_url}/token"
+
+    @property
+    def request_count(self) -> int:
+        return self.stats["requests"]
+
+    # ------------------------------------------------------------------
+    # Seeding
+    # ------------------------------------------------------------------
+
+    def _next_version(self) -> int:
+        self._version += 1
+        return self._version
+
+    def _stamp(self, resource: Dict[str, Any]) -> Dict[str, Any]:
+        """Bump updated/etag/version after a change"""
+        version = self._next_version()
+        resource["updated"] = _rfc3339(_now())
+        resource["etag"] = f"\"{version}\""
+        resource["_version"] = version
+        return resource
+
+    def add_task_list(self, title: str, list_id: Optional[str] = None,
+                      items: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Create (or replace) a task list, optionally pre-filled with tasks"""
+        with self._lock:
+            list_id = list_id or uuid4().hex[:22]
+            task_list = self._stamp({"kind": "tasks#taskList", "id": list_id, "title": title})
+            task_list["selfLink"] = f"/tasks/v1/users/@me/lists/{list_id}"
+            self.task_lists[list_id] = task_list
+            self.tasks[list_id] = []
+            for item in items or []:
+                self._insert_task(list_id, dict(item), keep_stamp=True)
+            return task_list
+
+    def add_tasks(self, list_id: str, items: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            for item in items:
+                self._insert_task(list_id, dict(item), keep_stamp=True)
+
+    def add_calendar(self, calendar_id: str, summary: str, primary: bool = False,
+                     items: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        with self._lock:
+            calendar = {"kind": "calendar#calendarListEntry", "id": calendar_id,
+                        "summary": summary, "accessRole": "owner",
+                        "timeZone": "UTC", "selected": True}
+            if primary:
+                calendar["primary"] = True
+            self.calendars[calendar_id] = calendar
+            self.events[calendar_id] = []
+            if items:
+                self.add_events(calendar_id, items)
+            return calendar
+
+    def add_events(self, calendar_id: str, items: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            for item in items:
+                self._insert_event(calendar_id, dict(item))
+
+    def issue_token(self, lifetime: Optional[int] = None) -> Dict[str, Any]:
+        """Issue an access/refresh token pair the server will accept"""
+        with self._lock:
+            return self._issue_token(lifetime, refresh_token=None)
+
+    def expire_tokens(self) -> None:
+        """Expire every issued access token (forces a refresh)"""
+        with self._lock:
+            for token in self.access_tokens:
+                self.access_tokens[token] = 0.0
+
+    def invalidate_sync_tokens(self) -> None:
+        """Make every outstanding syncToken answer 410 Gone"""
+        with self._lock:
+            self._min_sync_version = self._version
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.stats.clear()
+
+    # ------------------------------------------------------------------
+    # Dispatch
+    # ------------------------------------------------------------------
+
+    def handle(self, method: str, target: str, headers: Dict[str, str], body: bytes) -> Reply:
+        """Apply faults, then route one HTTP request"""
+        with self._lock:
+            self.stats["requests"] += 1
+            self._request_index += 1
+            index = self._request_index
+            faults = self.faults
+            delay = faults.latency_ms + (self._rng.uniform(0, faults.jitter_ms)
+                                         if faults.jitter_ms else 0.0)
+            rate_limited = (
+                (faults.rate_limit_every and index % faults.rate_limit_every == 0)
+                or (faults.rate_limit_rate and self._rng.random() < faults.rate_limit_rate)
+            )
+            failed = bool(faults.error_rate) and self._rng.random() < faults.error_rate
+
+        if delay:
+            time.sleep(delay / 1000.0)
+
+        retry_after = {"Retry-After": f"{faults.retry_after:g}"}
+        if rate_limited:
+            self._count("injected_429")
+            return self._reply(*_error(429, "Rate Limit Exceeded", "rateLimitExceeded"),
+                               extra_headers=retry_after)
+        if failed:
+            self._count("injected_503")
+            return self._reply(*_error(503, "Backend Error", "backendError"),
+                               extra_headers=retry_after)
+
+        url = urlparse(target)
+        if url.path.rstrip("/") in ("/batch", "/batch/tasks/v1", "/batch/calendar/v3"):
+            self._count("POST batch")
+            return self._batch(headers, body)
+        return self._dispatch(method, target, headers, body)
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _reply(self, status: int, payload: JsonBody, if_none_match: str = "",
+               extra_headers: Optional[Dict[str, str]] = None, fields: str = "") -> Reply:
+        headers = dict(extra_headers or {})
+        if payload is None:
+            return status, headers, b""
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        if status == 200:
+            etag = payload.get("etag") or f"\"{hashlib.md5(data).hexdigest()}\""
+            headers["ETag"] = etag
+            if if_none_match and if_none_match == etag:
+                self._count("not_modified")
+                return 304, headers, b""
+            if fields:
+                masked = apply_field_mask(payload, parse_field_mask(fields))
+                data = json.dumps(masked, ensure_ascii=False).encode("utf-8")
+        headers["Content-Type"] = "application/json; charset=UTF-8"
+        return status, headers, data
+
+    def _dispatch(self, method: str, target: str, headers: Dict[str, str], body: bytes) -> Reply:
+        url = urlparse(target)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        path = url.path
+        headers = {k.lower(): v for k, v in headers.items()}
+
+        if path in ("/token", "/revoke"):
+            self._count(f"{method} oauth{path}")
+            form = {k: v[0] for k, v in parse_qs(body.decode("utf-8")).items()}
+            handler = self._token if path == "/token" else self._revoke
+            return self._reply(*handler(form))
+
+        if self.require_auth and not self._authorized(headers.get("authorization", "")):
+            self._count("unauthorized")
+            return self._reply(*_error(401, "Invalid Credentials", "authError"))
+
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            return self._reply(*_error(400, "Parse Error", "parseError"))
+
+        for pattern, name, route in self._routes:
+            match = pattern.match(path)
+            if match:
+                self._count(f"{method} {name}")
+                with self._lock:
+                    status, result = route(self, method, *map(unquote, match.groups()),
+                                           query=query, headers=headers, body=payload)
+                return self._reply(status, result, if_none_match=headers.get("if-none-match", ""),
+                                   fields=query.get("fields", ""))
+
+        self._count("not_found")
+        return self._reply(*_error(404, "Not Found", "notFound"))
+
+    # ------------------------------------------------------------------
+    # OAuth
+    # ------------------------------------------------------------------
+
+    def _issue_token(self, lifetime: Optional[int], refresh_token: Optional[str]) -> Dict[str, Any]:
+        lifetime = self.token_lifetime if lifetime is None else lifetime
+        access_token = f"fake-at-{uuid4().hex}"
+        self.access_tokens[access_token] = time.time() + lifetime
+        token = {"access_token": access_token, "expires_in": lifetime,
+                 "token_type": "Bearer",
+                 "scope": "https://www.googleapis.com/auth/tasks "
+                          "https://www.googleapis.com/auth/calendar"}
+        if refresh_token is None:
+            refresh_token = f"fake-rt-{uuid4().hex}"
+            self.refresh_tokens.add(refresh_token)
+            token["refresh_token"] = refresh_token
+        return token
+
+    def _authorized(self, header: str) -> bool:
+        if not header.startswith("Bearer "):
+            return False
+        with self._lock:
+            return self.access_tokens.get(header[7:], 0.0) > time.time()
+
+    def _token(self, form: Dict[str, str]) -> Tuple[int, JsonBody]:
+        grant = form.get("grant_type")
+        with self._lock:
+            if grant == "authorization_code":
+                if not form.get("code"):
+                    return 400, {"error": "invalid_grant"}
+                return 200, self._issue_token(None, refresh_token=None)
+            if grant == "refresh_token":
+                refresh_token = form.get("refresh_token", "")
+                # Unknown refresh tokens are accepted unless auth is enforced,
+                # so token files written by fixtures keep working
+                if self.require_auth and refresh_token not in self.refresh_tokens:
+                    return 400, {"error": "invalid_grant"}
+                self._count("token_refreshes")
+                return 200, self._issue_token(None, refresh_token=refresh_token)
+        return 400, {"error": "unsupported_grant_type"}
+
+    def _revoke(self, form: Dict[str, str]) -> Tuple[int, JsonBody]:
+        token = form.get("token", "")
+        with self._lock:
+            self.access_tokens.pop(token, None)
+            self.refresh_tokens.discard(token)
+        return 200, {}
+
+    # ------------------------------------------------------------------
+    # Tasks API
+    # ------------------------------------------------------------------
+
+    def _resolve_list(self, list_id: str) -> Optional[str]:
+        if list_id == "@default":
+            return next(iter(self.task_lists), None)
+        return list_id if list_id in self.task_lists else None
+
+    def _insert_task(self, list_id: str, task: Dict[str, Any], keep_stamp: bool = False) -> Dict[str, Any]:
+        task.setdefault("id", uuid4().hex[:22])
+        task["kind"] = "tasks#task"
+        task.setdefault("title", "")
+        task.setdefault("status", "needsAction")
+        task["selfLink"] = f"/tasks/v1/lists/{list_id}/tasks/{task['id']}"
+        task.setdefault("position", f"{len(self.tasks[list_id]):020d}")
+        if task["status"] == "completed":
+            task.setdefault("completed", _rfc3339(_now()))
+        if keep_stamp and "updated" in task:
+            version = self._next_version()
+            task.setdefault("etag", f"\"{version}\"")
+            task["_version"] = version
+        else:
+            self._stamp(task)
+        self.tasks[list_id].append(task)
+        return task
+
+    @staticmethod
+    def _find(items: List[Dict[str, Any]], item_id: str) -> Optional[Dict[str, Any]]:
+        for item in items:
+            if item["id"] == item_id:
+                return item
+        return None
+
+    @staticmethod
+    def _page(items: List[Dict[str, Any]], query: Dict[str, str], default: int,
+              maximum: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        try:
+            start = int(query.get("pageToken") or 0)
+            size = min(int(query.get("maxResults") or default), maximum)
+        except ValueError:
+            start, size = 0, default
+        page = items[start:start + size]
+        next_token = str(start + size) if start + size < len(items) else None
+        return page, next_token
+
+    def _task_lists(self, method: str, query=None, headers=None, body=None) -> Tuple[int, JsonBody]:
+        if method == "GET":
+            lists = [_public(item) for item in self.task_lists.values()]
+            page, next_token = self._page(lists, query, self.LISTS_MAX_RESULTS,
+                                          self.LISTS_MAX_RESULTS)
+            result = {"kind": "tasks#taskLists",
+                      "etag": f"\"lists-{self._version}\"", "items": page}
+            if next_token:
+                result["nextPageToken"] = next_token
+            return 200, result
+        if method == "POST":
+            return 200, _public(self.add_task_list(body.get("title", "")))
+        return _error(400, "Unsupported method")
+
+    def _task_list(self, method: str, list_id: str, query=None, headers=None, body=None) -> Tuple[int, JsonBody]:
+        if list_id not in self.task_lists:
+            return _error(404, "Task list not found", "notFound")
+        task_list = self.task_lists[list_id]
+        if method == "GET":
+            return 200, _public(task_list)
+        if method in ("PATCH", "PUT"):
+            task_list["title"] = body.get("title", task_list["title"])
+            return 200, _public(self._stamp(task_list))
+        if method == "DELETE":
+            del self.task_lists[list_id]
+            del self.tasks[list_id]
+            return 204, None
+        return _error(400, "Unsupported method")
+
+    def _list_tasks(self, method: str, list_id: str, query=None, headers=None, body=None) -> Tuple[int, JsonBody]:
+        resolved = self._resolve_list(list_id)
+        if resolved is None:
+            return _error(404, "Task list not found", "notFound")
+
+        if method == "POST":
+            return 200, _public(self._insert_task(resolved, dict(body)))
+        if method != "GET":
+            return _error(400, "Unsupported method")
+
+        show_completed = _flag(query, "showCompleted", True)
+        show_hidden = _flag(query, "showHidden", False)
+        show_deleted = _flag(query, "showDeleted", False)
+        updated_min = _parse_time(query["updatedMin"]) if "updatedMin" in query else None
+        due_min = _parse_time(query["dueMin"]) if "dueMin" in query else None
+        due_max = _parse_time(query["dueMax"]) if "dueMax" in query else None
+
+        items = []
+        for task in self.tasks[resolved]:
+            if task.get("deleted") and not show_deleted:
+                continue
+            if task.get("hidden") and not show_hidden:
+                continue
+            if task.get("status") == "completed" and not show_completed:
+                continue
+            if updated_min and _parse_time(task["updated"]) < updated_min:
+                continue
+            if due_min or due_max:
+                if not task.get("due"):
+                    continue
+                due = _parse_time(task["due"])
+                if (due_min and due < due_min) or (due_max and due >= due_max):
+                    continue
+            items.append(_public(task))
+
+        page, next_token = self._page(items, query, self.TASKS_DEFAULT_RESULTS,
+                                      self.TASKS_MAX_RESULTS)
+        result = {"kind": "tasks#tasks", "etag": f"\"tasks-{self._version}\"", "items": page}
+        if next_token:
+            result["nextPageToken"] = next_token
+        return 200, result
+
+    def _clear_tasks(self, method: str, list_id: str, query=None, headers=None, body=None) -> Tuple[int, JsonBody]:
+        resolved = self._resolve_list(list_id)
+        if resolved is None:
+            return _error(404, "Task list not found", "notFound")
+        for task in self.tasks[resolved]:
+            if task.get("status") == "completed" and not task.get("hidden"):
+                task["hidden"] = True
+                self._stamp(task)
+        return 204, None
+
+    def _task(self, method: str, list_id: str, task_id: str, query=None, headers=None, body=None) -> Tuple[int, JsonBody]:
+        resolved = self._resolve_list(list_id)
+        task = self._find(self.tasks[resolved], task_id) if resolved else None
+        if task is None or (task.get("deleted") and method != "GET"):
+            return _error(404, "Task not found", "notFound")
+
+        if_match = (headers or {}).get("if-match")
+        if if_match and method != "GET" and if_match != task.get("etag"):
+            return _error(412, "Precondition Failed", "conditionNotMet")
+
+        if method == "GET":
+            return 200, _public(task)
+        if method in ("PATCH", "PUT"):
+            if method == "PUT":
+                for key in [k for k in task if k not in ("id", "kind", "selfLink", "position")]:
+                    if not key.startswith("_"):
+                        del task[key]
+            task.update({k: v for k, v in body.items() if k not in ("id", "kind", "etag")})
+            if task.get("status") == "completed":
+                task.setdefault("completed", _rfc3339(_now()))
+            else:
+                task.pop("completed", None)
+            return 200, _public(self._stamp(task))
+        if method == "DELETE":
+            task["deleted"] = True
+            self._stamp(task)
+            return 204, None
+        return _error(400, "Unsupported method")
+
+    # ------------------------------------------------------------------
+    # Calendar API
+    # ------------------------------------------------------------------
+
+    def _resolve_calendar(self, calendar_id: str) -> Optional[str]:
+        if calendar_id == "primary":
+            for cid, calendar in self.calendars.items():
+                if calendar.get("primary"):
+                    return cid
+        return calendar_id if calendar_id in self.calendars else None
+
+    def _insert_event(self, calendar_id: str, event: Dict[str, Any]) -> Dict[str, Any]:
+        event.setdefault("id", uuid4().hex)
+        event["kind"] = "calendar#event"
+        event.setdefault("status", "confirmed")
+        event["_start"] = _parse_time(event["start"].get("dateTime") or event["start"]["date"])
+        event["_end"] = _parse_time(event["end"].get("dateTime") or event["end"]["date"])
+        self._stamp(event)
+        self.events[calendar_id].append(event)
+        return event
+
+    def _calendar_list(self, method: str, query=None, headers=None, body=None) -> Tuple[int, JsonBody]:
+        items = list(self.calendars.values())
+        page, next_token = self._page(items, query, 100, 250)
+        result = {"kind": "calendar#calendarList",
+                  "etag": f"\"calendars-{len(self.calendars)}\"", "items": page}
+        if next_token:
+            result["nextPageToken"] = next_token
+        return 200, result
+
+    def _list_events(self, method: str, calendar_id: str, query=None, headers=None, body=None) -> Tuple[int, JsonBody]:
+        resolved = self._resolve_calendar(calendar_id)
+        if resolved is None:
+            return _error(404, "Calendar not found", "notFound")
+
+        if method == "POST":
+            return 200, _public(self._insert_event(resolved, dict(body)))
+        if method != "GET":
+            return _error(400, "Unsupported method")
+
+        events = self.events[resolved]
+        sync_token = query.get("syncToken")
+        if sync_token:
+            if any(k in query for k in ("timeMin", "timeMax", "updatedMin", "orderBy")):
+                return _error(400, "syncToken cannot be combined with filters", "invalidParameter")
+            try:
+                since = int(sync_token)
+            except ValueError:
+                since = -1
+            if since < self._min_sync_version:
+                return _error(410, "Sync token is no longer valid, a full sync is required.",
+                              "fullSyncRequired")
+            items = [e for e in events if e["_version"] > since]
+        else:
+            show_deleted = _flag(query, "showDeleted", False)
+            time_min = _parse_time(query["timeMin"]) if "timeMin" in query else None
+            time_max = _parse_time(query["timeMax"]) if "timeMax" in query else None
+            items = [
+                e for e in events
+                if (show_deleted or e["status"] != "cancelled")
+                and (time_min is None or e["_end"] > time_min)
+                and (time_max is None or e["_start"] < time_max)
+            ]
+            if query.get("orderBy") == "startTime":
+                items.sort(key=lambda e: e["_start"])
+            elif query.get("orderBy") == "updated":
+                items.sort(key=lambda e: e["_version"])
+
+        page, next_token = self._page(items, query, self.EVENTS_DEFAULT_RESULTS,
+                                      self.EVENTS_MAX_RESULTS)
+        result = {"kind": "calendar#events", "summary": self.calendars[resolved]["summary"],
+                  "timeZone": "UTC", "etag": f"\"events-{self._version}\"",
+                  "items": [_public(e) for e in page]}
+        if next_token:
+            result["nextPageToken"] = next_token
+        else:
+            result["nextSyncToken"] = str(self._version)
+        return 200, result
+
+    def _event(self, method: str, calendar_id: str, event_id: str, query=None, headers=None, body=None) -> Tuple[int, JsonBody]:
+        resolved = self._resolve_calendar(calendar_id)
+        event = self._find(self.events[resolved], event_id) if resolved else None
+        if event is None:
+            return _error(404, "Not Found", "notFound")
+        if method == "GET":
+            return 200, _public(event)
+        if event["status"] == "cancelled":
+            return _error(410, "Resource has been deleted", "deleted")
+        if method == "PATCH":
+            event.update({k: v for k, v in body.items() if k not in ("id", "kind", "etag")})
+            event["_start"] = _parse_time(event["start"].get("dateTime") or event["start"]["date"])
+            event["_end"] = _parse_time(event["end"].get("dateTime") or event["end"]["date"])
+            return 200, _public(self._stamp(event))
+        if method == "DELETE":
+            event["status"] = "cancelled"
+            self._stamp(event)
+            return 204, None
+        return _error(400, "Unsupported method")
+
+    _routes = [
+        (re.compile(r"^/tasks/v1/users/@me/lists$"), "tasks.lists", _task_lists),
+        (re.compile(r"^/tasks/v1/users/@me/lists/([^/]+)$"), "tasks.list", _task_list),
+        (re.compile(r"^/tasks/v1/lists/([^/]+)/tasks$"), "tasks.tasks", _list_tasks),
+        (re.compile(r"^/tasks/v1/lists/([^/]+)/clear$"), "tasks.clear", _clear_tasks),
+        (re.compile(r"^/tasks/v1/lists/([^/]+)/tasks/([^/]+)$"), "tasks.task", _task),
+        (re.compile(r"^/calendar/v3/users/me/calendarList$"), "calendar.calendarList", _calendar_list),
+        (re.compile(r"^/calendar/v3/calendars/([^/]+)/events$"), "calendar.events", _list_events),
+        (re.compile(r"^/calendar/v3/calendars/([^/]+)/events/([^/]+)$"), "calendar.event", _event),
+    ]
+
+    # ------------------------------------------------------------------
+    # Batch
+    # ------------------------------------------------------------------
+
+    def _batch(self, headers: Dict[str, str], body: bytes) -> Reply:
+        content_type = {k.lower(): v for k, v in headers.items()}.get("content-type", "")
+        if "multipart/mixed" not in content_type:
+            return self._reply(*_error(400, "Batch requests must be multipart/mixed"))
+
+        message = BytesParser().parsebytes(
+            b"Content-Type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body
+        )
+        boundary = f"batch_{uuid4().hex}"
+        chunks = []
+        for part in message.get_payload():
+            content_id = part.get("Content-ID", "")
+            inner = part.get_payload(decode=True) or b""
+            status, reply_headers, data = self._batch_part(inner)
+            lines = [f"--{boundary}", "Content-Type: application/http"]
+            if content_id:
+                lines.append(f"Content-ID: {content_id.replace('<', '<response-', 1)}")
+            lines += ["", f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}"]
+            lines += [f"{k}: {v}" for k, v in reply_headers.items()]
+            chunks.append("\r\n".join(lines).encode("utf-8") + b"\r\n\r\n" + data + b"\r\n")
+        chunks.append(f"--{boundary}--\r\n".encode("utf-8"))
+        return 200, {"Content-Type": f"multipart/mixed; boundary={boundary}"}, b"".join(chunks)
+
+    def _batch_part(self, raw: bytes) -> Reply:
+        head, _, body = raw.replace(b"\r\n", b"\n").partition(b"\n\n")
+        lines = head.decode("utf-8").split("\n")
+        try:
+            method, target = lines[0].split()[:2]
+        except ValueError:
+            return self._reply(*_error(400, "Malformed batch part"))
+        part_headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            part_headers[name.strip()] = value.strip()
+        return self._dispatch(method, target, part_headers, body.strip())
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_backend: FakeGoogleServer
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without TCP_NODELAY keep-alive
+    # clients stall ~40ms per request on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        status, headers, payload = self.server_backend.handle(
+            self.command, self.path, dict(self.headers.items()), body
+        )
+        if len(payload) > 1024 and "gzip" in (self.headers.get("Accept-Encoding") or ""):
+            payload = gzip.compress(payload, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _handle
+
+
+def build_batch_body(requests: List[Tuple[str, str, JsonBody]], boundary: str = "pm_batch") -> Tuple[str, bytes]:
+    """Encode (method, path, json_body) tuples as a multipart/mixed batch
+
+    Returns:
+        (Content-Type header value, request body)
+    """
+    chunks = []
+    for index, (method, path, body) in enumerate(requests):
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        head = [f"--{boundary}", "Content-Type: application/http", f"Content-ID: <item{index}>", "",
+                f"{method} {path} HTTP/1.1"]
+        if body is not None:
+            head += ["Content-Type: application/json", f"Content-Length: {len(data)}"]
+        chunks.append("\r\n".join(head).encode("utf-8") + b"\r\n\r\n" + data + b"\r\n")
+    chunks.append(f"--{boundary}--\r\n".encode("utf-8"))
+    return f"multipart/mixed; boundary={boundary}", b"".join(chunks)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake Google Tasks/Calendar API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--require-auth", action="store_true")
+    args = parser.parse_args()
+
+    faults = FaultProfile(args.latency_ms, args.jitter_ms, args.error_rate,
+                          args.rate_limit_rate, args.rate_limit_every, args.retry_after, args.seed)
+    server = FakeGoogleServer(faults, host=args.host, port=args.port,
+                              require_auth=args.require_auth)
+    server.add_task_list("My Tasks", list_id="default")
+    base_url = server.start()
+    print(f"Fake Google API listening on {base_url}")
+    print(f"  export PM_GOOGLE_API_BASE_URL={base_url}")
+    print(f"  export PM_GOOGLE_OAUTH_TOKEN_URL={server.token_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
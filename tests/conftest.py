@@ -0,0 +1,45 @@
+import sys
+from pathlib import Path
+
+# Run against the source tree without installing the package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def fake_google(tmp_path, monkeypatch):
+    """Fake Google API server and a factory for PMConfig pointed at it
+
+    The default account has a long-lived token; the HTTP cache is off.
+    """
+    from pm.core.config import PMConfig
+    from pm.testing.fake_google import FakeGoogleServer
+
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    (tmp_path / "home").mkdir()
+    server = FakeGoogleServer()
+    # First list, so it is what "@default" resolves to
+    server.add_task_list("My Tasks", list_id="default")
+    server.start()
+
+    def make_config(**settings):
+        config = PMConfig(config_dir=tmp_path / "config", data_dir=tmp_path / "data",
+                          google_api_base_url=server.base_url, http_cache_enabled=False,
+                          **settings)
+        tokens_dir = config.data_dir / "tokens"
+        tokens_dir.mkdir(parents=True, exist_ok=True)
+        token = {
+            "access_token": "test-access-token",
+            "refresh_token": "test-refresh-token",
+            "token_type": "Bearer",
+            "expires_at": (datetime.now() + timedelta(days=30)).isoformat(),
+        }
+        (tokens_dir / "google_token.json").write_text(json.dumps(token), encoding="utf-8")
+        return config
+
+    yield server, make_config
+    server.stop()
@@ -0,0 +1,57 @@
+"""pm daemon jobs"""
+
+import time
+from datetime import timedelta
+
+from pm.core.config import PMConfig
+from pm.core.daemon import PMDaemon
+from pm.integrations.oauth_manager import OAuthManager, OAuthTokenInfo
+from pm.security.secrets import SecretsManager, SecretType
+
+
+class _RecordingOAuth(OAuthManager):
+    """Refreshes tokens locally and records which ones"""
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.refreshed = []
+
+    def refresh_token(self, service_name, token_info):
+        self.refreshed.append(service_name)
+        token = OAuthTokenInfo("new", token_info.refresh_token, expires_in=3600)
+        self.save_token(service_name, token)
+        return token
+
+
+def _daemon(tmp_path):
+    config = PMConfig(data_dir=tmp_path / "data")
+    oauth = _RecordingOAuth(config)
+    secrets = SecretsManager(tmp_path / "secrets.vault", tmp_path / "master.key", use_keyring=False)
+    return PMDaemon(config, oauth=oauth, secrets_manager=secrets), oauth
+
+
+def test_once_refreshes_tokens_about_to_expire(tmp_path):
+    daemon, oauth = _daemon(tmp_path)
+    # OAuthTokenInfo counts 5 minutes off: expires_at is 60 s from now
+    oauth.save_token("google", OAuthTokenInfo("old", "refresh", expires_in=360))
+    oauth.save_token("google_later", OAuthTokenInfo("old", "refresh", expires_in=7200))
+
+    daemon.run(once=True)
+
+    assert oauth.refreshed == ["google"]
+
+
+def test_only_secrets_tagged_auto_rotate_are_rotated(tmp_path):
+    daemon, _ = _daemon(tmp_path)
+    manager = daemon.secrets_manager
+    every_ms = timedelta(milliseconds=1)
+    tagged = manager.store_secret("backup_key", "old", SecretType.ENCRYPTION_KEY,
+                                  rotation_period=every_ms, tags={"auto_rotate": "true"})
+    untagged = manager.store_secret("data_key", "old", SecretType.ENCRYPTION_KEY,
+                                    rotation_period=every_ms)
+    time.sleep(0.01)
+
+    daemon.run(once=True)
+
+    assert manager.get_secret(tagged.id) != "old"
+    assert manager.get_secret(untagged.id) == "old"
@@ -0,0 +1,15 @@
+"""Completion statistics of the daily task tracker"""
+
+from pm.storage.daily_task_tracker import DailyTaskRecord, DailyTaskTracker
+
+
+def test_weeks_are_iso_weeks(tmp_path):
+    tracker = DailyTaskTracker(tmp_path)
+    # 2026-01-01 is a Thursday: Mon 2025-12-29 .. Sun 2026-01-04 is 2026-W01
+    for day in ["2025-12-28", "2025-12-29", "2026-01-01", "2026-01-04", "2026-01-05"]:
+        tracker.save_daily_tasks(day, [DailyTaskRecord(task_id=f"t-{day}", title="t", category="task")])
+
+    stats = tracker.completion_stats("2025-12-01", "2026-01-31", group_by="week")
+
+    assert [(row["key"], row["total"]) for row in stats] == [
+        ("2025-W52", 1), ("2026-W01", 3), ("2026-W02", 1)]
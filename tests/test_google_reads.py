@@ -0,0 +1,106 @@
+"""Reading task lists and calendars from the fake Google API"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from pm.integrations import google_api
+from pm.integrations.google_calendar import GoogleCalendarIntegration
+from pm.integrations.google_tasks import GoogleTasksIntegration
+
+
+def _tasks(n):
+    return [{"title": f"task {i}"} for i in range(n)]
+
+
+@pytest.fixture
+def streamed_pages(monkeypatch):
+    """Number of responses decoded incrementally with their page members"""
+    pages = []
+    decode = google_api._iter_page_events
+
+    def record(events, key, page):
+        pages.append(page)
+        return decode(events, key, page)
+
+    monkeypatch.setattr(google_api, "_iter_page_events", record)
+    return pages
+
+
+def _events(n):
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    return [{"summary": f"event {i}",
+             "start": {"dateTime": (start + timedelta(hours=i)).isoformat()},
+             "end": {"dateTime": (start + timedelta(hours=i, minutes=30)).isoformat()}}
+            for i in range(n)]
+
+
+@pytest.mark.skipif(not google_api.IJSON_AVAILABLE, reason="ijson not installed")
+def test_task_sync_applies_every_streamed_page(fake_google, streamed_pages):
+    server, make_config = fake_google
+    server.add_tasks("default", _tasks(250))
+    tasks = GoogleTasksIntegration(make_config(task_sync_enabled=True))
+
+    fetched = tasks._fetch_google_tasks("default")
+
+    assert len(fetched) == 250
+    assert len({task.task_id for task in fetched}) == 250
+    assert len(streamed_pages) == 3
+
+
+@pytest.mark.skipif(not google_api.IJSON_AVAILABLE, reason="ijson not installed")
+def test_calendar_sync_streams_its_pages(fake_google, streamed_pages):
+    server, make_config = fake_google
+    server.add_events("primary", _events(20))
+    calendar = GoogleCalendarIntegration(make_config(calendar_sync_enabled=True))
+
+    events = calendar._fetch_calendar_events(3)
+
+    assert len(events) == 20
+    assert streamed_pages and streamed_pages[-1].get("nextSyncToken")
+
+
+def test_task_read_without_sync_follows_every_page(fake_google):
+    server, make_config = fake_google
+    server.add_tasks("default", _tasks(250))
+    tasks = GoogleTasksIntegration(make_config(task_sync_enabled=False))
+
+    assert len(tasks._fetch_google_tasks("default", fields=tasks.TASK_SUMMARY_FIELDS)) == 250
+
+
+def test_calendar_read_without_sync_follows_every_page(fake_google):
+    server, make_config = fake_google
+    server.add_events("primary", _events(2600))
+    calendar = GoogleCalendarIntegration(make_config(calendar_sync_enabled=False))
+
+    events = calendar._fetch_one_calendar("primary", {"Authorization": "Bearer test-access-token"},
+                                          datetime.now(timezone.utc), datetime.now(timezone.utc) + timedelta(days=120),
+                                          None)
+
+    assert len(events) == 2600
+
+
+def test_write_to_default_list_drops_reads_cached_under_its_id(fake_google):
+    server, make_config = fake_google
+    server.add_tasks("default", _tasks(1))
+    config = make_config(task_sync_enabled=False)
+    config.http_cache_enabled = True
+    tasks = GoogleTasksIntegration(config)
+    [task] = tasks.fetch_tasks_from_lists(["default"])
+
+    assert tasks.mark_google_task_completed(task.task_id, "@default")[0]
+
+    [task] = tasks.fetch_tasks_from_lists(["default"])
+    assert task.status == "completed"
+
+
+def test_summary_mask_applies_to_the_sync_snapshot(fake_google):
+    server, make_config = fake_google
+    server.add_tasks("default", [{"title": "task 0", "notes": "long notes"}])
+    tasks = GoogleTasksIntegration(make_config(task_sync_enabled=True))
+
+    [task] = tasks._fetch_google_tasks("default", fields=tasks.TASK_SUMMARY_FIELDS)
+
+    assert task.title == "task 0"
+    assert task.notes is None
+    assert tasks._fetch_google_tasks("default")[0].notes == "long notes"
@@ -0,0 +1,72 @@
+"""HTTP response cache shared by several instances"""
+
+import json
+
+from pm.integrations.http_cache import HttpResponseCache
+
+
+class _Response:
+    def __init__(self, body):
+        self.status_code = 200
+        self.content = json.dumps(body).encode()
+        self.headers = {'ETag': '"1"'}
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class _Client:
+    def __init__(self):
+        self.requests = 0
+
+    def get(self, url, headers=None, params=None, timeout=None, stream=False):
+        self.requests += 1
+        return _Response({'url': url})
+
+
+def test_instances_keep_each_others_entries(tmp_path):
+    client = _Client()
+    tasks = HttpResponseCache(tmp_path, client=client)
+    calendar = HttpResponseCache(tmp_path, client=client)
+
+    tasks.get("https://api/tasks", "tasks.tasks", {})
+    calendar.get("https://api/events", "calendar.events", {})
+
+    index = json.loads((tmp_path / "index.json").read_text())
+    assert sorted(entry['url'] for entry in index.values()) == ["https://api/events", "https://api/tasks"]
+    assert sorted(p.stem for p in tmp_path.glob("*.body")) == sorted(index)
+
+
+def test_cache_hit_does_not_rewrite_the_index(tmp_path):
+    client = _Client()
+    cache = HttpResponseCache(tmp_path, client=client)
+    cache.get("https://api/tasks", "tasks.tasks", {})
+    saved = (tmp_path / "index.json").stat().st_mtime_ns
+
+    response = cache.get("https://api/tasks", "tasks.tasks", {})
+
+    assert response.from_cache
+    assert client.requests == 1
+    assert (tmp_path / "index.json").stat().st_mtime_ns == saved
+
+
+
+def test_store_does_not_decode_the_body(tmp_path):
+    decoded = []
+
+    class _NoHeaderResponse(_Response):
+        def json(self):
+            decoded.append(self.content)
+            return super().json()
+
+    class _NoHeaderClient(_Client):
+        def get(self, url, headers=None, params=None, timeout=None, stream=False):
+            response = _NoHeaderResponse({'etag': '"2"'})
+            response.headers = {}
+            return response
+
+    cache = HttpResponseCache(tmp_path, client=_NoHeaderClient())
+    cache.get("https://api/tasks", "tasks.tasks", {})
+
+    assert decoded == []
+    assert cache.get("https://api/tasks", "tasks.tasks", {}).from_cache
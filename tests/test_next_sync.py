@@ -0,0 +1,92 @@
+"""NEXT.md push and the offline mutation queue"""
+
+from datetime import date
+
+from pm.core.config import PMConfig
+from pm.core.next_sync import NextSyncManager
+from pm.integrations.google_tasks import TaskListReadError
+from pm.integrations.offline_queue import MutationQueue
+from pm.parsers.next_md_parser import NextMdParser
+
+
+class _OfflineTasks:
+    """Google Tasks stand-in whose list reads fail"""
+
+    def __init__(self):
+        self.created = []
+
+    def flush_pending_mutations(self):
+        return 0, 0, []
+
+    def find_or_create_task_list(self, title):
+        return "list-1"
+
+    def get_tasks_from_list(self, list_id, strict=False):
+        if strict:
+            raise TaskListReadError("offline")
+        return []
+
+    def create_task(self, list_id, title, notes=None, due_date=None):
+        self.created.append(title)
+        return True, "local_x"
+
+
+def test_push_creates_nothing_when_the_list_cannot_be_read(tmp_path):
+    project = tmp_path / "programs" / "demo"
+    project.mkdir(parents=True)
+    (project / "NEXT.md").write_text("# NEXT\n\n## 今天\n- [ ] write tests\n", encoding="utf-8")
+
+    manager = NextSyncManager(PMConfig(data_dir=tmp_path / "data"), projects_path=str(tmp_path / "programs"))
+    manager.master_path = tmp_path / "MASTER.md"
+    manager.google_tasks = tasks = _OfflineTasks()
+
+    stats = manager.push()
+
+    assert tasks.created == []
+    assert stats.tasks_pushed == 0
+    assert stats.errors
+
+
+def test_queued_create_with_same_title_is_merged(tmp_path):
+    queue = MutationQueue(tmp_path / "queue.json")
+
+    first = queue.enqueue_create("list-1", {"title": "[demo] write tests"})
+    second = queue.enqueue_create("list-1", {"title": "[demo] write tests", "notes": "n"})
+    other = queue.enqueue_create("list-2", {"title": "[demo] write tests"})
+
+    assert second == first
+    assert other != first
+    assert len(MutationQueue(tmp_path / "queue.json")) == 2
+
+
+def test_delete_cancels_queued_create_in_another_list(tmp_path):
+    queue = MutationQueue(tmp_path / "queue.json")
+    local_id = queue.enqueue_create("list-1", {"title": "[demo] write tests"})
+    queue.enqueue_patch("@default", "task-9", {"status": "completed"})
+    queue.enqueue_patch("list-2", "task-9", {"notes": "n"})
+
+    queue.enqueue_delete("@default", local_id)
+
+    [patch] = queue.pending()
+    assert patch.task_id == "task-9"
+    assert patch.body == {"status": "completed", "notes": "n"}
+
+
+def test_queues_of_two_processes_keep_each_others_ops(tmp_path):
+    first = MutationQueue(tmp_path / "queue.json")
+    second = MutationQueue(tmp_path / "queue.json")
+
+    first.enqueue_patch("list-1", "task-1", {"status": "completed"})
+    second.enqueue_patch("list-1", "task-2", {"status": "completed"})
+
+    assert [op.task_id for op in MutationQueue(tmp_path / "queue.json").pending()] == ["task-1", "task-2"]
+
+
+def test_writing_next_md_leaves_no_lock_file(tmp_path):
+    project = tmp_path / "demo"
+    project.mkdir()
+    (project / "NEXT.md").write_text("# NEXT\n\n## 今天\n- [ ] write tests\n", encoding="utf-8")
+
+    NextMdParser().update_task_completion(project / "NEXT.md", "write tests", date(2026, 1, 5))
+
+    assert sorted(p.name for p in project.iterdir()) == ["NEXT.md"]
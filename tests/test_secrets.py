@@ -0,0 +1,26 @@
+"""Writing to the secrets vault after a master key rotation"""
+
+from pm.security.secrets import SecretsManager, SecretType
+
+
+def _open(tmp_path):
+    return SecretsManager(tmp_path / "secrets.vault", tmp_path / "master.key", use_keyring=False)
+
+
+def test_writes_succeed_after_another_instance_rotated_the_key(tmp_path):
+    rotator = _open(tmp_path)
+    kept = rotator.store_secret("kept", "v1", SecretType.TOKEN)
+    doomed = rotator.store_secret("doomed", "x", SecretType.TOKEN)
+    stale = _open(tmp_path)
+
+    assert rotator.rotate_master_key()
+
+    added = stale.store_secret("added", "v2", SecretType.API_KEY)
+    assert stale.update_secret(kept.id, "v3")
+    assert stale.delete_secret(doomed.id)
+    assert stale.get_secret(added.id) == "v2"
+
+    reader = _open(tmp_path)
+    assert reader.get_secret(added.id) == "v2"
+    assert reader.get_secret(kept.id) == "v3"
+    assert doomed.id not in reader.secrets
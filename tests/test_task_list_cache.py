@@ -0,0 +1,24 @@
+"""Task list id cache shared by several accounts"""
+
+from pm.integrations.task_list_cache import TaskListIdCache
+
+
+def test_accounts_saved_by_two_processes_are_both_kept(tmp_path):
+    work = TaskListIdCache(tmp_path / "task_lists.json")
+    home = TaskListIdCache(tmp_path / "task_lists.json")
+
+    work.put("work", "NEXT Tasks", "list-w")
+    home.update("home", [{"id": "list-h", "title": "NEXT Tasks"}])
+
+    cache = TaskListIdCache(tmp_path / "task_lists.json")
+    assert cache.get("work", "next tasks") == "list-w"
+    assert cache.get("home", "next tasks") == "list-h"
+
+
+def test_invalidate_removes_every_title_of_the_id(tmp_path):
+    cache = TaskListIdCache(tmp_path / "task_lists.json")
+    cache.update("work", [{"id": "list-w", "title": "NEXT Tasks"}, {"id": "list-x", "title": "Other"}])
+
+    assert cache.invalidate_id("work", "list-w")
+    assert not cache.invalidate_id("work", "list-w")
+    assert TaskListIdCache(tmp_path / "task_lists.json").get("work", "Other") == "list-x"
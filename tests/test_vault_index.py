@@ -0,0 +1,43 @@
+"""Secondary indexes of the secrets vault across processes"""
+
+from pm.security.secrets import SecretsManager, SecretType
+
+
+def _open(tmp_path):
+    # Each instance opens the vault from disk, like a separate process
+    return SecretsManager(tmp_path / "secrets.vault", tmp_path / "master.key", use_keyring=False)
+
+
+def test_saved_index_older_than_checkpoint_is_not_used(tmp_path):
+    first = _open(tmp_path)
+    first.store_secret("n0", "v0", SecretType.TOKEN)
+    # Saves secrets.vault.index
+    assert first.get_secret_by_name("n0") == "v0"
+
+    # Writes past CHECKPOINT_INTERVAL without ever loading the index, so the
+    # checkpoint moves beyond the saved index
+    writer = _open(tmp_path)
+    for i in range(1, 71):
+        writer.store_secret(f"n{i}", f"v{i}", SecretType.TOKEN)
+
+    reader = _open(tmp_path)
+    assert reader.get_secret_by_name("n5") == "v5"
+    assert len(reader.list_secrets(SecretType.TOKEN)) == 71
+
+
+def test_saved_index_is_brought_up_to_date(tmp_path):
+    first = _open(tmp_path)
+    for i in range(70):
+        first.store_secret(f"n{i}", f"v{i}", SecretType.TOKEN)
+    first.get_secret_by_name("n0")
+    first.store.checkpoint()
+
+    writer = _open(tmp_path)
+    doomed = writer.store_secret("gone", "x", SecretType.API_KEY, tags={"env": "prod"})
+    writer.store_secret("kept", "y", SecretType.API_KEY, tags={"env": "prod"})
+    writer.delete_secret(doomed.id)
+
+    reader = _open(tmp_path)
+    assert reader.get_secret_by_name("gone") is None
+    assert reader.get_secret_by_name("kept") == "y"
+    assert [s["name"] for s in reader.list_secrets(tags={"env": "prod"})] == ["kept"]